@@ -4,9 +4,13 @@
 提供技术指标计算、HoltWinters平滑等分析功能
 """
 
-from .indicators import TechnicalIndicators, HoltWintersIndicator
+from .indicators import TechnicalIndicators, HoltWintersIndicator, HoltWintersResult, HoltWintersState
+from .panel import FactorPanel
 
 __all__ = [
     'TechnicalIndicators',
     'HoltWintersIndicator',
+    'HoltWintersResult',
+    'HoltWintersState',
+    'FactorPanel',
 ]
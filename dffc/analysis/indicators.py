@@ -5,9 +5,146 @@
 """
 
 import numpy as np
-import copy
-from typing import List, Optional, Dict, Any
-from dataclasses import dataclass
+import bisect
+import hashlib
+import json
+from typing import List, Optional, Dict, Any, Tuple
+from dataclasses import dataclass, field, asdict, replace
+
+
+# 批量HoltWinters计算时，少于该行数则逐行标量递推
+_BATCH_MIN_ROWS = 12
+
+
+@dataclass
+class HoltWintersState:
+    """
+    HoltWinters滚动平滑的递推状态
+    
+    保存处理完已有数据后的全部递推量，追加一个新数据只需O(1)（与季节长度无关的常数步）
+    即可得到新数据点的拟合值，结果与对完整序列重新计算一致。
+    可通过 to_dict/save 序列化，与基金数据一起保存。
+    """
+    alpha: float
+    beta: float
+    gamma: float
+    season_length: int
+    count: int = 0                                   # 已处理的数据个数
+    last_value: Optional[float] = None               # 最后一个已处理的数据
+    ses_level: Optional[float] = None                # 不足一个周期时的简单指数平滑水平
+    head: List[float] = field(default_factory=list)  # 前m个数据，用于初始化
+    level0: Optional[float] = None                   # 共用的初始水平
+    base_level: float = 0.0                          # 初始趋势为0时的水平
+    base_trend: float = 0.0                          # 初始趋势为0时的趋势
+    seasonal: List[float] = field(default_factory=list)
+    sens_level: float = 0.0                          # 水平对初始趋势的灵敏度
+    sens_trend: float = 1.0                          # 趋势对初始趋势的灵敏度
+    sens_seasonal: List[float] = field(default_factory=list)
+    tail_sum: float = 0.0                            # 第m个数据之后的累加和
+    fingerprint: Optional[str] = None                # 已处理数据的摘要，用于发现历史数据被修改
+    
+    @staticmethod
+    def fingerprint_of(values) -> str:
+        """按时间正序的数据的摘要（逐字节哈希，任何一个数据变化都会改变摘要）"""
+        array = np.ascontiguousarray(np.asarray(values, dtype=np.float64))
+        return hashlib.blake2b(array.tobytes(), digest_size=16).hexdigest()
+    
+    @classmethod
+    def from_series(cls, values, alpha: float, beta: float, gamma: float,
+                    season_length: int) -> Tuple['HoltWintersState', np.ndarray]:
+        """
+        用按时间正序的数据构建状态
+        
+        Returns:
+            (state, smoothed)：处理完全部数据后的状态，以及每个数据点的拟合值
+        """
+        state = cls(alpha=float(alpha), beta=float(beta), gamma=float(gamma), season_length=int(season_length))
+        values = np.asarray(values, dtype=float)
+        smoothed = np.array([state.update(x)[0] for x in values.tolist()], dtype=float)
+        state.fingerprint = cls.fingerprint_of(values)
+        return state, smoothed
+    
+    def matches(self, alpha: float, beta: float, gamma: float, season_length: int) -> bool:
+        """判断状态是否由相同的参数计算得到"""
+        return (self.alpha == float(alpha) and self.beta == float(beta)
+                and self.gamma == float(gamma) and self.season_length == int(season_length))
+    
+    def update(self, new_value: float) -> Tuple[float, float]:
+        """
+        追加一个新数据，推进水平、趋势和季节项
+        
+        Args:
+            new_value: 新的数据（时间上位于已处理数据之后）
+            
+        Returns:
+            (fitted, delta)：新数据点的拟合值，以及差分 new_value - fitted
+        """
+        x = float(new_value)
+        m = self.season_length
+        L = self.count + 1
+        if L < m:
+            # 数据不足一个季节周期：简单指数平滑
+            if self.ses_level is None:
+                self.ses_level = x
+            else:
+                self.ses_level = self.alpha * x + (1 - self.alpha) * self.ses_level
+            self.head.append(x)
+            fitted = self.ses_level
+        elif L == m:
+            # 刚好一个季节周期：初始化水平和季节项
+            self.head.append(x)
+            self.level0 = float(np.mean(self.head))
+            self.seasonal = [v - self.level0 for v in self.head]
+            self.sens_seasonal = [0.0] * m
+            self.base_level, self.base_trend = self.level0, 0.0
+            self.sens_level, self.sens_trend = 0.0, 1.0
+            trend0 = self.head[m-1] - self.head[m-2] if m >= 2 else 0
+            fitted = (self.base_level + self.base_trend + self.seasonal[0]) + trend0 * (self.sens_level + self.sens_trend + self.sens_seasonal[0])
+            self.head = []
+        else:
+            alpha, beta, gamma = self.alpha, self.beta, self.gamma
+            k = (L - 1 - m) % m
+            self.tail_sum += x
+            last_level, last_trend = self.base_level, self.base_trend
+            self.base_level = alpha * (x - self.seasonal[k]) + (1 - alpha) * (last_level + last_trend)
+            self.base_trend = beta * (self.base_level - last_level) + (1 - beta) * last_trend
+            self.seasonal[k] = gamma * (x - self.base_level) + (1 - gamma) * self.seasonal[k]
+            last_level, last_trend = self.sens_level, self.sens_trend
+            self.sens_level = -alpha * self.sens_seasonal[k] + (1 - alpha) * (last_level + last_trend)
+            self.sens_trend = beta * (self.sens_level - last_level) + (1 - beta) * last_trend
+            self.sens_seasonal[k] = -gamma * self.sens_level + (1 - gamma) * self.sens_seasonal[k]
+            trend0 = (self.tail_sum / (L - m) - self.level0) / m
+            k = (L - m) % m
+            fitted = (self.base_level + self.base_trend + self.seasonal[k]) + trend0 * (self.sens_level + self.sens_trend + self.sens_seasonal[k])
+        self.count = L
+        self.last_value = x
+        return fitted, x - fitted
+    
+    def copy(self) -> 'HoltWintersState':
+        """复制状态（用于试算估计值而不改变原状态）"""
+        # 字段只有标量和浮点数列表，逐个复制列表即可，比deepcopy快得多
+        return replace(self, head=list(self.head), seasonal=list(self.seasonal),
+                       sens_seasonal=list(self.sens_seasonal))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可JSON序列化的字典"""
+        return asdict(self)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'HoltWintersState':
+        """从字典恢复状态"""
+        return cls(**data)
+    
+    def save(self, path: str) -> None:
+        """保存状态到JSON文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+    
+    @classmethod
+    def load(cls, path: str) -> 'HoltWintersState':
+        """从JSON文件加载状态"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
 
 
 @dataclass
@@ -19,11 +156,68 @@ class HoltWintersResult:
     delta_values: Optional[List[float]] = None
     delta_percentage: Optional[List[float]] = None
     estimate_delta_percentage: Optional[float] = None
+    state: Optional[HoltWintersState] = None  # 历史数据（不含估计值）处理完后的递推状态
 
 
 class TechnicalIndicators:
     """技术指标计算类"""
     
+    @staticmethod
+    def centered_rolling_mean(data, window_size: int, edge: str = 'none') -> np.ndarray:
+        """
+        基于前缀和的中心移动平均，O(n)，与窗口大小无关
+        支持二维输入：沿 axis=0 计算，每一列是一条独立的序列
+        
+        Args:
+            data: 一维或二维数据
+            window_size: 窗口大小
+            edge: 边界处理方式
+                'none'   奇数窗口取 [i-half, i+half]，偶数窗口左边少取一个点，
+                         即 [i-half+1, i+half]；窗口不完整的位置为NaN
+                'shrink' 取对称窗口 [i-half, i+half]，两端不足部分使用较小窗口
+            
+        Returns:
+            与输入形状相同的数组；窗口内含NaN的位置结果为NaN
+        """
+        if edge not in ('none', 'shrink'):
+            raise ValueError(f"不支持的边界处理方式: {edge}")
+        arr = np.asarray(data, dtype=float)
+        n = arr.shape[0] if arr.ndim > 0 else 0
+        result = np.full(arr.shape, np.nan)
+        if n == 0 or window_size < 0 or (edge == 'none' and window_size == 0):
+            return result
+        
+        half = window_size // 2
+        if edge == 'shrink':
+            left = half
+        else:
+            left = half if window_size % 2 == 1 else half - 1
+        idx = np.arange(n)
+        start = idx - left
+        end = idx + half + 1
+        if edge == 'shrink':
+            valid = np.ones(n, dtype=bool)
+        else:
+            valid = (start >= 0) & (end <= n)
+        start = np.clip(start[valid], 0, n)
+        end = np.clip(end[valid], 0, n)
+        
+        # 先减去每列的均值再累加，降低前缀和的舍入误差
+        nan_mask = np.isnan(arr)
+        count = np.maximum((~nan_mask).sum(axis=0), 1)
+        offset = np.where(nan_mask, 0.0, arr).sum(axis=0) / count
+        centered = np.where(nan_mask, 0.0, arr - offset)
+        csum = np.zeros((n + 1,) + arr.shape[1:])
+        np.cumsum(centered, axis=0, out=csum[1:])
+        cnan = np.zeros((n + 1,) + arr.shape[1:], dtype=np.int64)
+        np.cumsum(nan_mask, axis=0, out=cnan[1:])
+        
+        length = (end - start).reshape((-1,) + (1,) * (arr.ndim - 1))
+        means = (csum[end] - csum[start]) / length + offset
+        means[(cnan[end] - cnan[start]) > 0] = np.nan
+        result[valid] = means
+        return result
+    
     @staticmethod
     def central_moving_average(data: List[float], window_size: int) -> List[Optional[float]]:
         """
@@ -41,28 +235,38 @@ class TechnicalIndicators:
         if not data or window_size <= 0 or window_size > len(data):
             return [None] * len(data)
         
-        data_copy = copy.deepcopy(data)
-        n = len(data_copy)
-        result = [None] * n
-        
-        # 计算窗口的半径（前后各取多少个点）
-        half_window = window_size // 2
+        # 对于奇数窗口大小，窗口完全对称；对于偶数窗口大小，左边少取一个点
+        result = TechnicalIndicators.centered_rolling_mean(data, window_size)
+        return [None if np.isnan(v) else v for v in result.tolist()]
+    
+    @staticmethod
+    def volatility_ratio_matrix(values, cma_values) -> np.ndarray:
+        """
+        按列计算波动率比率：(values - cma_values)的标准差 / CMA的最近值
+        CMA为NaN的位置不参与计算，"最近值"指沿 axis=0 最后一个有效的CMA
         
-        # 计算中心移动平均
-        for i in range(n - half_window):
-            # 对于奇数窗口大小，窗口完全对称
-            # 对于偶数窗口大小，左边少取一个点
-            if window_size % 2 == 1:
-                # 奇数窗口：左右各取 half_window 个点
-                window_data = data_copy[i - half_window:i + half_window + 1]
-            else:
-                # 偶数窗口：左边取 half_window-1 个点，右边取 half_window 个点
-                window_data = data_copy[i - half_window + 1:i + half_window + 1]
+        Args:
+            values: 一维或二维数据
+            cma_values: 与 values 形状相同的CMA结果（无效位置为NaN）
             
-            if window_data:
-                result[i] = sum(window_data) / len(window_data)
-        
-        return result
+        Returns:
+            每列的波动率比率（一维输入时为0维数组），没有有效CMA的列为NaN
+        """
+        values = np.asarray(values, dtype=float)
+        cma = np.asarray(cma_values, dtype=float)
+        if values.shape != cma.shape:
+            raise ValueError("输入数据长度不匹配")
+        valid = ~np.isnan(cma)
+        has_valid = valid.any(axis=0)
+        diff = np.where(valid, values - cma, 0.0)
+        count = np.maximum(valid.sum(axis=0), 1)
+        mean = diff.sum(axis=0) / count
+        std_diff = np.sqrt((np.where(valid, diff - mean, 0.0) ** 2).sum(axis=0) / count)
+        last = values.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+        recent_cma = np.take_along_axis(cma, np.expand_dims(last, 0), axis=0)[0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ratio = std_diff / recent_cma
+        return np.where(has_valid, ratio, np.nan)
     
     @staticmethod
     def volatility_ratio(unit_values: List[float], cma_values: List[Optional[float]]) -> float:
@@ -85,36 +289,218 @@ class TechnicalIndicators:
         if len(unit_values) != len(cma_values):
             raise ValueError("输入数据长度不匹配")
         
-        # 计算差值，只考虑非None的部分
-        diff_values = []
-        recent_cma = None
-        
-        for i in range(len(unit_values)):
-            if cma_values[i] is not None:
-                diff_values.append(unit_values[i] - cma_values[i])
-                recent_cma = cma_values[i]  # 更新最近的CMA值
-        
-        if not diff_values or recent_cma is None:
+        # 只考虑非None的部分（None转换为NaN）
+        cma = np.array([np.nan if v is None else v for v in cma_values], dtype=float)
+        if np.isnan(cma).all():
             raise ValueError("没有有效的CMA数据用于计算")
-        
-        # 计算标准差
-        std_diff = np.std(diff_values)
-        
-        # 计算波动率比率
-        fluctuation_rate = std_diff / recent_cma
-        return fluctuation_rate
+        return float(TechnicalIndicators.volatility_ratio_matrix(unit_values, cma))
 
 
 class HoltWintersIndicator:
     """HoltWinters指数平滑指标"""
     
+    @staticmethod
+    def rolling_smooth(arr, alpha: float, beta: float, gamma: float, season_length: int) -> np.ndarray:
+        """
+        线性时间的 HoltWinters 滚动平滑（按时间正序，最早的数据在前）
+        
+        第t个点的结果与"用前t+1个数据重新初始化再完整递推"的结果一致。
+        各前缀的初始化只有初始趋势不同（水平与季节项只依赖前m个数据），
+        而递推对初始状态是线性的，因此只需一次正向递推，同时跟踪
+        递推结果对初始趋势的灵敏度，即可得到每个前缀的拟合值。
+        
+        Args:
+            arr: 按时间正序排列的数据
+            alpha: 水平平滑参数
+            beta: 趋势平滑参数
+            gamma: 季节性平滑参数
+            season_length: 季节周期长度
+            
+        Returns:
+            与arr长度相同的平滑结果数组
+        """
+        arr = np.asarray(arr, dtype=float)
+        n = len(arr)
+        m = int(season_length)
+        smoothed = np.zeros(n)
+        if n == 0:
+            return smoothed
+        
+        values = arr.tolist()  # 标量递推时Python浮点数比numpy标量快得多
+        
+        # 数据不足一个季节周期的前缀：简单指数平滑
+        level = values[0]
+        smoothed[0] = level
+        for t in range(1, min(n, m - 1)):
+            level = alpha * values[t] + (1 - alpha) * level
+            smoothed[t] = level
+        if n < m:
+            return smoothed
+        
+        # 所有前缀共用的初始水平和季节项
+        level0 = np.mean(arr[:m])
+        level0 = float(level0)
+        seasonal = [values[i] - level0 for i in range(m)]
+        # base_*: 初始趋势为0时的递推状态；sens_*: 状态对初始趋势的灵敏度
+        base_level, base_trend = level0, 0.0
+        sens_level, sens_trend = 0.0, 1.0
+        sens_seasonal = [0.0] * m
+        # 前缀 arr[:L] 的初始趋势为 (mean(arr[m:L]) - level0) / m，用累加和计算
+        tail_sum = 0.0
+        for L in range(m, n + 1):
+            if L == m:
+                trend0 = values[m-1] - values[m-2] if m >= 2 else 0
+            else:
+                trend0 = (tail_sum / (L - m) - level0) / m
+            k = (L - m) % m
+            smoothed[L-1] = (base_level + base_trend + seasonal[k]) + trend0 * (sens_level + sens_trend + sens_seasonal[k])
+            if L == n:
+                break
+            # 用第L个数据推进一步
+            x = values[L]
+            tail_sum += x
+            last_level, last_trend = base_level, base_trend
+            base_level = alpha * (x - seasonal[k]) + (1 - alpha) * (last_level + last_trend)
+            base_trend = beta * (base_level - last_level) + (1 - beta) * last_trend
+            seasonal[k] = gamma * (x - base_level) + (1 - gamma) * seasonal[k]
+            last_level, last_trend = sens_level, sens_trend
+            sens_level = -alpha * sens_seasonal[k] + (1 - alpha) * (last_level + last_trend)
+            sens_trend = beta * (sens_level - last_level) + (1 - beta) * last_trend
+            sens_seasonal[k] = -gamma * sens_level + (1 - gamma) * sens_seasonal[k]
+        return smoothed
+    
+    @staticmethod
+    def rolling_smooth_batch(series, params, season_length: int, lengths=None, return_state: bool = False):
+        """
+        批量计算多组参数、多条序列的 HoltWinters 滚动平滑
+        
+        每一行独立计算，结果与 rolling_smooth 一致。递推在时间维度上逐步进行，
+        每一步对所有行同时做数组运算，适合参数网格搜索和有限差分梯度。
+        
+        Args:
+            series: 按时间正序的数据，形状为 (n,) 或 (S, n)
+            params: (alpha, beta, gamma) 参数组，形状为 (3,) 或 (P, 3)
+            season_length: 季节周期长度（所有行共用）
+            lengths: 各行的有效数据个数，形状为 (K,)，之后的位置（如补齐的NaN）不计入递推状态；
+                     None时均为 n，只在 return_state=True 时使用
+            return_state: 是否同时返回各行处理完有效数据后的递推状态
+            
+        Returns:
+            形状为 (K, n) 的平滑结果矩阵，K = max(S, P)。
+            S 与 P 需相等（逐行配对），或其中之一为1（广播）。
+            return_state=True 时返回 (平滑结果, HoltWintersState 列表)，
+            状态与对该行有效数据调用 HoltWintersState.from_series 的结果一致。
+        """
+        series = np.atleast_2d(np.asarray(series, dtype=float))
+        params = np.atleast_2d(np.asarray(params, dtype=float))
+        if params.shape[1] != 3:
+            raise ValueError("params 每行应为 (alpha, beta, gamma)")
+        S, n = series.shape
+        P = params.shape[0]
+        if S != P and S != 1 and P != 1:
+            raise ValueError(f"序列数({S})与参数组数({P})不匹配")
+        K = max(S, P)
+        m = int(season_length)
+        lengths = np.full(K, n, dtype=int) if lengths is None else np.asarray(lengths, dtype=int)
+        if return_state and (lengths.shape != (K,) or np.any(lengths < 1) or np.any(lengths > n)):
+            raise ValueError(f"lengths 应为 {K} 个 1 到 {n} 之间的整数")
+        
+        # 行数很少时逐行标量递推更快（numpy 小数组运算有固定开销）
+        if K < _BATCH_MIN_ROWS:
+            smoothed = np.array([
+                HoltWintersIndicator.rolling_smooth(series[k % S], *params[k % P], m)
+                for k in range(K)
+            ]).reshape(K, n)
+            if not return_state:
+                return smoothed
+            states = [HoltWintersState.from_series(series[k % S, :lengths[k]], *params[k % P], m)[0]
+                      for k in range(K)]
+            return smoothed, states
+        
+        x = np.ascontiguousarray(np.broadcast_to(series, (K, n)))
+        alpha = np.broadcast_to(params[:, 0], (K,))
+        beta = np.broadcast_to(params[:, 1], (K,))
+        gamma = np.broadcast_to(params[:, 2], (K,))
+        smoothed = np.zeros((K, n))
+        if n == 0:
+            return (smoothed, []) if return_state else smoothed
+        
+        # 数据不足一个季节周期的前缀：简单指数平滑
+        level = x[:, 0].copy()
+        smoothed[:, 0] = level
+        for t in range(1, min(n, m - 1)):
+            level = alpha * x[:, t] + (1 - alpha) * level
+            smoothed[:, t] = level
+        if n < m:
+            if not return_state:
+                return smoothed
+            return smoothed, HoltWintersIndicator._short_states(x, alpha, beta, gamma, m, lengths, range(K))
+        
+        # 共用的初始水平、季节项，以及各前缀的初始趋势
+        level0 = x[:, :m].mean(axis=1)
+        seasonal = x[:, :m] - level0[:, None]
+        trend0 = np.empty((K, n - m + 1))
+        trend0[:, 0] = x[:, m-1] - x[:, m-2] if m >= 2 else 0
+        if n > m:
+            tail_mean = np.cumsum(x[:, m:], axis=1) / np.arange(1, n - m + 1)
+            trend0[:, 1:] = (tail_mean - level0[:, None]) / m
+        
+        base_level, base_trend = level0.copy(), np.zeros(K)
+        sens_level, sens_trend = np.zeros(K), np.ones(K)
+        sens_seasonal = np.zeros((K, m))
+        base_fit = np.empty((K, n - m + 1))
+        sens_fit = np.empty((K, n - m + 1))
+        # 各行处理完有效数据时的递推量，第k个季节项的下标与 HoltWintersState 相同
+        states: List[Optional[HoltWintersState]] = [None] * K
+        for L in range(m, n + 1):
+            k = (L - m) % m
+            base_fit[:, L-m] = base_level + base_trend + seasonal[:, k]
+            sens_fit[:, L-m] = sens_level + sens_trend + sens_seasonal[:, k]
+            if return_state:
+                for row in np.flatnonzero(lengths == L).tolist():
+                    states[row] = HoltWintersState(
+                        alpha=float(alpha[row]), beta=float(beta[row]), gamma=float(gamma[row]), season_length=m,
+                        count=L, last_value=float(x[row, L-1]), ses_level=float(level[row]) if m > 1 else None,
+                        level0=float(level0[row]),
+                        base_level=float(base_level[row]), base_trend=float(base_trend[row]),
+                        seasonal=seasonal[row].tolist(), sens_level=float(sens_level[row]),
+                        sens_trend=float(sens_trend[row]), sens_seasonal=sens_seasonal[row].tolist(),
+                        tail_sum=float(np.sum(x[row, m:L])),
+                        fingerprint=HoltWintersState.fingerprint_of(x[row, :L]))
+            if L == n:
+                break
+            xt = x[:, L]
+            last_level, last_trend = base_level, base_trend
+            base_level = alpha * (xt - seasonal[:, k]) + (1 - alpha) * (last_level + last_trend)
+            base_trend = beta * (base_level - last_level) + (1 - beta) * last_trend
+            seasonal[:, k] = gamma * (xt - base_level) + (1 - gamma) * seasonal[:, k]
+            last_level, last_trend = sens_level, sens_trend
+            sens_level = -alpha * sens_seasonal[:, k] + (1 - alpha) * (last_level + last_trend)
+            sens_trend = beta * (sens_level - last_level) + (1 - beta) * last_trend
+            sens_seasonal[:, k] = -gamma * sens_level + (1 - gamma) * sens_seasonal[:, k]
+        smoothed[:, m-1:] = base_fit + trend0 * sens_fit
+        if not return_state:
+            return smoothed
+        # 有效数据不足一个季节周期的行逐行计算
+        short = [row for row in range(K) if lengths[row] < m]
+        for row, state in zip(short, HoltWintersIndicator._short_states(x, alpha, beta, gamma, m, lengths, short)):
+            states[row] = state
+        return smoothed, states
+    
+    @staticmethod
+    def _short_states(x, alpha, beta, gamma, m: int, lengths, rows) -> List['HoltWintersState']:
+        """有效数据不足一个季节周期的行的递推状态（只有简单指数平滑，逐行计算的开销很小）"""
+        return [HoltWintersState.from_series(x[row, :lengths[row]], alpha[row], beta[row], gamma[row], m)[0]
+                for row in rows]
+    
     @staticmethod
     def calculate(data: List[float], 
                   alpha: float, 
                   beta: float, 
                   gamma: float, 
                   season_length: int,
-                  estimate_value: Optional[float] = None) -> HoltWintersResult:
+                  estimate_value: Optional[float] = None,
+                  previous: Optional[HoltWintersResult] = None) -> HoltWintersResult:
         """
         计算 HoltWinters 三次指数平滑
         
@@ -125,6 +511,8 @@ class HoltWintersIndicator:
             gamma: 季节性平滑参数
             season_length: 季节周期长度
             estimate_value: 可选的估计值（会添加到数据最前面）
+            previous: 可选的上一次计算结果。若参数相同且data只是在其基础上
+                      新增了数据，则从其递推状态继续计算，不重算历史
             
         Returns:
             HoltWintersResult对象，包含平滑结果和相关计算
@@ -132,80 +520,132 @@ class HoltWintersIndicator:
         if not data:
             raise ValueError("数据不能为空")
         
-        # 准备计算用的数组
-        if estimate_value is not None:
-            # 在最前面插入估计值
-            temp_data = [estimate_value] + copy.deepcopy(data)
-            has_estimate = True
-        else:
-            temp_data = copy.deepcopy(data)
-            has_estimate = False
+        # 按时间正序排列（因为算法需要从历史到现在的顺序）
+        chronological = np.array(data, dtype=float)[::-1]
+        n = len(chronological)
         
-        # 将数组转换为 numpy 数组并反转（因为算法需要从历史到现在的顺序）
-        arr = np.array(temp_data, dtype=float)[::-1]
-        n = len(arr)
-        smoothed = np.zeros(n)
+        if HoltWintersIndicator._can_extend(previous, chronological, alpha, beta, gamma, season_length):
+            # 从上一次的状态追加新数据
+            state = previous.state.copy()
+            new_smoothed = [state.update(x)[0] for x in chronological[state.count - n:].tolist()] if state.count < n else []
+            state.fingerprint = HoltWintersState.fingerprint_of(chronological)
+            historical_smoothed = new_smoothed[::-1] + list(previous.smoothed_values)
+        else:
+            state, smoothed = HoltWintersState.from_series(chronological, alpha, beta, gamma, season_length)
+            historical_smoothed = smoothed[::-1].tolist()
         
-        for t in range(n):
-            prefix = arr[:t+1]
-            m = season_length
-            
-            if len(prefix) < m:
-                # 数据不足一个季节周期，使用简单指数平滑
-                level = prefix[0]
-                for i in range(1, len(prefix)):
-                    level = alpha * prefix[i] + (1 - alpha) * level
-                smoothed[t] = level
-            else:
-                # 使用完整的HoltWinters算法
-                level = np.mean(prefix[:m])
-                if len(prefix) == m:
-                    trend = prefix[m-1] - prefix[m-2] if m >= 2 else 0
-                else:
-                    trend = (np.mean(prefix[m:]) - np.mean(prefix[:m])) / m
-                
-                seasonal = [prefix[i] - level for i in range(m)]
-                
-                for i in range(m, len(prefix)):
-                    last_level = level
-                    last_trend = trend
-                    seasonal_index = (i - m) % m
-                    
-                    level = alpha * (prefix[i] - seasonal[seasonal_index]) + (1 - alpha) * (last_level + last_trend)
-                    trend = beta * (level - last_level) + (1 - beta) * last_trend
-                    seasonal[seasonal_index] = gamma * (prefix[i] - level) + (1 - gamma) * seasonal[seasonal_index]
-                
-                fitted = level + trend + seasonal[(len(prefix)-m) % m]
-                smoothed[t] = fitted
-        
-        # 反转回原来的时间顺序
-        smoothed_reversed = smoothed[::-1]
-        
-        # 根据是否有估计值来分配结果
-        if has_estimate:
-            estimate_smoothed = smoothed_reversed[0]
-            historical_smoothed = smoothed_reversed[1:].tolist()
-            estimate_delta = estimate_value - estimate_smoothed if estimate_value is not None else None
+        # 估计值只需在历史状态上再推进一步
+        if estimate_value is not None:
+            estimate_smoothed, estimate_delta = state.copy().update(estimate_value)
         else:
             estimate_smoothed = None
-            historical_smoothed = smoothed_reversed.tolist()
             estimate_delta = None
         
         # 计算差分（实际值 - 平滑值）
-        delta_values = None
-        if len(historical_smoothed) == len(data):
-            delta_values = [(data[i] - historical_smoothed[i]) for i in range(len(data))]
+        delta_values = [(data[i] - historical_smoothed[i]) for i in range(len(data))]
         
         # 创建结果对象
         result = HoltWintersResult(
             smoothed_values=historical_smoothed,
             estimate_value=estimate_smoothed,
             estimate_delta=estimate_delta,
-            delta_values=delta_values
+            delta_values=delta_values,
+            state=state
         )
         
         return result
     
+    @staticmethod
+    def _can_extend(previous: Optional[HoltWintersResult], chronological: np.ndarray,
+                    alpha: float, beta: float, gamma: float, season_length: int) -> bool:
+        """
+        判断能否在上一次结果的递推状态上追加计算
+
+        已处理的全部历史数据必须与上次完全相同（按摘要比较），分红调整或重新下载后
+        任何一个历史数据变化都会重新计算；没有摘要的状态（旧版本保存的）也重新计算。
+        """
+        if previous is None or previous.state is None:
+            return False
+        state = previous.state
+        return (state.matches(alpha, beta, gamma, season_length)
+                and 0 < state.count <= len(chronological)
+                and len(previous.smoothed_values) == state.count
+                and chronological[state.count - 1] == state.last_value
+                and state.fingerprint is not None
+                and state.fingerprint == HoltWintersState.fingerprint_of(chronological[:state.count]))
+    
+    @staticmethod
+    def half_window_less_counts(delta_values) -> List[int]:
+        """
+        统计每个差分在其后半窗口内的较小值个数
+        
+        对第i个数据（i <= n-3），窗口为 delta[i+1 : i+1+(n-i)//2]，
+        返回窗口内严格小于 delta[i] 的个数；其余位置为0。
+        窗口两端都随i单调右移，用树状数组维护窗口内各秩的计数，总复杂度O(n log n)。
+        
+        Args:
+            delta_values: 差分值列表（最新数据在前）
+            
+        Returns:
+            每个位置的较小值个数
+        """
+        values = list(delta_values)
+        n = len(values)
+        counts = [0] * n
+        if n < 3:
+            return counts
+        
+        # 离散化：秩为排序去重后的下标（从1开始），相等值共享同一个秩
+        ranks = {v: r for r, v in enumerate(sorted(set(values)), start=1)}
+        rank_ls = [ranks[v] for v in values]
+        size = len(ranks)
+        tree = [0] * (size + 1)
+        
+        window_start = 1
+        window_end = 1
+        for i in range(n - 2):
+            start = i + 1
+            end = start + (n - i) // 2
+            # 窗口右端纳入新数据
+            while window_end < end:
+                r = rank_ls[window_end]
+                while r <= size:
+                    tree[r] += 1
+                    r += r & -r
+                window_end += 1
+            # 窗口左端移出旧数据
+            while window_start < start:
+                r = rank_ls[window_start]
+                while r <= size:
+                    tree[r] -= 1
+                    r += r & -r
+                window_start += 1
+            # 前缀和：秩严格小于当前值的个数
+            r = rank_ls[i] - 1
+            total = 0
+            while r > 0:
+                total += tree[r]
+                r -= r & -r
+            counts[i] = total
+        return counts
+
+    @staticmethod
+    def estimate_delta_percentage(sorted_head: List[float], estimate_delta: float) -> float:
+        """
+        计算估计值差分的百分比
+        
+        Args:
+            sorted_head: 已排序的最近 (n-1)//2 个差分
+            estimate_delta: 估计值的差分
+            
+        Returns:
+            估计值差分的百分比，比较窗口为空时为0
+        """
+        if not sorted_head:
+            return 0
+        count = bisect.bisect_left(sorted_head, estimate_delta)
+        return (float(count) / float(len(sorted_head))) * 2 - 1
+    
     @staticmethod
     def calculate_delta_percentage(delta_values: List[float], 
                                    estimate_delta: Optional[float] = None) -> tuple[List[float], Optional[float]]:
@@ -222,34 +662,24 @@ class HoltWintersIndicator:
         if not delta_values:
             return [], None
         
-        delta_percentage = []
+        n = len(delta_values)
+        less_counts = HoltWintersIndicator.half_window_less_counts(delta_values)
         
-        for i in range(len(delta_values)):
-            if i > len(delta_values) - 3:
+        # 第i天与其后 (n-i)//2 个差分比较，最后两天不足比较窗口，记为0
+        delta_percentage = []
+        for i in range(n):
+            if i > n - 3:
                 delta_percentage_i = 0
             else:
-                len_i = (len(delta_values) - i) // 2
-                if len_i > 0:
-                    sublist = delta_values[i+1:i+1+len_i]
-                    if sublist:
-                        delta_percentage_i = (float(len([x for x in sublist if x < delta_values[i]])) / float(len(sublist))) * 2 - 1
-                    else:
-                        delta_percentage_i = 0
-                else:
-                    delta_percentage_i = 0
+                len_i = (n - i) // 2
+                delta_percentage_i = (float(less_counts[i]) / float(len_i)) * 2 - 1
             delta_percentage.append(delta_percentage_i)
         
         # 处理估计值的百分比
         estimate_delta_percentage = None
-        if estimate_delta is not None and len(delta_values) > 0:
-            lendata = (len(delta_values) - 1) // 2
-            if lendata > 0:
-                sublist = delta_values[0:lendata]
-                if sublist:
-                    estimate_delta_percentage = (float(len([x for x in sublist if x < estimate_delta])) / float(len(sublist))) * 2 - 1
-                else:
-                    estimate_delta_percentage = 0
-            else:
-                estimate_delta_percentage = 0
+        if estimate_delta is not None:
+            lendata = (n - 1) // 2
+            estimate_delta_percentage = HoltWintersIndicator.estimate_delta_percentage(
+                sorted(delta_values[0:lendata]), estimate_delta)
         
         return delta_percentage, estimate_delta_percentage
@@ -0,0 +1,207 @@
+"""
+基金因子面板
+
+把一组基金的净值对齐到同一个 日期×基金 矩阵，一次性计算所有基金的
+HoltWinters平滑、差分、HDP和CMA30因子，供回测和GUI直接按下标取用。
+"""
+
+from datetime import datetime
+from typing import List, Optional, Dict, Any
+
+import numpy as np
+
+from .indicators import TechnicalIndicators, HoltWintersIndicator
+
+
+class FactorPanel:
+    """
+    基金因子面板
+
+    矩阵约定：
+        dates  按时间正序排列的所有基金交易日期的并集，形状为 (T,)
+        codes  基金代码列表，形状为 (F,)
+        nav / holtwinters / holtwinters_delta / holtwinters_delta_percentage / cma30
+               形状为 (T, F)，某基金在某日没有净值时为NaN
+        fluctuation_rate  每个基金的CMA30波动率比率，形状为 (F,)
+
+    每个基金的因子都在它自己的净值序列上计算（不做跨日期填充），
+    结果与逐个调用 ExtendedFuncInfo 的因子方法一致。
+    """
+
+    FACTOR_NAMES = ('nav', 'holtwinters', 'holtwinters_delta', 'holtwinters_delta_percentage', 'cma30')
+    CMA_WINDOW = 30
+
+    def __init__(self, funds: List[Any]):
+        """
+        Args:
+            funds: 已加载净值数据的基金列表（ExtendedFuncInfo），
+                   需要 code、_date_ls、_unit_value_ls 和 factor_holtwinters_parameter
+        """
+        self.funds = list(funds)
+        if not self.funds:
+            raise ValueError("因子面板中没有基金")
+        self.codes = [fund.code for fund in self.funds]
+        self._code2col = {code: j for j, code in enumerate(self.codes)}
+
+        # 日期并集（按时间正序）
+        date_strs = sorted({date.strftime('%Y-%m-%d') for fund in self.funds for date in fund._date_ls})
+        self.dates = np.array(date_strs, dtype='datetime64[D]')
+        self._date2row = {date_str: i for i, date_str in enumerate(date_strs)}
+
+        # 每个基金自身序列按"最新在前"对齐：第k行是该基金倒数第k个净值
+        self._lengths = np.array([len(fund._unit_value_ls) for fund in self.funds], dtype=int)
+        max_len = int(self._lengths.max())
+        self._stack = np.full((max_len, len(self.funds)), np.nan)
+        self._rows = []
+        for j, fund in enumerate(self.funds):
+            n = self._lengths[j]
+            self._stack[:n, j] = fund._unit_value_ls
+            self._rows.append(np.array([self._date2row[date.strftime('%Y-%m-%d')] for date in fund._date_ls], dtype=int))
+
+        self.nav = self._to_grid(self._stack)
+        self.holtwinters = None
+        self.holtwinters_delta = None
+        self.holtwinters_delta_percentage = None
+        self.cma30 = None
+        self.fluctuation_rate = None
+        # 对齐后（最新在前）的因子和各基金的HoltWinters递推状态，apply_to_funds 时使用
+        self._stacked = {}
+        self._states = {}
+
+    @classmethod
+    def from_config(cls, config_file_path: str, csv_data_dir: str) -> 'FactorPanel':
+        """
+        从基金配置文件和CSV数据目录创建因子面板
+
+        Args:
+            config_file_path: 配置文件路径，例如 configs/funds/fund_config_etf.json
+            csv_data_dir: CSV数据目录，文件名为 {code}.csv
+        """
+        from ..core.extended_funcinfo import ExtendedFuncInfo
+        funds = ExtendedFuncInfo.create_fundlist_config(config_file_path, csv_data_dir)
+        loaded = [fund for fund in funds if fund._unit_value_ls]
+        if len(loaded) < len(funds):
+            print(f"警告：{len(funds) - len(loaded)} 个基金没有净值数据，未加入因子面板")
+        return cls(loaded)
+
+    def _to_grid(self, stacked: np.ndarray) -> np.ndarray:
+        """把按"最新在前"对齐的矩阵放回 日期×基金 矩阵"""
+        grid = np.full((len(self.dates), len(self.funds)), np.nan)
+        for j, rows in enumerate(self._rows):
+            grid[rows, j] = stacked[:len(rows), j]
+        return grid
+
+    def compute(self) -> 'FactorPanel':
+        """
+        计算所有基金的全部因子
+
+        HoltWinters按季节长度分组后批量计算（同时得到各基金处理完全部净值后的递推状态），
+        HDP逐基金使用O(n log n)的秩统计，CMA30和波动率比率对整个矩阵一次计算。
+
+        Returns:
+            self，便于链式调用
+        """
+        max_len, n_funds = self._stack.shape
+
+        # HoltWinters：各基金按时间正序左对齐，尾部NaN只影响其后的位置
+        chronological = np.full((n_funds, max_len), np.nan)
+        for j in range(n_funds):
+            n = self._lengths[j]
+            chronological[j, :n] = self._stack[:n, j][::-1]
+        smoothed = np.full((n_funds, max_len), np.nan)
+        states = {}
+        groups: Dict[int, List[int]] = {}
+        for j, fund in enumerate(self.funds):
+            params = fund.factor_holtwinters_parameter
+            if not params:
+                print(f"警告：基金 {fund.code} 未设置 factor_holtwinters_parameter，跳过HoltWinters因子")
+                continue
+            groups.setdefault(int(params['season_length']), []).append(j)
+        for season_length, cols in groups.items():
+            params = np.array([[self.funds[j].factor_holtwinters_parameter[key] for key in ('alpha', 'beta', 'gamma')]
+                               for j in cols], dtype=float)
+            smoothed[cols], group_states = HoltWintersIndicator.rolling_smooth_batch(
+                chronological[cols], params, season_length, lengths=self._lengths[cols], return_state=True)
+            states.update(zip(cols, group_states))
+
+        hw_stack = np.full_like(self._stack, np.nan)
+        for j in range(n_funds):
+            n = self._lengths[j]
+            hw_stack[:n, j] = smoothed[j, :n][::-1]
+        delta_stack = self._stack - hw_stack
+
+        # HDP：每个基金在自身的差分序列上计算
+        hdp_stack = np.full_like(self._stack, np.nan)
+        for j in sorted(j for cols in groups.values() for j in cols):
+            n = self._lengths[j]
+            hdp, _ = HoltWintersIndicator.calculate_delta_percentage(delta_stack[:n, j].tolist())
+            hdp_stack[:n, j] = hdp
+
+        # CMA30：与 factor_cal_CMA 相同，前 window//2 个点（最新的若干天）不计算
+        cma_stack = TechnicalIndicators.centered_rolling_mean(self._stack, self.CMA_WINDOW)
+        cma_stack[:self.CMA_WINDOW // 2] = np.nan
+        self.fluctuation_rate = TechnicalIndicators.volatility_ratio_matrix(self._stack, cma_stack)
+
+        self._stacked = {
+            'holtwinters': hw_stack,
+            'holtwinters_delta': delta_stack,
+            'holtwinters_delta_percentage': hdp_stack,
+            'cma30': cma_stack,
+        }
+        self._states = states
+        self.holtwinters = self._to_grid(hw_stack)
+        self.holtwinters_delta = self._to_grid(delta_stack)
+        self.holtwinters_delta_percentage = self._to_grid(hdp_stack)
+        self.cma30 = self._to_grid(cma_stack)
+        return self
+
+    def apply_to_funds(self) -> None:
+        """
+        把计算结果写回各基金对象的因子属性
+        （factor_holtwinters、factor_holtwinters_delta、factor_holtwinters_delta_percentage、
+        factor_CMA30、factor_fluctuationrateCMA30）和HoltWinters递推状态，之后可照常调用 set_info_dict；
+        factor_cal_holtwinters_estimate 直接在递推状态上推进一步，不再逐个基金重算。
+        """
+        if not self._stacked:
+            raise ValueError("因子尚未计算，请先调用 compute()")
+        for j, fund in enumerate(self.funds):
+            n = self._lengths[j]
+            if fund.factor_holtwinters_parameter:
+                fund.factor_holtwinters = self._stacked['holtwinters'][:n, j].tolist()
+                fund.factor_holtwinters_delta = self._stacked['holtwinters_delta'][:n, j].tolist()
+                fund.factor_holtwinters_delta_percentage = self._stacked['holtwinters_delta_percentage'][:n, j].tolist()
+                lendata = (n - 1) // 2
+                fund.factor_holtwinters_delta_sorted_head = sorted(fund.factor_holtwinters_delta[0:lendata])
+                fund.factor_holtwinters_state = self._states[j].copy()
+            cma = self._stacked['cma30'][:n, j].tolist()
+            fund.factor_CMA30 = [None if np.isnan(v) else v for v in cma]
+            ratio = self.fluctuation_rate[j]
+            fund.factor_fluctuationrateCMA30 = None if np.isnan(ratio) else float(ratio)
+
+    def fund_index(self, code: str) -> int:
+        """基金代码对应的列下标"""
+        if code not in self._code2col:
+            raise ValueError(f"基金 {code} 不在因子面板中")
+        return self._code2col[code]
+
+    def date_index(self, date) -> int:
+        """日期对应的行下标，date 可以是 datetime 或 'YYYY-MM-DD' 字符串"""
+        date_str = date.strftime('%Y-%m-%d') if isinstance(date, datetime) else str(date)
+        if date_str not in self._date2row:
+            raise ValueError(f"日期 {date_str} 不在因子面板中")
+        return self._date2row[date_str]
+
+    def factor(self, name: str) -> np.ndarray:
+        """按名称取 日期×基金 因子矩阵"""
+        if name not in self.FACTOR_NAMES:
+            raise ValueError(f"未知的因子: {name}")
+        matrix = getattr(self, name)
+        if matrix is None:
+            raise ValueError("因子尚未计算，请先调用 compute()")
+        return matrix
+
+    def get(self, name: str, date, code: str) -> Optional[float]:
+        """取某基金某日的因子值，没有数据时返回None"""
+        value = self.factor(name)[self.date_index(date), self.fund_index(code)]
+        return None if np.isnan(value) else float(value)
+
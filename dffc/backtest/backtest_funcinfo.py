@@ -1,100 +1,147 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from ..core.extended_funcinfo import ExtendedFuncInfo
+from .calendar import TradingCalendar
+from .ledger import AssetLedger
+from .metrics import BacktestMetrics
+from .events import EventLog, EVENT_TRADE, EVENT_ERROR
+from .vectorized import VectorizedBacktest
+from .replay import TradeReplay
+from .factor_store import PointInTimeFactorStore
+from .snapshot import BacktestSnapshot
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import numpy as np
 from copy import deepcopy
+from itertools import islice
+from collections.abc import Sequence
 
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']  # 用来正常显示中文标签
 plt.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
 
+class PointInTimeView(Sequence):
+    """
+    基金数据列表的只读视图（最新数据在前），从第 offset 个元素开始。
+    view[k] 即当前日期 k 天前的数据，offset 之前（未来）的数据无法访问；
+    不复制底层列表，构建视图的开销与列表长度无关。
+    """
+    __slots__ = ('_data', '_offset')
+
+    def __init__(self, data, offset=0):
+        self._data = data
+        self._offset = offset
+
+    def __len__(self):
+        return max(len(self._data) - self._offset, 0)
+
+    def __getitem__(self, k):
+        n = len(self)
+        if isinstance(k, slice):
+            start, stop, step = k.indices(n)
+            if step > 0:
+                return self._data[self._offset + start:self._offset + stop:step]
+            return [self._data[self._offset + i] for i in range(start, stop, step)]
+        if k < 0:
+            k += n
+        if not 0 <= k < n:
+            raise IndexError("PointInTimeView index out of range")
+        return self._data[self._offset + k]
+
+    def __iter__(self):
+        return islice(self._data, self._offset, None)
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self._data[self._offset:], dtype=dtype)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, PointInTimeView)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"PointInTimeView(offset={self._offset}, len={len(self)})"
+
+    def copy(self):
+        """复制为普通列表"""
+        return self._data[self._offset:]
+
+
 # 结合extended_funcinfo.py，提供回测功能
 # 一个实例对应一个回测
 # 初始化设置：回测时间(datetime)区间，使用的基金extended_funcinfo实例
 # 每一次操作用转换操作来标记，从第n个资产转移到第n个资产
 # self.run()运行回测
 class BackTestFuncInfo:
+    # 输出级别：0 不输出；1 只输出错误和回测统计；2 另外逐日输出交易信息
+    verbose = 2
+    # 事件日志文件路径（.npz），设置后回测结束时写入
+    event_log_path = None
+    # 策略调度（StrategySchedule），None表示每个交易日都调用策略函数
+    schedule = None
+    # 目标权重调仓的靠拢系数（target_weight_trades 和 run_vectorized 使用），1表示一次调到目标
+    adjust_factor = 1.0
+    # 时点因子库（PointInTimeFactorStore），None时第一次调用 factor() 时构建，可在多个策略间共享
+    factor_store = None
+    # 快照不保存的属性：基金数据、可重建的缓存和只在当日有效的临时变量（账本、交易记录等单独保存）
+    SNAPSHOT_EXCLUDE = ('fund_list', 'calendar', 'factor_store', 'ledger', 'trade_list', 'log', 'events',
+                        '_metrics_cache', 'current_asset', 'current_row', 'trade_today', 'nonefund_list',
+                        'strategy_unit_value_list', 'strategy_date_list', 'strategy_factor_list')
+
     def __init__(self, fund_list , start_date, end_date):
         self.fund_list = fund_list  # 使用的基金列表（ExtendedFuncInfo实例）
         self.commensurate_fund_list = []  # 定义基金手续费列表
-        self.asset_list = []  # 回测资产列表
+        self.asset_list = []  # 回测资产列表（AssetLedger，每条记录兼容 [date, shares, None, values]）
         self.asset_initial = [start_date, [1.] + [0] * len(fund_list), [None] + [] * len(fund_list), [1.]+[0]*len(fund_list)] # 初始资产不列入回测列表
         self.trade_list = []  # 交易日志：[datetime, [sellfund, buyfund, sellshares, price], ...]
         self.start_date = start_date  # 回测开始日期
         self.end_date = end_date  # 回测结束日期
         self.log = []  # 日志列表
+        self.events = EventLog()  # 结构化事件日志：交易和错误
+        self.calendar = None  # 交易日历，run() 开始时构建
+        self._metrics_cache = None  # 回测结果信息缓存
         # 如果没有设置基金手续费列表，则使用默认的C类基金手续费
         if self.commensurate_fund_list == []:
             self.set_default_commensurate_fund_list()
 
+    @property
+    def asset_list(self):
+        """回测资产账本，按下标取得的记录兼容旧格式 [date, shares, None, values]"""
+        return self.ledger
+
+    @asset_list.setter
+    def asset_list(self, records):
+        # 兼容直接赋值旧格式的记录列表
+        if isinstance(records, AssetLedger):
+            self.ledger = records
+        else:
+            self.ledger = AssetLedger.from_records(records, len(self.fund_list) + 1)
+
     # 结果信息字典
     def result_info_dict(self):
-        """返回回测结果信息字典"""
+        """返回回测结果信息字典（结果按账本和交易记录缓存，plot_result 不会重复计算）"""
         if not self.asset_list:
             return {}
-        initial_value = sum(self.asset_initial[3])
-        final_value = sum(self.asset_list[-1][3])
-        total_return = (final_value - initial_value) / initial_value * 100
+        ledger = self.ledger
+        key = (id(ledger), len(ledger), len(self.trade_list), self.start_date, self.end_date)
+        if self._metrics_cache is not None and self._metrics_cache[0] == key:
+            return dict(self._metrics_cache[2])
 
-        # 计算最大回撤和最大回撤修复天数
-        values = [sum(record[3]) for record in self.asset_list]
-        dates = [record[0] for record in self.asset_list]
-        peak = values[0]
-        peaks = []
-        for v in values:
-            if v > peak:
-                peak = v
-            peaks.append(peak)
-        # 防止除零错误，当峰值为0时，回撤为0
-        drawdowns = [(v - p) / p if p != 0 else 0 for v, p in zip(values, peaks)]
-        max_drawdown = min(drawdowns) * 100
-        trough_idx = drawdowns.index(min(drawdowns))
-        trough_date = dates[trough_idx]
-        # 计算最大回撤修复天数
-        recovery_days = None
-        peak_value_at_trough = peaks[trough_idx]
-        for idx in range(trough_idx + 1, len(values)):
-            if values[idx] >= peak_value_at_trough:
-                recovery_days = (dates[idx] - trough_date).days
-                break
-        if recovery_days is None:
-            recovery_days = (self.end_date - trough_date).days
-        # 计算夏普比率（假设无风险利率为0）
-        returns = []
-        if len(values) > 1:
-            for i in range(1, len(values)):
-                if values[i-1] != 0:  # 防止除零错误
-                    returns.append((values[i] - values[i-1]) / values[i-1])
-        
-        if len(returns) > 1:
-            mean_ret = np.mean(returns)
-            std_ret = np.std(returns, ddof=1)
-            sharpe_ratio = (mean_ret / std_ret) * np.sqrt(252) if std_ret != 0 else None
-        else:
-            sharpe_ratio = None
-        
-        # 计算持仓率
-        cashall = 0
-        valueall = 0
-        for i in range(len(self.asset_list)):
-            cashall = cashall + self.asset_list[i][3][0]
-            valueall = valueall + sum(self.asset_list[i][3])
-        holding_rate = cashall / valueall if valueall != 0 else 0
-
-        # 返回结果信息字典
-        return {
-            'initial_value': initial_value,
-            'final_value': final_value,
-            'total_return': total_return,
-            'trade_count': len(self.trade_list),
-            'start_date': self.start_date.strftime('%Y-%m-%d'),
-            'end_date': self.end_date.strftime('%Y-%m-%d'),
-            'maximum_drawdown': max_drawdown,
-            'recovery_days': recovery_days,
-            'sharpe_ratio': sharpe_ratio,
-            'holding_rate': holding_rate,
-        }
+        # 换手率使用记录日期的单位净值（现金为1）
+        if self.calendar is None:
+            self.build_calendar()
+        rows = np.array([self.calendar.row(date) for date in ledger.dates], dtype=int)
+        prices = np.ones((len(ledger), ledger.n_assets))
+        prices[:, 1:] = np.where(rows[:, None] >= 0, self.calendar.prices[np.maximum(rows, 0)], np.nan)
+        traded_value = BacktestMetrics.traded_value(ledger.shares, prices, self.asset_initial[1])
+
+        result = BacktestMetrics.compute(
+            ledger.dates, ledger.total_values(), ledger.values[:, 0],
+            initial_value=sum(self.asset_initial[3]),
+            start_date=self.start_date, end_date=self.end_date,
+            trade_count=len(self.trade_list), traded_value=traded_value)
+        # 同时保存账本引用，保证缓存键中的id不会被复用
+        self._metrics_cache = (key, ledger, result)
+        return dict(result)
 
     # 设置默认手续费列表，参照C类基金
     def set_default_commensurate_fund_list(self):
@@ -109,63 +156,27 @@ class BackTestFuncInfo:
         # self.asset_list 是回测资产列表
         # self.trade_list 是交易日志列表
 
-        # 0. 更新当日单位净值列表，如果含有self.nonefund_list中的基金，则给出None
-        unitprice_list = [1] #现金单位净值为1
-        for i in range(len(self.fund_list)):
-            fund = self.fund_list[i]
-            if i+1 in self.nonefund_list:
-                finddate = self.current_date
-                while finddate.strftime("%Y-%m-%d") not in fund._date2idx_map:
-                    finddate -= timedelta(days=1)  # 向前查找最近的交易日
-                index = fund._date2idx_map[finddate.strftime("%Y-%m-%d")]
-                unitprice_list.append(fund._unit_value_ls[index])  # 获取最近交易日的基金单位净值
-            else:
-                index = fund._date2idx_map[self.current_date.strftime("%Y-%m-%d")]
-                unitprice_list.append(fund._unit_value_ls[index])  # 获取基金单位净值        # 1. 如果当日没有交易操作，则直接复制更新资产列表
+        # 0. 更新当日单位净值列表，self.nonefund_list中的基金使用最近交易日的净值（交易日历中已向前填充）
+        if self.calendar is None:
+            self.build_calendar()
+        unitprice_list = [1] + self.calendar.price_list(self.calendar.row(self.current_date))  # 现金单位净值为1
+        unitprice_array = np.array([price if price is not None else 0 for price in unitprice_list], dtype=float)
 
-        # 1. 如果当日没有交易操作，则直接复制更新资产列表
+        # 1. 如果当日没有交易操作，则按当日净值直接记账，trade_list不动
         if self.trade_today is None:
-            #如果当天不操作直接复制更新asset_list, trade_list不动
-            self.current_asset[0] = self.current_date  # 更新日期
-            self.current_asset[1] = deepcopy(self.current_asset[1])  # 复制当前资产份额
-            self.current_asset[2] = deepcopy(self.current_asset[2])  # 复制当前资产单位净值
-            self.current_asset[3] = deepcopy([self.current_asset[1][i] * (unitprice_list[i] if unitprice_list[i] is not None else 0) for i in range(len(self.current_asset[1]))])  # 更新当日资产
-            self.asset_list.append(deepcopy(self.current_asset))  # 更新当日资产
+            shares = np.asarray(self.current_asset[1], dtype=float)
+            self.current_asset = self.ledger.append(self.current_date, shares, shares * unitprice_array)  # 更新当日资产
             return True
-        # Test: 交易列表格式是否正确
-        for i in range(len(self.trade_today)):
-            if i == 0:
-                # 第一个元素是日期，跳过
-                continue
-            # 检查交易是否合法
-            sellfund = self.trade_today[i][0]  # 卖出基金索引
-            buyfund = self.trade_today[i][1]  # 买入基金索引
-            sellshares = self.trade_today[i][2]  # 卖出基金份额
-            price = self.trade_today[i][3]  # 买入基金价格
-
-            # 检查交易的基金是否是1整数且2存在且3买入卖出不是同一只基金
-            if type(sellfund) is not int or type(buyfund) is not int:
-                self.log.append(f"Error: Invalid fund index at {self.current_date.strftime('%Y-%m-%d')}")
-                return False
-            if sellfund not in range(len(self.fund_list)+1) or buyfund not in range(len(self.fund_list)+1):
-                self.log.append(f"Error: Fund index out of range at {self.current_date.strftime('%Y-%m-%d')}")
-                return False
-            if sellfund == buyfund:
-                self.log.append(f"Error: Cannot buy and sell the same fund at {self.current_date.strftime('%Y-%m-%d')}")
-                return False
-            # 检查交易的基金是否在无数据基金列表中
-            if sellfund in self.nonefund_list or buyfund in self.nonefund_list:
-                self.log.append(f"Error: Cannot trade fund with no data at {self.current_date.strftime('%Y-%m-%d')}")
-                return False
-            # 检查交易的份额和价格是否是数字且大于0
-            if not isinstance(sellshares, (int, float)) or not isinstance(price, (int, float)) or sellshares < 0 or price < 0:
-                self.log.append(f"Error: Invalid shares or price at {self.current_date.strftime('%Y-%m-%d')}")
+        # Test: 交易列表格式是否正确（校验规则与交易记录重放共用）
+        for trade in self.trade_today[1:]:
+            error = TradeReplay.check_trade(trade, len(self.fund_list), self.nonefund_list)
+            if error is not None:
+                self._record_error(error, trade)
                 return False
 
         # 2. 如果当日有交易操作，则进行交易操作
         # 根据trade_today操作，更新当日可能资产possible_asset
-        possible_asset = deepcopy(self.current_asset)  # 复制当前资产
-        possible_asset[0] = deepcopy(self.trade_today[0])  # 更新日期
+        possible_shares = [float(x) for x in self.current_asset[1]]  # 当前资产份额
         for i in range(len(self.trade_today)):
             if i == 0:
                 # 第一个元素是日期，跳过
@@ -175,22 +186,34 @@ class BackTestFuncInfo:
             sellshares = self.trade_today[i][2]  # 卖出基金份额
             price = self.trade_today[i][3]  # 买入基金价格
             # 交易更新
-            possible_asset[1][sellfund] = possible_asset[1][sellfund] - sellshares  # 更新卖出基金份额
-            possible_asset[1][buyfund] = possible_asset[1][buyfund] + sellshares * unitprice_list[sellfund]/ unitprice_list[buyfund]  # 更新买入基金份额
+            possible_shares[sellfund] = possible_shares[sellfund] - sellshares  # 更新卖出基金份额
+            possible_shares[buyfund] = possible_shares[buyfund] + sellshares * unitprice_list[sellfund]/ unitprice_list[buyfund]  # 更新买入基金份额
         # 更新所有资产的价值
-        possible_asset[3] = [possible_asset[1][i] * (unitprice_list[i] if unitprice_list[i] is not None else 0) for i in range(len(possible_asset[1]))]
+        possible_shares = np.array(possible_shares)
+        possible_values = possible_shares * unitprice_array
 
         # Test: 如果当日资产负值则报错
-        if any(x < -0.000001 for x in possible_asset[1]):
-            self.log.append(f"Error: Negative asset at {self.current_date.strftime('%Y-%m-%d')}")
+        if np.any(possible_shares < -0.000001):
+            self._record_error("Negative asset")
             return False
-        else:
-            possible_asset[1] = [abs(x) for x in possible_asset[1]]  # 确保资产份额为正数
         
-        # 如果操作合法无误，则更新当日资产和交易日志
-        self.asset_list.append(deepcopy(possible_asset))  # 更新当日资产
+        # 如果操作合法无误，则更新当日资产（确保资产份额为正数）和交易日志
+        self.current_asset = self.ledger.append(self.trade_today[0], np.abs(possible_shares), possible_values)  # 更新当日资产
         self.trade_list.append(deepcopy(self.trade_today))  # 更新交易日志
+        for trade in self.trade_today[1:]:
+            self.events.record(self.current_date, EVENT_TRADE, trade[0], trade[1], float(trade[2]), float(trade[3]))
         return True
+
+    def _record_error(self, message, trade=None):
+        """记录不合法的操作：日志字符串和结构化事件"""
+        self.log.append(f"Error: {message} at {self.current_date.strftime('%Y-%m-%d')}")
+        if trade is None:
+            self.events.record(self.current_date, EVENT_ERROR, message=message)
+            return
+        # 不合法的字段记为-1或NaN
+        sellfund, buyfund = [x if type(x) is int else -1 for x in trade[:2]]
+        shares, price = [float(x) if isinstance(x, (int, float)) else float('nan') for x in trade[2:4]]
+        self.events.record(self.current_date, EVENT_ERROR, sellfund, buyfund, shares, price, message)
     
     # 一个测试的策略函数，在第一天返回全仓买入第一支基金的交易，后面不进行操作
     def strategy_func(self):
@@ -221,72 +244,373 @@ class BackTestFuncInfo:
         self.strategy_unit_value_list = []  # 用于存储每个基金的单位净值列表
         self.strategy_date_list = []  # 用于存储每个基金的日期列表
         self.strategy_factor_list = []  # 用于存储每个基金的holtwinters_delta_percentage数据
+        date_str = self.current_date.strftime("%Y-%m-%d")
         for fund in self.fund_list:
-            # 复制基金信息，避免直接修改原始数据
-            fund_info = deepcopy(fund)
-            # 只保留当前日期之前的数据
-            date_str = self.current_date.strftime("%Y-%m-%d")
-            if date_str in fund_info._date2idx_map:
-                idx = fund_info._date2idx_map[date_str]
-                # 如果有数据，则复制相关数据
-                limit_unit_value_ls = deepcopy(fund_info._unit_value_ls[idx:])
-                limit_date_ls = deepcopy(fund_info._date_ls[idx:])
-                limit_holtwinters_delta_percentage = deepcopy(fund_info.factor_holtwinters_delta_percentage[idx:])
-                self.strategy_unit_value_list.append(limit_unit_value_ls)  # 存储单位净值列表
-                self.strategy_date_list.append(limit_date_ls)  # 存储日期列表
-                self.strategy_factor_list.append(limit_holtwinters_delta_percentage)  # 存储holtwinters_delta_percentage数据
+            # 只保留当前日期之前的数据：使用从当前日期开始的只读视图，不复制原始数据
+            if date_str in fund._date2idx_map:
+                idx = fund._date2idx_map[date_str]
+                self.strategy_unit_value_list.append(PointInTimeView(fund._unit_value_ls, idx))  # 存储单位净值列表
+                self.strategy_date_list.append(PointInTimeView(fund._date_ls, idx))  # 存储日期列表
+                self.strategy_factor_list.append(PointInTimeView(fund.factor_holtwinters_delta_percentage, idx))  # 存储holtwinters_delta_percentage数据
             else:
                 # 如果没有数据，则清空相关数据
                 self.strategy_unit_value_list.append(None)
                 self.strategy_date_list.append(None)
                 self.strategy_factor_list.append(None)
 
-    def run(self):
-        """运行回测"""
-        # 初始化状态
-        self.current_date = deepcopy(self.start_date)
+    def factor(self, fund, lag=0, name=PointInTimeFactorStore.HDP):
+        """
+        O(1)读取当前日期的时点因子，与 self.strategy_factor_list[fund][lag] 一致
 
-        # 开始循环运行，对datetime日期循环
-        while self.current_date <= self.end_date:
-            # 0.0 初始化当前日期的资产
-            if self.asset_list == []:
-                self.current_asset = deepcopy(self.asset_initial)  # 如果是开始日期，使用初始资产
-            else:
-                self.current_asset = deepcopy(self.asset_list[-1])  # 否则使用上一个日期的资产
-            # 1. 检查当日是否为交易日，检查当日是否基金都有净值，非交易日（均无数据）跳过；无数据的基金计入nonefund_list
-            self.nonefund_list = []
-            for i in range(len(self.fund_list)):
-                fund = self.fund_list[i]
-                if self.current_date.strftime("%Y-%m-%d") not in fund._date2idx_map:
-                    self.nonefund_list.append(i+1)
-            if len(self.nonefund_list) == len(self.fund_list):
-                # 非交易日：果所有基金都没有数据，则跳过当前日期
-                self.current_date += timedelta(days=1)
-                continue
-            # 2.0 删减数据，构建可以给策略函数使用的func_info，防止策略函数使用未来数据
-            # 构建可供策略函数使用的基金信息self.strategy_list*
+        Args:
+            fund: 基金在 fund_list 中的下标
+            lag: 向前的净值日数，负数从最早的数据倒数
+            name: 因子名称，默认为HDP
+
+        Returns:
+            因子值，基金当日没有数据时为None
+        """
+        if self.factor_store is None:
+            self.factor_store = PointInTimeFactorStore.default(self.fund_list, self.calendar)
+        store = self.factor_store
+        row = self.current_row if store.calendar is self.calendar else store.calendar.row(self.current_date)
+        return store.value(name, fund, row, lag)
+
+    def build_calendar(self):
+        """根据基金列表构建交易日历"""
+        self.calendar = TradingCalendar(self.fund_list)
+        return self.calendar
+
+    def prepare(self, calendar=None):
+        """
+        回测开始前的准备：设置交易日历并预分配账本
+
+        Args:
+            calendar: 共享的交易日历（多策略同时回测时使用），None时根据基金列表构建
+
+        Returns:
+            回测区间内的交易日行下标
+        """
+        # 一次性构建交易日历，只遍历区间内的交易日（至少一个基金有净值的日期）
+        if calendar is None:
+            self.build_calendar()
+        else:
+            self.calendar = calendar
+        trading_rows = self.calendar.trading_rows(self.start_date, self.end_date)
+        self.ledger.reserve(len(self.ledger) + len(trading_rows))
+        return trading_rows
+
+    def row_date(self, row):
+        """交易日历某行对应的回测日期（保留开始日期的时刻，与按天推进时的日期一致）"""
+        return datetime.combine(self.calendar.dates[row].date(), self.start_date.time(), self.start_date.tzinfo)
+
+    def step(self, row, strategy_lists=None):
+        """
+        回测推进一个交易日
+
+        Args:
+            row: 交易日历的行下标
+            strategy_lists: 共享的 (单位净值, 日期, 因子) 视图列表，None时由 cal_strategy_list 构建
+
+        Returns:
+            操作是否合法，不合法时回测应结束
+        """
+        self.current_date = self.row_date(row)
+        self.current_row = row
+        # 0.0 初始化当前日期的资产（只读记录，不复制）
+        if len(self.ledger) == 0:
+            self.current_asset = self.asset_initial  # 如果是开始日期，使用初始资产
+        else:
+            self.current_asset = self.ledger[-1]  # 否则使用上一个日期的资产
+        # 1. 当日无数据的基金计入nonefund_list（非交易日已由交易日历排除）
+        self.nonefund_list = self.calendar.nonefund_list(row)
+        # 2.0 删减数据，构建可以给策略函数使用的func_info，防止策略函数使用未来数据
+        # 构建可供策略函数使用的基金信息self.strategy_list*
+        if strategy_lists is None:
             self.cal_strategy_list()
+        else:
+            self.strategy_unit_value_list, self.strategy_date_list, self.strategy_factor_list = strategy_lists
 
-            # 2. 运行策略函数，从基金数据生成当日交易列表trade_today
-            self.trade_today = self.strategy_func()
-            # 3. 执行交易操作，更新当日资产和交易日志
-            if not self.operation():
-                # 如果操作不合法，则打印错误日志并跳过当前日期
+        # 2. 运行策略函数，从基金数据生成当日交易列表trade_today
+        self.trade_today = self.strategy_func()
+        # 3. 执行交易操作，更新当日资产和交易日志
+        if not self.operation():
+            # 如果操作不合法，则打印错误日志
+            if self.verbose >= 1:
                 print(f"Error on {self.current_date.strftime('%Y-%m-%d')}: {self.log[-1]}")
-                break  # 跳出循环，结束回测
-            # 如果操作合法且完成
+            return False
+        # 如果操作合法且完成
+        if self.verbose >= 2:
             print(f"Current Date: {self.current_date.strftime('%Y-%m-%d')} - Trade Successful")
-            # 如果操作没有报错，则增加一天推进到下一天
-            self.current_date += timedelta(days=1)  # 增加一天
-        
-        # 回测结束，打印结果信息
+        return True
+
+    def carry_forward(self, rows):
+        """
+        非调度日：持仓保持不变，按各日净值批量计算市值并记账，不调用策略函数
+
+        Args:
+            rows: 交易日历的行下标（升序）
+        """
+        rows = np.asarray(rows, dtype=int)
+        if len(rows) == 0:
+            return
+        shares = np.asarray(self.ledger[-1][1] if len(self.ledger) else self.asset_initial[1], dtype=float)
+        prices = np.ones((len(rows), len(shares)))
+        prices[:, 1:] = np.nan_to_num(self.calendar.prices[rows])
+        dates = [self.row_date(row) for row in rows]
+        self.ledger.extend(dates, np.broadcast_to(shares, prices.shape), shares * prices)
+        self.current_date = dates[-1]
+        self.current_row = int(rows[-1])
+        self.current_asset = self.ledger[-1]
+
+    def scheduled_rows(self, rows):
+        """回测区间内调度的交易日（布尔数组），没有设置调度时全部为True"""
+        if self.schedule is None:
+            return np.ones(len(rows), dtype=bool)
+        return self.schedule.mask(self, rows)
+
+    def finish(self):
+        """回测结束：写入事件日志并打印回测结果信息"""
+        if self.event_log_path is not None:
+            self.events.flush(self.event_log_path, clear=False)
+        if self.verbose < 1:
+            return
         result_info = self.result_info_dict()
-        # 打印回测结果信息
         print("\n回测统计信息：" + "="*50)
         for key, value in result_info.items():
             print(f"{key}: {value}")
         print("="*50)
 
+    def backtest_rows(self, calendar=None):
+        """准备回测并返回区间内的交易日行下标（不晚于结束日期）"""
+        rows = []
+        for row in self.prepare(calendar):
+            if self.row_date(row) > self.end_date:
+                break
+            rows.append(row)
+        return np.asarray(rows, dtype=int)
+
+    def run(self, stop_date=None):
+        """
+        运行回测
+
+        账本中已有记录时（从快照恢复）只运行最后记录日期之后的交易日。
+
+        Args:
+            stop_date: 运行到该日期（含）为止，之后可以 snapshot() 或再次 run() 继续；None时运行到结束日期
+        """
+        rows = self.backtest_rows()
+        # 调度按整个回测区间计算，继续运行时周期不会错位
+        scheduled = self.scheduled_rows(rows)
+        first = 0
+        if len(self.ledger):
+            first = int(np.searchsorted(rows, self.calendar.row(self.ledger.dates[-1]), side='right'))
+        stop = len(rows)
+        if stop_date is not None:
+            stop = int(np.searchsorted(rows, self.calendar.row(stop_date), side='right'))
+        rows, scheduled = rows[first:stop], scheduled[first:stop]
+        # 只在调度日调用策略函数，两个调度日之间的交易日批量记账
+        pos = 0
+        for i in np.flatnonzero(scheduled):
+            self.carry_forward(rows[pos:i])
+            pos = i + 1
+            if not self.step(int(rows[i])):
+                break  # 操作不合法，结束回测
+        else:
+            self.carry_forward(rows[pos:])
+        self.finish()
+
+    def set_params(self, **params):
+        """
+        设置策略参数，然后调用 _derive() 重新计算由参数派生的属性，供参数扫描、滚动窗口等批量回测使用
+
+        Args:
+            **params: {属性名: 值}，每个值设置一份深复制，可变参数不在实例之间共用
+
+        Returns:
+            策略实例本身
+        """
+        for name, value in params.items():
+            setattr(self, name, deepcopy(value))
+        self._derive()
+        return self
+
+    def _derive(self):
+        """
+        由参数派生属性（如归一化的仓位、记忆的目标仓位），默认没有派生属性
+
+        有派生属性的策略在 __init__ 设置默认参数后调用一次，并在这里重新计算，set_params() 后会再次调用。
+        """
+
+    def snapshot(self):
+        """
+        保存当前状态：账本、交易记录、日志、事件和策略自定义的属性
+
+        Returns:
+            BacktestSnapshot，可用 save() 写入文件
+        """
+        state = {key: deepcopy(value) for key, value in self.__dict__.items() if key not in self.SNAPSHOT_EXCLUDE}
+        ledger = self.ledger
+        return BacktestSnapshot(f"{type(self).__module__}.{type(self).__qualname__}",
+                                ledger.dates.copy(), ledger.shares.copy(), ledger.values.copy(),
+                                deepcopy(self.trade_list), list(self.log), self.events.copy(), state)
+
+    def restore(self, snapshot):
+        """
+        恢复到快照的状态，之后调用 run() 从快照的下一个交易日继续
+
+        Args:
+            snapshot: BacktestSnapshot
+        """
+        if snapshot.n_assets != len(self.fund_list) + 1:
+            raise ValueError(f"快照的资产数为 {snapshot.n_assets}，与基金列表（{len(self.fund_list)} 个基金）不一致")
+        for key, value in snapshot.state.items():
+            setattr(self, key, deepcopy(value))
+        ledger = AssetLedger(snapshot.n_assets, capacity=len(snapshot.dates))
+        ledger.extend(snapshot.dates, snapshot.shares, snapshot.values)
+        self.ledger = ledger
+        self.trade_list = deepcopy(snapshot.trade_list)
+        self.log = list(snapshot.log)
+        self.events = snapshot.events.copy()
+        self.calendar = None
+        self._metrics_cache = None
+        self.current_asset = ledger[-1] if len(ledger) else self.asset_initial
+
+    @classmethod
+    def from_snapshot(cls, snapshot, fund_list, end_date=None):
+        """
+        从快照创建回测实例（不调用 __init__），可以是修改了规则的其他策略类
+
+        Args:
+            snapshot: BacktestSnapshot
+            fund_list: 基金列表，可以包含新增的净值数据
+            end_date: 新的结束日期，None时保持快照中的结束日期
+
+        Returns:
+            回测实例，调用 run() 继续回测
+        """
+        backtest = cls.__new__(cls)
+        backtest.fund_list = fund_list
+        backtest.restore(snapshot)
+        if end_date is not None:
+            backtest.end_date = end_date
+        return backtest
+
+    def fork(self):
+        """复制当前状态得到独立的回测实例，修改属性后 run() 不影响原回测"""
+        return type(self).from_snapshot(self.snapshot(), self.fund_list)
+
+    def replay(self, fund_list=None, fee_rate=0.0):
+        """
+        不重新运行策略，按本次回测的交易记录重建账本和结果信息
+
+        Args:
+            fund_list: 重新定价使用的基金列表（如修正后的净值），None时使用回测的基金列表
+            fee_rate: 交易费率，见 TradeReplay.run
+
+        Returns:
+            ReplayResult
+        """
+        return TradeReplay.from_backtest(self, fund_list).run(self.trade_list, fee_rate)
+
+    def aligned_factor(self, factor, rows):
+        """
+        对齐到交易日历的因子矩阵，供 weight_matrix 使用
+
+        Args:
+            factor: 基金的因子属性名，与净值列表同序（最新在前）
+            rows: 交易日历的行下标
+
+        Returns:
+            形状为 (len(rows), 基金数) 的数组，第 i 行只包含该交易日及之前的数据
+        """
+        series = [getattr(fund, factor, None) for fund in self.fund_list]
+        return self.calendar.align(series)[np.asarray(rows, dtype=int)]
+
+    def target_weight_trades(self, target, adjust_factor=None):
+        """
+        由目标权重生成当日交易列表，策略函数可以直接返回
+
+        Args:
+            target: 各资产（现金 + 基金）的目标权重，全为NaN表示不调仓
+            adjust_factor: 当日的调仓靠拢系数，None时使用 self.adjust_factor
+
+        Returns:
+            [current_date, [sellfund, buyfund, sellshares, price], ...]，不需要交易时为None
+        """
+        row = self.calendar.row(self.current_date)
+        prices = [1] + self.calendar.price_list(row)
+        tradable = [True] + self.calendar.has_data[row].tolist()
+        trades = VectorizedBacktest.weights_to_trades(
+            self.current_asset[1], prices, target,
+            self.adjust_factor if adjust_factor is None else adjust_factor, tradable)
+        if not trades:
+            return None
+        return [self.current_date] + trades
+
+    def weight_matrix(self, rows):
+        """
+        向量化回测的目标权重矩阵，由子类实现
+
+        Args:
+            rows: 回测区间内的交易日行下标，可用 aligned_factor 取得对应的因子
+
+        Returns:
+            形状为 (len(rows), 1 + 基金数) 的目标权重，第0列为现金，全为NaN的行表示当天不调仓
+        """
+        raise NotImplementedError("向量化回测需要策略实现 weight_matrix")
+
+    def adjust_factors(self, rows):
+        """
+        向量化回测每个交易日的调仓靠拢系数，默认都为 adjust_factor；
+        逐日回测中某些日期用其他系数调用 target_weight_trades（如建仓日一次调到目标）时由子类重写
+
+        Returns:
+            形状为 (len(rows),) 的数组
+        """
+        return np.full(len(rows), float(self.adjust_factor))
+
+    def run_vectorized(self):
+        """
+        向量化运行回测：由 weight_matrix 一次给出全部目标权重，NumPy计算持仓和市值后写入账本
+
+        结果与策略函数每日返回 target_weight_trades 的逐日回测一致，不调用 strategy_func。
+        """
+        rows = self.backtest_rows()
+        n_assets = len(self.fund_list) + 1
+        weights = np.asarray(self.weight_matrix(rows), dtype=float)
+        if weights.shape != (len(rows), n_assets):
+            raise ValueError(f"权重矩阵形状应为 {(len(rows), n_assets)}，实际为 {weights.shape}")
+        if len(rows) == 0:
+            self.finish()
+            return
+
+        prices = np.ones((len(rows), n_assets))
+        prices[:, 1:] = self.calendar.prices[rows]
+        tradable = np.ones((len(rows), n_assets), dtype=bool)
+        tradable[:, 1:] = self.calendar.has_data[rows]
+        initial_shares = np.asarray(self.ledger[-1][1] if len(self.ledger) else self.asset_initial[1], dtype=float)
+        adjust = np.asarray(self.adjust_factors(rows), dtype=float)[None, :]
+        result = VectorizedBacktest.run_target_weights(prices, weights, adjust, initial_shares, tradable)
+
+        dates = [self.row_date(row) for row in rows]
+        self.ledger.extend(dates, result.shares, result.values)
+        # 由每日市值变化还原交易记录
+        previous_shares = np.vstack([initial_shares, result.shares[:-1]])
+        price = np.nan_to_num(prices)
+        deltas = result.values - previous_shares * price
+        tol = 1e-12 * max(float(np.max(np.abs(result.equity))), 1.0)
+        for i in np.flatnonzero(result.traded_value > tol):
+            trades = VectorizedBacktest.pair_trades(deltas[i], price[i], tol)
+            if not trades:
+                continue
+            self.trade_list.append([dates[i]] + trades)
+            for trade in trades:
+                self.events.record(dates[i], EVENT_TRADE, trade[0], trade[1], float(trade[2]), float(trade[3]))
+        self.current_date = dates[-1]
+        self.current_asset = self.ledger[-1]
+        self.finish()
+
     def plot_result(self):
         """绘制回测结果图表"""
         if not self.asset_list:
@@ -474,16 +798,22 @@ class BackTestFuncInfo:
             'recovery_days': '回撤修复天数',
             'trade_count': '交易次数',
             'sharpe_ratio': '夏普比率',
-            'holding_rate': '现金比率'
+            'holding_rate': '现金比率',
+            'annualized_return': '年化收益率(%)',
+            'annualized_volatility': '年化波动率(%)',
+            'sortino_ratio': '索提诺比率',
+            'calmar_ratio': '卡玛比率',
+            'turnover': '换手率',
+            'max_drawdown_duration': '最长回撤交易日',
         }
         
         for key, label in info_labels.items():
             if key in result_info:
                 value = result_info[key]
                 if isinstance(value, float):
-                    if key in ['total_return', 'maximum_drawdown']:
+                    if key in ['total_return', 'maximum_drawdown', 'annualized_return', 'annualized_volatility']:
                         formatted_value = f"{value:.2f}%"
-                    elif key == 'sharpe_ratio':
+                    elif key in ['sharpe_ratio', 'sortino_ratio', 'calmar_ratio']:
                         formatted_value = f"{value:.4f}" if value is not None else "N/A"
                     elif key == 'holding_rate':
                         formatted_value = f"{value:.2%}"
@@ -0,0 +1,108 @@
+"""
+回测交易日历
+
+回测开始时一次性构建：所有基金交易日期的并集（按时间正序），
+以及每个基金在每个交易日对应的净值下标（没有数据的日期向前填充为最近一个交易日）。
+回测主循环只遍历真实的交易日，按日期取净值是 O(1) 的数组读取。
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import List, Any, Optional, Sequence
+
+import numpy as np
+
+
+class TradingCalendar:
+    """
+    基金交易日历
+
+    矩阵约定（T 个交易日，F 个基金）：
+        date_strs   交易日期字符串 'YYYY-MM-DD'，按时间正序，形状为 (T,)
+        fund_index  基金在该日（或之前最近一个交易日）的净值下标，形状为 (T, F)，从未有数据时为-1
+        has_data    基金在该日是否有净值，形状为 (T, F)
+        prices      向前填充后的单位净值，形状为 (T, F)，从未有数据时为NaN
+    """
+
+    def __init__(self, fund_list: List[Any]):
+        """
+        Args:
+            fund_list: 基金列表（ExtendedFuncInfo），使用 _date2idx_map 和 _unit_value_ls
+        """
+        self.date_strs = sorted({date_str for fund in fund_list for date_str in fund._date2idx_map})
+        self.dates = [datetime.strptime(date_str, '%Y-%m-%d') for date_str in self.date_strs]
+        self._date2row = {date_str: i for i, date_str in enumerate(self.date_strs)}
+
+        n_dates, n_funds = len(self.date_strs), len(fund_list)
+        raw_index = np.full((n_dates, n_funds), -1, dtype=int)
+        for j, fund in enumerate(fund_list):
+            rows = [self._date2row[date_str] for date_str in fund._date2idx_map]
+            raw_index[rows, j] = list(fund._date2idx_map.values())
+        self.has_data = raw_index >= 0
+
+        # 向前填充：每个位置取该基金最近一个有数据的行
+        steps = np.arange(n_dates)[:, None]
+        last_row = np.maximum.accumulate(np.where(self.has_data, steps, -1), axis=0)
+        cols = np.arange(n_funds)[None, :]
+        self.fund_index = np.where(last_row >= 0, raw_index[np.maximum(last_row, 0), cols], -1)
+
+        self.prices = np.full((n_dates, n_funds), np.nan)
+        for j, fund in enumerate(fund_list):
+            valid = self.fund_index[:, j] >= 0
+            if valid.any():
+                values = np.asarray(fund._unit_value_ls, dtype=float)
+                self.prices[valid, j] = values[self.fund_index[valid, j]]
+
+    def __len__(self) -> int:
+        return len(self.date_strs)
+
+    def row(self, date) -> int:
+        """
+        日期对应的行下标；不是交易日时返回之前最近一个交易日的行，早于所有交易日时返回-1
+
+        Args:
+            date: datetime 或 'YYYY-MM-DD' 字符串
+        """
+        date_str = date.strftime('%Y-%m-%d') if isinstance(date, datetime) else str(date)
+        row = self._date2row.get(date_str)
+        if row is not None:
+            return row
+        return bisect_right(self.date_strs, date_str) - 1
+
+    def trading_rows(self, start_date: datetime, end_date: datetime) -> range:
+        """[start_date, end_date] 区间内的交易日行下标"""
+        start = bisect_left(self.date_strs, start_date.strftime('%Y-%m-%d'))
+        stop = bisect_right(self.date_strs, end_date.strftime('%Y-%m-%d'))
+        return range(start, max(start, stop))
+
+    def price_list(self, row: int) -> List[Optional[float]]:
+        """某行各基金的单位净值（向前填充），没有数据时为None"""
+        if row < 0:
+            return [None] * self.prices.shape[1]
+        return [None if np.isnan(value) else value for value in self.prices[row].tolist()]
+
+    def nonefund_list(self, row: int) -> List[int]:
+        """某行当日没有净值的基金序号（从1开始，0为现金）"""
+        if row < 0:
+            return list(range(1, self.has_data.shape[1] + 1))
+        return (np.flatnonzero(~self.has_data[row]) + 1).tolist()
+
+    def align(self, series_list: List[Optional[Sequence]]) -> np.ndarray:
+        """
+        把各基金与净值列表同序（最新在前）的序列对齐到交易日历，没有数据的日期向前填充
+
+        Args:
+            series_list: 每个基金一个序列（如 factor_holtwinters_delta_percentage），None表示该基金没有此数据
+
+        Returns:
+            形状为 (T, F) 的矩阵，没有数据（或序列中为None）时为NaN
+        """
+        matrix = np.full(self.fund_index.shape, np.nan)
+        for j, series in enumerate(series_list):
+            if series is None or len(series) == 0:
+                continue
+            values = np.array([np.nan if v is None else v for v in series], dtype=float)
+            index = self.fund_index[:, j]
+            valid = (index >= 0) & (index < len(values))
+            matrix[valid, j] = values[index[valid]]
+        return matrix
@@ -0,0 +1,133 @@
+"""
+回测事件日志
+
+以列的形式在内存中缓存结构化事件（日期、事件类型、卖出/买入资产序号、份额、价格、说明），
+回测结束后可转换为 DataFrame 或写入 .npz 列式文件，便于批量回测后统一分析。
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# 事件类型
+EVENT_TRADE = 'trade'  # 成交的一笔调仓
+EVENT_ERROR = 'error'  # 不合法的操作，回测终止
+
+
+@dataclass
+class BacktestEvent:
+    """一条回测事件，没有对应资产时序号为-1，没有数值时为NaN"""
+    date: datetime
+    kind: str
+    sellfund: int = -1
+    buyfund: int = -1
+    shares: float = float('nan')
+    price: float = float('nan')
+    message: str = ''
+
+
+class EventLog:
+    """
+    按列缓存的回测事件日志
+
+    记录一条事件只是在各列末尾追加一个值，不做格式化和输出。
+    """
+
+    COLUMNS = ('date', 'kind', 'sellfund', 'buyfund', 'shares', 'price', 'message')
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        """清空事件"""
+        self._columns = {name: [] for name in self.COLUMNS}
+
+    def copy(self) -> 'EventLog':
+        """复制事件日志（各列独立）"""
+        log = EventLog()
+        log._columns = {name: list(values) for name, values in self._columns.items()}
+        return log
+
+    def record(self, date, kind: str, sellfund: int = -1, buyfund: int = -1,
+               shares: float = float('nan'), price: float = float('nan'), message: str = '') -> None:
+        """
+        记录一条事件
+
+        Args:
+            date: 事件日期
+            kind: 事件类型，EVENT_TRADE 或 EVENT_ERROR
+            sellfund: 卖出资产序号（0为现金）
+            buyfund: 买入资产序号
+            shares: 卖出份额
+            price: 交易价格
+            message: 说明
+        """
+        columns = self._columns
+        columns['date'].append(date)
+        columns['kind'].append(kind)
+        columns['sellfund'].append(sellfund)
+        columns['buyfund'].append(buyfund)
+        columns['shares'].append(shares)
+        columns['price'].append(price)
+        columns['message'].append(message)
+
+    def __len__(self) -> int:
+        return len(self._columns['date'])
+
+    def __iter__(self) -> Iterator[BacktestEvent]:
+        for values in zip(*(self._columns[name] for name in self.COLUMNS)):
+            yield BacktestEvent(*values)
+
+    def __getitem__(self, k) -> BacktestEvent:
+        return BacktestEvent(*(self._columns[name][k] for name in self.COLUMNS))
+
+    def filter(self, kind: str) -> List[BacktestEvent]:
+        """某一类型的全部事件"""
+        return [event for event in self if event.kind == kind]
+
+    def to_frame(self) -> pd.DataFrame:
+        """转换为 DataFrame，每列一个字段"""
+        return pd.DataFrame({
+            'date': pd.to_datetime(self._columns['date']),
+            'kind': self._columns['kind'],
+            'sellfund': np.asarray(self._columns['sellfund'], dtype=int),
+            'buyfund': np.asarray(self._columns['buyfund'], dtype=int),
+            'shares': np.asarray(self._columns['shares'], dtype=float),
+            'price': np.asarray(self._columns['price'], dtype=float),
+            'message': self._columns['message'],
+        })
+
+    def flush(self, path: str, clear: bool = True) -> Optional[str]:
+        """
+        写入 .npz 列式文件
+
+        Args:
+            path: 文件路径
+            clear: 写入后是否清空内存中的事件
+
+        Returns:
+            写入的文件路径，没有事件时返回None
+        """
+        if len(self) == 0:
+            return None
+        columns = self._columns
+        np.savez(path,
+                 date=np.array(columns['date'], dtype='datetime64[s]'),
+                 kind=np.array(columns['kind'], dtype=str),
+                 sellfund=np.asarray(columns['sellfund'], dtype=int),
+                 buyfund=np.asarray(columns['buyfund'], dtype=int),
+                 shares=np.asarray(columns['shares'], dtype=float),
+                 price=np.asarray(columns['price'], dtype=float),
+                 message=np.array(columns['message'], dtype=str))
+        if clear:
+            self.clear()
+        return path if path.endswith('.npz') else f"{path}.npz"
+
+    @staticmethod
+    def load(path: str) -> pd.DataFrame:
+        """读取 flush 写入的事件文件为 DataFrame"""
+        with np.load(path, allow_pickle=False) as data:
+            return pd.DataFrame({name: data[name] for name in EventLog.COLUMNS})
@@ -0,0 +1,209 @@
+"""
+时点因子库
+
+回测开始前为每个基金、每个日期预先记录"当天只用当天及之前的数据计算出的因子值"，
+策略通过 value(name, fund, row, lag) 以O(1)读取，不再每天重建因子列表。
+
+因子由计算函数 compute(fund, values) 给出：values 为净值列表（最新在前），返回同样顺序、
+同样长度的因子值。声明为因果（causal=True）的因子第i个值只依赖 values[i:]，
+对完整序列计算一次即得到全部时点值（HoltWinters平滑和HDP都满足）；
+非因果的因子（如居中移动平均）对每个日期截断数据后重新计算，取最新值。
+
+audit 抽样检查：把库中的值与截断到当天的数据重新计算的结果比较，发现未来数据泄露。
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from ..analysis.indicators import HoltWintersIndicator
+from .calendar import TradingCalendar
+
+
+@dataclass
+class LookaheadViolation:
+    """时点因子与截断数据重新计算的结果不一致的记录"""
+    factor: str
+    fund: int                          # 基金在 fund_list 中的下标
+    date: str                          # 'YYYY-MM-DD'
+    stored: Optional[float]
+    recomputed: Optional[float]
+
+
+class PointInTimeFactorStore:
+    """
+    时点因子库
+
+    用法:
+        store = PointInTimeFactorStore(fund_list, calendar)
+        store.add('hdp', PointInTimeFactorStore.holtwinters_delta_percentage)
+        store.value('hdp', 0, row, lag=1)     # 基金0在 row 对应日期的前一个净值日的HDP
+        violations = store.audit('hdp', sample=100)
+    """
+
+    HDP = 'holtwinters_delta_percentage'
+
+    def __init__(self, fund_list: List[Any], calendar: Optional[TradingCalendar] = None):
+        """
+        Args:
+            fund_list: 基金列表（ExtendedFuncInfo实例）
+            calendar: 交易日历，None时根据基金列表构建
+        """
+        self.fund_list = fund_list
+        self.calendar = TradingCalendar(fund_list) if calendar is None else calendar
+        self._series: Dict[str, List[np.ndarray]] = {}
+        self._compute: Dict[str, Optional[Callable]] = {}
+        self._matrix: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def default(cls, fund_list: List[Any], calendar: Optional[TradingCalendar] = None) -> 'PointInTimeFactorStore':
+        """
+        回测默认使用的因子库：HDP取自基金已计算的 factor_holtwinters_delta_percentage，
+        审计时用基金的HoltWinters参数重新计算
+        """
+        store = cls(fund_list, calendar)
+        store.add(cls.HDP, cls.holtwinters_delta_percentage, attribute='factor_holtwinters_delta_percentage')
+        return store
+
+    @staticmethod
+    def holtwinters_delta_percentage(fund: Any, values) -> List[float]:
+        """
+        HDP因子的计算函数，使用基金的 factor_holtwinters_parameter，结果与 ExtendedFuncInfo 的因子计算一致
+
+        Args:
+            fund: 基金
+            values: 净值列表（最新在前）
+        """
+        params = fund.factor_holtwinters_parameter
+        if not params:
+            raise ValueError(f"基金 {fund.code} 未设置 factor_holtwinters_parameter")
+        chronological = np.asarray(values, dtype=float)[::-1]
+        smoothed = HoltWintersIndicator.rolling_smooth(
+            chronological, params['alpha'], params['beta'], params['gamma'], params['season_length'])
+        delta = (chronological - smoothed)[::-1]
+        return HoltWintersIndicator.calculate_delta_percentage(delta.tolist())[0]
+
+    @staticmethod
+    def _to_array(values, length: int, name: str, fund: Any) -> np.ndarray:
+        array = np.array([np.nan if v is None else v for v in values], dtype=float)
+        if len(array) != length:
+            raise ValueError(f"基金 {fund.code} 的因子 {name} 长度为 {len(array)}，与净值长度 {length} 不一致")
+        return array
+
+    def add(self, name: str, compute: Optional[Callable] = None, causal: bool = True,
+            attribute: Optional[str] = None) -> 'PointInTimeFactorStore':
+        """
+        预计算一个因子的全部时点值
+
+        Args:
+            name: 因子名称
+            compute: 计算函数 compute(fund, values) -> 因子列表，均为最新在前
+            causal: compute 的第i个值是否只依赖 values[i:]；False时对每个日期截断数据重新计算，开销为O(n)次计算
+            attribute: 从基金的该属性读取已计算的因子（与净值同序），此时 compute 只用于审计；
+                       属性为空时使用 compute 计算
+
+        Returns:
+            self，便于链式调用
+        """
+        if compute is None and attribute is None:
+            raise ValueError("需要提供因子的计算函数或基金属性名")
+        series = []
+        for fund in self.fund_list:
+            values = fund._unit_value_ls
+            n = len(values)
+            stored = getattr(fund, attribute, None) if attribute is not None else None
+            if stored is not None and (len(stored) or compute is None):
+                array = self._to_array(stored, n, name, fund)
+            elif compute is None:
+                raise ValueError(f"基金 {fund.code} 没有因子属性 {attribute}")
+            elif causal:
+                array = self._to_array(compute(fund, values), n, name, fund)
+            else:
+                array = np.array([self._latest(compute, fund, values, i) for i in range(n)], dtype=float)
+            series.append(array)
+        self._series[name] = series
+        self._compute[name] = compute
+        self._matrix.pop(name, None)
+        return self
+
+    @staticmethod
+    def _latest(compute: Callable, fund: Any, values, idx: int) -> float:
+        """只用 values[idx:] 计算时第idx个日期的因子值"""
+        value = compute(fund, values[idx:])[0]
+        return np.nan if value is None else float(value)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._series
+
+    def series(self, name: str, fund: int) -> np.ndarray:
+        """基金全部时点值（最新在前），没有值为NaN"""
+        if name not in self._series:
+            raise ValueError(f"因子库中没有因子: {name}")
+        return self._series[name][fund]
+
+    def value(self, name: str, fund: int, row: int, lag: int = 0) -> Optional[float]:
+        """
+        O(1)读取时点因子值，与 strategy_factor_list[fund][lag] 一致
+
+        Args:
+            name: 因子名称
+            fund: 基金在 fund_list 中的下标
+            row: 交易日历的行下标
+            lag: 向前的净值日数，负数从最早的数据倒数（-1为最早一天）
+
+        Returns:
+            因子值，基金当日没有净值、超出范围或值为NaN时为None
+        """
+        series = self.series(name, fund)
+        if row < 0 or not self.calendar.has_data[row, fund]:
+            return None
+        idx = int(self.calendar.fund_index[row, fund])
+        pos = idx + lag if lag >= 0 else len(series) + lag
+        if not idx <= pos < len(series):
+            return None
+        value = series[pos]
+        return None if np.isnan(value) else float(value)
+
+    def matrix(self, name: str) -> np.ndarray:
+        """对齐到交易日历的 日期×基金 因子矩阵（向前填充），供向量化回测使用"""
+        if name not in self._matrix:
+            funds = range(len(self.fund_list))
+            self._matrix[name] = self.calendar.align([self.series(name, j) for j in funds])
+        return self._matrix[name]
+
+    def audit(self, name: str, sample: int = 50, seed: Optional[int] = None,
+              rtol: float = 1e-9, atol: float = 1e-12) -> List[LookaheadViolation]:
+        """
+        未来数据泄露审计：抽样若干（基金, 日期），用截断到该日期的数据重新计算因子并与库中的值比较
+
+        Args:
+            name: 因子名称（需要有计算函数）
+            sample: 抽样个数，不超过全部（基金, 日期）个数
+            seed: 随机种子
+            rtol, atol: 比较的容差
+
+        Returns:
+            不一致的记录列表，为空表示抽样范围内没有发现泄露
+        """
+        compute = self._compute.get(name)
+        if name not in self._series:
+            raise ValueError(f"因子库中没有因子: {name}")
+        if compute is None:
+            raise ValueError(f"因子 {name} 没有计算函数，无法审计")
+        positions = [(j, i) for j, series in enumerate(self._series[name]) for i in range(len(series))]
+        rng = np.random.default_rng(seed)
+        picks = rng.choice(len(positions), size=min(sample, len(positions)), replace=False)
+
+        violations = []
+        for k in sorted(picks.tolist()):
+            j, i = positions[k]
+            fund = self.fund_list[j]
+            stored = self._series[name][j][i]
+            recomputed = self._latest(compute, fund, fund._unit_value_ls, i)
+            if not np.isclose(stored, recomputed, rtol=rtol, atol=atol, equal_nan=True):
+                violations.append(LookaheadViolation(
+                    name, j, fund._date_ls[i].strftime('%Y-%m-%d'),
+                    None if np.isnan(stored) else float(stored),
+                    None if np.isnan(recomputed) else float(recomputed)))
+        return violations
@@ -0,0 +1,207 @@
+"""
+回测资产账本
+
+按列存储每日持仓：日期数组 (T,)、份额矩阵 (T, N) 和价值矩阵 (T, N)，N 为现金加基金的资产数。
+数组预先分配、不够时按倍数扩容，逐日记账只写入一行，不再复制整条嵌套列表。
+通过 LedgerRecord 兼容旧的 asset_list 记录格式 [date, shares, None, values]，
+策略仍可读取 current_asset[1][i] 和 current_asset[3][i]。
+"""
+
+from collections.abc import Sequence
+from typing import Any, Iterable, List, Optional
+
+import numpy as np
+
+
+class LedgerRecord(Sequence):
+    """
+    账本中一天的只读记录，兼容旧格式 [date, shares, None, values]
+
+    record[1] 和 record[3] 是账本矩阵对应行的只读视图，不复制数据。
+    """
+    __slots__ = ('_ledger', '_row')
+
+    def __init__(self, ledger: 'AssetLedger', row: int):
+        self._ledger = ledger
+        self._row = row
+
+    def __len__(self):
+        return 4
+
+    def __getitem__(self, k):
+        return (self.date, self.shares, None, self.values)[k]
+
+    @property
+    def date(self):
+        return self._ledger._dates[self._row]
+
+    @property
+    def shares(self) -> np.ndarray:
+        view = self._ledger._shares[self._row]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def values(self) -> np.ndarray:
+        view = self._ledger._values[self._row]
+        view.flags.writeable = False
+        return view
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, LedgerRecord)):
+            return (len(other) == 4 and self[0] == other[0]
+                    and list(self[1]) == list(other[1]) and list(self[3]) == list(other[3]))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"LedgerRecord({self.date!r}, {self.shares.tolist()}, None, {self.values.tolist()})"
+
+    def tolist(self) -> list:
+        """转换为旧格式的普通列表"""
+        return [self.date, self.shares.tolist(), None, self.values.tolist()]
+
+
+class AssetLedger(Sequence):
+    """
+    列式资产账本
+
+    ledger[i] 返回第 i 天的 LedgerRecord，ledger.dates / shares / values 返回已记录部分的数组视图。
+    """
+
+    def __init__(self, n_assets: int, capacity: int = 256):
+        """
+        Args:
+            n_assets: 资产数（现金 + 基金数）
+            capacity: 预分配的天数，不够时自动扩容
+        """
+        if n_assets < 1:
+            raise ValueError("资产数必须大于0")
+        self.n_assets = n_assets
+        capacity = max(int(capacity), 1)
+        self._dates = np.empty(capacity, dtype=object)
+        self._shares = np.zeros((capacity, n_assets))
+        self._values = np.zeros((capacity, n_assets))
+        self._len = 0
+
+    @classmethod
+    def from_records(cls, records: Iterable[Any], n_assets: Optional[int] = None) -> 'AssetLedger':
+        """
+        从旧格式的记录列表 [[date, shares, None, values], ...] 创建账本
+
+        Args:
+            records: 记录列表
+            n_assets: 资产数，None时从第一条记录推断
+        """
+        records = list(records)
+        if n_assets is None:
+            if not records:
+                raise ValueError("无法从空记录列表推断资产数")
+            n_assets = len(records[0][1])
+        ledger = cls(n_assets, capacity=len(records))
+        for record in records:
+            ledger.append(record[0], record[1], record[3])
+        return ledger
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [LedgerRecord(self, i) for i in range(*k.indices(self._len))]
+        if k < 0:
+            k += self._len
+        if not 0 <= k < self._len:
+            raise IndexError("AssetLedger index out of range")
+        return LedgerRecord(self, k)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, AssetLedger)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"AssetLedger(n_assets={self.n_assets}, len={self._len})"
+
+    def _grow(self, capacity: int) -> None:
+        """扩容到至少 capacity 天"""
+        capacity = max(capacity, 2 * len(self._dates))
+        dates = np.empty(capacity, dtype=object)
+        dates[:self._len] = self._dates[:self._len]
+        shares = np.zeros((capacity, self.n_assets))
+        shares[:self._len] = self._shares[:self._len]
+        values = np.zeros((capacity, self.n_assets))
+        values[:self._len] = self._values[:self._len]
+        self._dates, self._shares, self._values = dates, shares, values
+
+    def reserve(self, capacity: int) -> None:
+        """预先分配至少 capacity 天的空间"""
+        if capacity > len(self._dates):
+            self._grow(capacity)
+
+    def append(self, date, shares, values) -> LedgerRecord:
+        """
+        记录一天的持仓
+
+        Args:
+            date: 日期
+            shares: 各资产份额，长度为 n_assets
+            values: 各资产价值，长度为 n_assets
+
+        Returns:
+            新记录
+        """
+        if self._len == len(self._dates):
+            self._grow(self._len + 1)
+        row = self._len
+        self._dates[row] = date
+        self._shares[row] = shares
+        self._values[row] = values
+        self._len += 1
+        return LedgerRecord(self, row)
+
+    def extend(self, dates: Sequence[Any], shares, values) -> None:
+        """
+        一次记录多天的持仓
+
+        Args:
+            dates: 日期列表，长度为 k
+            shares: 份额，形状为 (k, n_assets)
+            values: 价值，形状为 (k, n_assets)
+        """
+        k = len(dates)
+        if k == 0:
+            return
+        self.reserve(self._len + k)
+        rows = slice(self._len, self._len + k)
+        self._dates[rows] = list(dates)
+        self._shares[rows] = shares
+        self._values[rows] = values
+        self._len += k
+
+    def clear(self) -> None:
+        """清空账本，保留已分配的空间"""
+        self._dates[:self._len] = None
+        self._len = 0
+
+    @property
+    def dates(self) -> np.ndarray:
+        """已记录的日期，形状为 (T,)"""
+        return self._dates[:self._len]
+
+    @property
+    def shares(self) -> np.ndarray:
+        """已记录的份额，形状为 (T, N)"""
+        return self._shares[:self._len]
+
+    @property
+    def values(self) -> np.ndarray:
+        """已记录的价值，形状为 (T, N)"""
+        return self._values[:self._len]
+
+    def total_values(self) -> np.ndarray:
+        """每日总价值，形状为 (T,)"""
+        return self.values.sum(axis=1)
+
+    def tolist(self) -> List[list]:
+        """转换为旧格式的 asset_list"""
+        return [record.tolist() for record in self]
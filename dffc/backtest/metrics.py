@@ -0,0 +1,217 @@
+"""
+回测绩效指标
+
+从每日总价值（权益）和现金数组一次性计算全部指标，全部为NumPy向量化运算，
+参数扫描中每次回测都计算一遍也足够快。
+"""
+
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+
+class BacktestMetrics:
+    """回测绩效指标计算"""
+
+    TRADING_DAYS = 252  # 每年交易日数
+    # 回撤持续天数直方图的分箱（交易日），最后一箱为 [250, +inf)
+    DRAWDOWN_DURATION_BINS = (1, 5, 20, 60, 120, 250)
+
+    @staticmethod
+    def drawdown_series(equity: np.ndarray):
+        """
+        计算历史峰值和回撤序列
+
+        Returns:
+            (peaks, drawdowns)，峰值为0时回撤记为0
+        """
+        peaks = np.maximum.accumulate(equity)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdowns = np.where(peaks != 0, (equity - peaks) / peaks, 0.0)
+        return peaks, drawdowns
+
+    @staticmethod
+    def annualized_return(initial_value, final_value, span_days):
+        """
+        年化收益率（%），按自然日跨度折算：(final / initial) ** (365 / span_days) - 1
+
+        参数可以是标量或同形状的数组（逐元素计算）；跨度不为正或价值不为正时为NaN
+
+        Returns:
+            与参数同形状的年化收益率
+        """
+        initial_value, final_value, span_days = np.broadcast_arrays(
+            np.asarray(initial_value, dtype=float), np.asarray(final_value, dtype=float),
+            np.asarray(span_days, dtype=float))
+        valid = (span_days > 0) & (initial_value > 0) & (final_value > 0)
+        ratio = np.where(valid, final_value, 1.0) / np.where(valid, initial_value, 1.0)
+        result = (ratio ** (365.0 / np.where(valid, span_days, 1.0)) - 1) * 100
+        return np.where(valid, result, np.nan)
+
+    @staticmethod
+    def return_ratios(equity):
+        """
+        由逐日收益率计算夏普比率、年化波动率（%）和索提诺比率（假设无风险利率为0），
+        沿最后一维计算，equity 可以是 (T,) 或 (P, T)，前一日价值为0的日期跳过
+
+        收益率不足2个时三项均为NaN；标准差（下行偏差）为0时夏普（索提诺）比率为NaN
+
+        Returns:
+            (sharpe_ratio, annualized_volatility, sortino_ratio)，形状为 equity.shape[:-1]
+        """
+        equity = np.asarray(equity, dtype=float)
+        prev = equity[..., :-1]
+        valid = prev != 0
+        returns = np.divide(equity[..., 1:] - prev, prev, out=np.zeros_like(prev), where=valid)
+        count = valid.sum(axis=-1)
+        annualize = np.sqrt(BacktestMetrics.TRADING_DAYS)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = returns.sum(axis=-1) / count
+            std = np.sqrt((((returns - mean[..., None]) ** 2) * valid).sum(axis=-1) / (count - 1))
+            downside = np.sqrt(((np.minimum(returns, 0.0) ** 2) * valid).sum(axis=-1) / count)
+            enough = count > 1
+            sharpe_ratio = np.where(enough & (std != 0), mean / std * annualize, np.nan)
+            annualized_volatility = np.where(enough, std * annualize * 100, np.nan)
+            sortino_ratio = np.where(enough & (downside != 0), mean / downside * annualize, np.nan)
+        return sharpe_ratio, annualized_volatility, sortino_ratio
+
+    @staticmethod
+    def turnover(traded_value, equity):
+        """换手率：总成交金额 / 平均总价值，沿最后一维计算，平均总价值为0时为NaN"""
+        traded_value = np.asarray(traded_value, dtype=float)
+        mean_equity = np.asarray(equity, dtype=float).mean(axis=-1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(mean_equity != 0, traded_value.sum(axis=-1) / mean_equity, np.nan)
+
+    @staticmethod
+    def _optional(value) -> Optional[float]:
+        """标量结果转换为结果信息字典中的值，NaN记为None"""
+        value = float(value)
+        return None if np.isnan(value) else value
+
+    @staticmethod
+    def drawdown_durations(equity: np.ndarray) -> np.ndarray:
+        """
+        每段回撤（价值低于历史峰值的连续交易日）的持续天数
+
+        Returns:
+            各段回撤的交易日数，按时间顺序
+        """
+        peaks = np.maximum.accumulate(equity)
+        underwater = np.concatenate(([False], equity < peaks, [False]))
+        edges = np.flatnonzero(np.diff(underwater.astype(np.int8)))
+        return edges[1::2] - edges[0::2]
+
+    @staticmethod
+    def duration_histogram(durations: np.ndarray, bins: Sequence[int] = DRAWDOWN_DURATION_BINS) -> Dict[str, int]:
+        """
+        回撤持续天数直方图
+
+        Returns:
+            {'1-4': 次数, '5-19': 次数, ..., '250+': 次数}
+        """
+        edges = np.append(np.asarray(bins, dtype=float), np.inf)
+        counts, _ = np.histogram(durations, bins=edges)
+        labels = [f"{bins[i]}-{bins[i + 1] - 1}" for i in range(len(bins) - 1)] + [f"{bins[-1]}+"]
+        return {label: int(count) for label, count in zip(labels, counts)}
+
+    @staticmethod
+    def compute(dates: Sequence[Any], equity, cash, initial_value: float,
+                start_date, end_date, trade_count: int = 0,
+                traded_value=None) -> Dict[str, Any]:
+        """
+        计算回测结果信息字典
+
+        Args:
+            dates: 每条记录的日期（datetime），形状为 (T,)
+            equity: 每日总价值，形状为 (T,)
+            cash: 每日现金，形状为 (T,)
+            initial_value: 初始总价值
+            start_date: 回测开始日期
+            end_date: 回测结束日期
+            trade_count: 交易次数
+            traded_value: 每日成交金额，形状为 (T,)，None时不计算换手率
+
+        Returns:
+            结果信息字典，百分比类指标（收益率、回撤、波动率）以%为单位
+        """
+        equity = np.asarray(equity, dtype=float)
+        cash = np.asarray(cash, dtype=float)
+        if equity.size == 0:
+            return {}
+        final_value = float(equity[-1])
+        total_return = (final_value - initial_value) / initial_value * 100
+
+        # 最大回撤和最大回撤修复天数
+        peaks, drawdowns = BacktestMetrics.drawdown_series(equity)
+        trough_idx = int(np.argmin(drawdowns))
+        max_drawdown = float(drawdowns[trough_idx]) * 100
+        trough_date = dates[trough_idx]
+        recovered = np.flatnonzero(equity[trough_idx + 1:] >= peaks[trough_idx])
+        if recovered.size:
+            recovery_days = (dates[trough_idx + 1 + recovered[0]] - trough_date).days
+        else:
+            recovery_days = (end_date - trough_date).days
+
+        # 夏普比率、索提诺比率和年化波动率（假设无风险利率为0）
+        sharpe_ratio, annualized_volatility, sortino_ratio = (
+            BacktestMetrics._optional(v) for v in BacktestMetrics.return_ratios(equity))
+
+        # 年化收益率和卡玛比率
+        annualized_return = BacktestMetrics._optional(
+            BacktestMetrics.annualized_return(initial_value, final_value, (dates[-1] - start_date).days))
+        calmar_ratio = None
+        if annualized_return is not None and max_drawdown < 0:
+            calmar_ratio = annualized_return / abs(max_drawdown)
+
+        # 现金比率
+        valueall = equity.sum()
+        holding_rate = float(cash.sum() / valueall) if valueall != 0 else 0
+
+        # 换手率：总成交金额 / 平均总价值
+        turnover = None
+        if traded_value is not None:
+            turnover = BacktestMetrics._optional(BacktestMetrics.turnover(traded_value, equity))
+
+        durations = BacktestMetrics.drawdown_durations(equity)
+        return {
+            'initial_value': initial_value,
+            'final_value': final_value,
+            'total_return': total_return,
+            'trade_count': trade_count,
+            'start_date': start_date.strftime('%Y-%m-%d'),
+            'end_date': end_date.strftime('%Y-%m-%d'),
+            'maximum_drawdown': max_drawdown,
+            'recovery_days': recovery_days,
+            'sharpe_ratio': sharpe_ratio,
+            'holding_rate': holding_rate,
+            'annualized_return': annualized_return,
+            'annualized_volatility': annualized_volatility,
+            'sortino_ratio': sortino_ratio,
+            'calmar_ratio': calmar_ratio,
+            'turnover': turnover,
+            'max_drawdown_duration': int(durations.max()) if durations.size else 0,
+            'drawdown_duration_histogram': BacktestMetrics.duration_histogram(durations),
+        }
+
+    @staticmethod
+    def traded_value(shares: np.ndarray, prices: np.ndarray, initial_shares: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        由每日份额变化估算每日成交金额
+
+        一笔调仓同时卖出和买入，成交金额取各资产份额变化市值之和的一半。
+
+        Args:
+            shares: 每日份额，形状为 (T, N)，第0列为现金
+            prices: 每日单位净值，形状为 (T, N)，现金为1，没有数据为NaN
+            initial_shares: 回测开始前的份额，形状为 (N,)，None时第一天不计成交
+
+        Returns:
+            每日成交金额，形状为 (T,)
+        """
+        shares = np.asarray(shares, dtype=float)
+        if shares.size == 0:
+            return np.zeros(0)
+        first = shares[:1] if initial_shares is None else np.asarray(initial_shares, dtype=float)[None, :]
+        delta = np.abs(np.diff(shares, axis=0, prepend=first))
+        return 0.5 * np.sum(delta * np.nan_to_num(prices), axis=1)
@@ -0,0 +1,98 @@
+"""
+多策略同时回测
+
+多个策略实例使用同一组基金时，共用一个交易日历和一次日期遍历：
+每个交易日只构建一次只读的时点视图，所有策略依次读取这组视图并在各自的账本上记账。
+比较多个策略的开销接近只运行一个策略。
+"""
+
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from .calendar import TradingCalendar
+
+
+class MultiStrategyRunner:
+    """
+    多策略单次遍历回测驱动
+
+    用法:
+        runner = MultiStrategyRunner([gather, magnatic, dual_h])
+        df = runner.run()
+    """
+
+    def __init__(self, strategies: List[Any], names: Optional[List[str]] = None, verbose: Optional[int] = 0):
+        """
+        Args:
+            strategies: 策略实例列表（BackTestFuncInfo 子类），必须使用相同的基金列表，回测区间可以不同
+            names: 策略名称，None时使用 "类名#序号"
+            verbose: 统一设置各策略的输出级别，None时保持各策略自己的设置
+        """
+        if not strategies:
+            raise ValueError("没有需要回测的策略")
+        funds = [id(fund) for fund in strategies[0].fund_list]
+        for strategy in strategies[1:]:
+            if [id(fund) for fund in strategy.fund_list] != funds:
+                raise ValueError("多策略回测要求所有策略使用相同的基金列表")
+        if names is None:
+            names = [f"{type(strategy).__name__}#{i}" for i, strategy in enumerate(strategies)]
+        if len(names) != len(strategies):
+            raise ValueError("策略名称个数与策略个数不一致")
+        self.strategies = list(strategies)
+        self.names = list(names)
+        if verbose is not None:
+            for strategy in self.strategies:
+                strategy.verbose = verbose
+        self.calendar = None
+
+    def run(self, calendar: Optional[TradingCalendar] = None) -> pd.DataFrame:
+        """
+        运行全部策略
+
+        Args:
+            calendar: 已按同一组基金构建的交易日历，None时根据基金列表构建
+
+        Returns:
+            每个策略一行的结果信息 DataFrame，索引为策略名称
+        """
+        self.calendar = TradingCalendar(self.strategies[0].fund_list) if calendar is None else calendar
+        ranges = [strategy.prepare(self.calendar) for strategy in self.strategies]
+        scheduled = [strategy.scheduled_rows(rows) for strategy, rows in zip(self.strategies, ranges)]
+        active = [i for i, rows in enumerate(ranges) if len(rows)]
+        start = min((ranges[i].start for i in active), default=0)
+        stop = max((ranges[i].stop for i in active), default=0)
+
+        for row in range(start, stop):
+            shared_lists = None
+            for i in list(active):
+                strategy = self.strategies[i]
+                if row < ranges[i].start:
+                    continue
+                if row >= ranges[i].stop or strategy.row_date(row) > strategy.end_date:
+                    active.remove(i)
+                    continue
+                if not scheduled[i][row - ranges[i].start]:
+                    strategy.carry_forward([row])  # 非调度日只记账，不调用策略函数
+                    continue
+                if not strategy.step(row, shared_lists):
+                    active.remove(i)  # 操作不合法，该策略结束回测
+                if shared_lists is None:
+                    # 同一交易日的视图与策略无关，之后的策略直接复用
+                    shared_lists = (strategy.strategy_unit_value_list, strategy.strategy_date_list,
+                                    strategy.strategy_factor_list)
+            if not active:
+                break
+
+        for strategy in self.strategies:
+            strategy.finish()
+        return self.results()
+
+    def results(self) -> pd.DataFrame:
+        """各策略的结果信息，每个策略一行"""
+        rows: List[Dict[str, Any]] = []
+        for name, strategy in zip(self.names, self.strategies):
+            result = strategy.result_info_dict()
+            result.pop('drawdown_duration_histogram', None)
+            rows.append({'strategy': name, **result})
+        return pd.DataFrame(rows).set_index('strategy')
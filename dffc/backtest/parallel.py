@@ -0,0 +1,59 @@
+"""
+批量回测的进程池
+
+参数扫描、滚动前推和滚动起点回测共用：每个任务只传递很小的参数，只读的回测数据（基金、交易日历、因子等）
+作为上下文共享。在支持 fork 的系统上，上下文放在模块级变量中由子进程直接继承（写时复制）；
+不支持 fork 时，每个工作进程初始化时接收一次上下文。
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterator, Sequence
+
+# 工作进程共享的只读上下文
+_CONTEXT = None
+
+
+def _init_worker(context):
+    """不支持 fork 时的工作进程初始化，每个进程接收一次上下文"""
+    global _CONTEXT
+    _CONTEXT = context
+
+
+def _run_task(payload):
+    """在工作进程中用共享的上下文运行一个任务"""
+    func, task = payload
+    return func(_CONTEXT, task)
+
+
+def parallel_map(context: Any, func: Callable[[Any, Any], Any], tasks: Sequence[Any],
+                 max_workers: int, chunksize: int = 1) -> Iterator[Any]:
+    """
+    对每个任务调用 func(context, task)，按任务顺序逐个返回结果
+
+    Args:
+        context: 所有任务共享的只读数据
+        func: 模块级函数（需要能被 pickle），在工作进程中调用
+        tasks: 任务参数列表
+        max_workers: 进程数，为1或只有一个任务时在当前进程中顺序运行
+        chunksize: 每次分发给工作进程的任务数
+
+    Returns:
+        结果的迭代器，可边运行边统计进度
+    """
+    if max_workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield func(context, task)
+        return
+    global _CONTEXT
+    if 'fork' in multiprocessing.get_all_start_methods():
+        # fork：子进程直接继承父进程中的上下文，不需要逐个任务序列化
+        _CONTEXT = context
+        executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('fork'))
+    else:
+        executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(context,))
+    try:
+        with executor:
+            yield from executor.map(_run_task, [(func, task) for task in tasks], chunksize=max(1, chunksize))
+    finally:
+        _CONTEXT = None
@@ -0,0 +1,191 @@
+"""
+交易记录重放
+
+根据保存的 trade_list 和基金净值重建完整的资产账本和回测结果，不重新运行策略和因子计算。
+交易按日期执行，校验规则与 BackTestFuncInfo.operation 相同；持仓只在交易日变化，
+两次交易之间的份额向量化前向填充，再乘以当日净值得到市值。
+可以用修正后的净值数据或不同的手续费率重新评估历史决策。
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .calendar import TradingCalendar
+from .ledger import AssetLedger
+from .metrics import BacktestMetrics
+
+
+@dataclass
+class ReplayResult:
+    """交易记录重放结果"""
+    ledger: AssetLedger                                     # 重建的资产账本
+    trade_list: List[list] = field(default_factory=list)    # 实际执行的交易记录
+    log: List[str] = field(default_factory=list)            # 错误日志，格式与回测日志相同
+    result: Dict[str, Any] = field(default_factory=dict)    # 回测结果信息，与 result_info_dict 相同
+
+    @property
+    def completed(self) -> bool:
+        """全部交易是否都合法执行"""
+        return not self.log
+
+
+class TradeReplay:
+    """
+    交易记录重放引擎
+
+    用法:
+        replay = TradeReplay.from_backtest(backtest, fund_list=corrected_funds)
+        result = replay.run(backtest.trade_list, fee_rate=0.001)
+    """
+
+    def __init__(self, fund_list: List[Any], start_date: datetime, end_date: datetime,
+                 initial_shares: Optional[List[float]] = None, initial_value: Optional[float] = None):
+        """
+        Args:
+            fund_list: 基金列表（ExtendedFuncInfo实例），顺序与交易记录中的基金序号一致
+            start_date: 回测开始日期
+            end_date: 回测结束日期
+            initial_shares: 回测开始前的份额（现金 + 基金），None时为1单位现金
+            initial_value: 初始总价值，None时为初始现金份额
+        """
+        self.fund_list = fund_list
+        self.start_date = start_date
+        self.end_date = end_date
+        n_assets = len(fund_list) + 1
+        if initial_shares is None:
+            initial_shares = [1.] + [0.] * len(fund_list)
+        if len(initial_shares) != n_assets:
+            raise ValueError(f"初始份额长度应为 {n_assets}，实际为 {len(initial_shares)}")
+        self.initial_shares = np.asarray(initial_shares, dtype=float)
+        self.initial_value = float(self.initial_shares[0]) if initial_value is None else float(initial_value)
+        self.calendar = TradingCalendar(fund_list)
+
+    @classmethod
+    def from_backtest(cls, backtest: Any, fund_list: Optional[List[Any]] = None) -> 'TradeReplay':
+        """
+        使用回测实例的区间和初始资产创建重放引擎
+
+        Args:
+            backtest: BackTestFuncInfo 实例
+            fund_list: 重新定价使用的基金列表，None时使用回测的基金列表
+        """
+        return cls(backtest.fund_list if fund_list is None else fund_list,
+                   backtest.start_date, backtest.end_date, backtest.asset_initial[1],
+                   sum(backtest.asset_initial[3]))
+
+    @staticmethod
+    def check_trade(trade: list, n_funds: int, nonefund_list: List[int]) -> Optional[str]:
+        """
+        检查单笔交易 [sellfund, buyfund, sellshares, price] 是否合法
+
+        Args:
+            trade: 交易
+            n_funds: 基金数
+            nonefund_list: 当日无数据的基金序号
+
+        Returns:
+            错误信息，合法时为None
+        """
+        sellfund, buyfund, sellshares, price = trade[:4]
+        # 检查交易的基金是否是1整数且2存在且3买入卖出不是同一只基金
+        if type(sellfund) is not int or type(buyfund) is not int:
+            return "Invalid fund index"
+        if sellfund not in range(n_funds + 1) or buyfund not in range(n_funds + 1):
+            return "Fund index out of range"
+        if sellfund == buyfund:
+            return "Cannot buy and sell the same fund"
+        # 检查交易的基金是否在无数据基金列表中
+        if sellfund in nonefund_list or buyfund in nonefund_list:
+            return "Cannot trade fund with no data"
+        # 检查交易的份额和价格是否是数字且大于0
+        if not isinstance(sellshares, (int, float)) or not isinstance(price, (int, float)) or sellshares < 0 or price < 0:
+            return "Invalid shares or price"
+        return None
+
+    def _row_date(self, row: int) -> datetime:
+        return datetime.combine(self.calendar.dates[row].date(), self.start_date.time(), self.start_date.tzinfo)
+
+    def run(self, trade_list: List[list], fee_rate=0.0) -> ReplayResult:
+        """
+        重放交易记录
+
+        区间外的交易被忽略；遇到不合法的交易时与回测相同，记录错误并在前一个交易日结束。
+
+        Args:
+            trade_list: 交易记录 [[date, [sellfund, buyfund, sellshares, price], ...], ...]
+            fee_rate: 交易费率，标量或每个资产一个（长度为 1 + 基金数），按卖出资产取费率（卖出现金即申购），从买入金额中扣除
+
+        Returns:
+            ReplayResult
+        """
+        n_funds = len(self.fund_list)
+        n_assets = n_funds + 1
+        fee = np.broadcast_to(np.asarray(fee_rate, dtype=float), (n_assets,))
+        if np.any(fee < 0) or np.any(fee >= 1):
+            raise ValueError("手续费率必须在 [0, 1) 之间")
+
+        calendar = self.calendar
+        rows = np.asarray([row for row in calendar.trading_rows(self.start_date, self.end_date)
+                           if self._row_date(row) <= self.end_date], dtype=int)
+        prices = np.ones((len(rows), n_assets))
+        prices[:, 1:] = calendar.prices[rows] if len(rows) else np.empty((0, n_funds))
+        prices = np.nan_to_num(prices)  # 没有数据的基金净值记为0，与回测记账一致
+        row_pos = {int(row): i for i, row in enumerate(rows)}
+
+        # 按日期依次执行交易，只在交易日计算份额
+        states = [self.initial_shares]
+        trade_pos: List[int] = []
+        applied: List[list] = []
+        log: List[str] = []
+        stop = len(rows)
+        for trade_today in sorted(trade_list, key=lambda trades: trades[0]):
+            date = trade_today[0]
+            if date < self.start_date or date > self.end_date:
+                continue
+            row = calendar.row(date)
+            pos = row_pos.get(row) if row >= 0 and calendar.date_strs[row] == date.strftime('%Y-%m-%d') else None
+            if pos is None:
+                error = "Trade date is not a trading day"
+            else:
+                error = None
+                nonefund_list = calendar.nonefund_list(int(rows[pos]))
+                for trade in trade_today[1:]:
+                    error = self.check_trade(trade, n_funds, nonefund_list)
+                    if error is not None:
+                        break
+            if error is None:
+                price = prices[pos]
+                shares = states[-1].copy()
+                for sellfund, buyfund, sellshares, _ in trade_today[1:]:
+                    shares[sellfund] -= sellshares
+                    shares[buyfund] += sellshares * price[sellfund] * (1 - fee[sellfund]) / price[buyfund]
+                if np.any(shares < -0.000001):
+                    error = "Negative asset"
+            if error is not None:
+                log.append(f"Error: {error} at {date.strftime('%Y-%m-%d')}")
+                stop = pos if pos is not None else int(np.searchsorted(rows, row, side='right'))
+                break
+            states.append(np.abs(shares))
+            trade_pos.append(pos)
+            applied.append(trade_today)
+
+        # 两次交易之间份额不变：每个交易日使用此前最近一次交易后的份额
+        rows = rows[:stop]
+        state_idx = np.searchsorted(np.asarray(trade_pos, dtype=int), np.arange(len(rows)), side='right')
+        shares = np.asarray(states)[state_idx]
+        values = shares * prices[:stop]
+        ledger = AssetLedger(n_assets, capacity=len(rows))
+        ledger.extend([self._row_date(row) for row in rows], shares, values)
+
+        result = {}
+        if len(ledger):
+            traded_value = BacktestMetrics.traded_value(ledger.shares, prices[:stop], self.initial_shares)
+            result = BacktestMetrics.compute(
+                ledger.dates, ledger.total_values(), ledger.values[:, 0],
+                initial_value=self.initial_value,
+                start_date=self.start_date, end_date=self.end_date,
+                trade_count=len(applied), traded_value=traded_value)
+        return ReplayResult(ledger, applied, log, result)
@@ -0,0 +1,264 @@
+"""
+滚动起点稳健性回测
+
+同一个策略从区间内的每个（或每隔几个）交易日开始回测到同一个结束日期，
+得到收益率、最大回撤等结果在不同起点上的分布，避免只看一个起点的结果。
+
+交易日历（净值对齐）和时点因子库只构建一次，所有起点共用：
+    实现了 weight_matrix 的目标权重策略按起点批量向量化：起点之前的交易日持有现金，
+    所有起点在一次 (起点, 交易日, 资产) 的 NumPy 运算中完成；
+    其他（有状态的）策略把起点分组，每组用 MultiStrategyRunner 一次日期遍历完成，各组在进程池中并行。
+"""
+
+import io
+import os
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+import numpy as np
+import pandas as pd
+
+from .backtest_funcinfo import BackTestFuncInfo
+from .calendar import TradingCalendar
+from .factor_store import PointInTimeFactorStore
+from .metrics import BacktestMetrics
+from .multi import MultiStrategyRunner
+from .parallel import parallel_map
+from .vectorized import VectorizedBacktest
+
+
+def _run_task(batch, task):
+    """在工作进程中运行一组起点"""
+    mode, indices = task
+    return batch.run_chunk(indices, mode)
+
+
+@dataclass
+class RollingStartResult:
+    """滚动起点回测结果"""
+    runs: pd.DataFrame   # 每个起点一行的结果信息，回测失败时包含 error 列
+    mode: str            # 'vectorized' 或 'stateful'
+
+    DISTRIBUTION_COLUMNS = ('total_return', 'annualized_return', 'maximum_drawdown', 'sharpe_ratio')
+
+    def distribution(self, columns: Optional[Sequence[str]] = None,
+                     percentiles: Sequence[float] = (0.05, 0.25, 0.5, 0.75, 0.95)) -> pd.DataFrame:
+        """
+        各项结果在不同起点上的分布
+
+        Args:
+            columns: 统计的结果列，None时为收益率、年化收益率、最大回撤和夏普比率
+            percentiles: 分位数
+
+        Returns:
+            每项结果一行：count、mean、std、min、各分位数、max
+        """
+        runs = self.runs
+        if 'error' in runs.columns:
+            runs = runs[runs['error'].isna()]
+        columns = [c for c in (columns or self.DISTRIBUTION_COLUMNS) if c in runs.columns]
+        return runs[columns].astype(float).describe(percentiles=list(percentiles)).T
+
+
+class RollingStartBatch:
+    """
+    滚动起点批量回测
+
+    用法:
+        batch = RollingStartBatch(StrategyExample, fund_list, datetime(2022, 1, 1), datetime(2022, 12, 31),
+                                  end_date=datetime(2025, 7, 1))
+        result = batch.run()
+        result.distribution()
+    """
+
+    def __init__(self, strategy_class: Type[Any], fund_list: List[Any], first_start: datetime,
+                 last_start: datetime, end_date: datetime, every: int = 1,
+                 strategy_params: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            strategy_class: 策略类（BackTestFuncInfo 子类），构造参数为 (fund_list, start_date, end_date)
+            fund_list: 已加载数据并计算因子的基金列表，各起点只读共享
+            first_start: 最早的起点
+            last_start: 最晚的起点，不晚于结束日期
+            end_date: 所有起点共同的回测结束日期
+            every: 每隔几个交易日取一个起点
+            strategy_params: 每个策略实例都使用的属性，构造后用 BackTestFuncInfo.set_params 设置
+        """
+        if not fund_list:
+            raise ValueError("滚动起点回测中没有基金")
+        if every < 1:
+            raise ValueError("起点间隔必须大于0")
+        if last_start > end_date:
+            raise ValueError("最晚的起点不能晚于结束日期")
+        self.strategy_class = strategy_class
+        self.fund_list = fund_list
+        self.end_date = end_date
+        self.strategy_params = dict(strategy_params or {})
+        self.calendar = TradingCalendar(fund_list)
+        rows = self.calendar.trading_rows(first_start, last_start)[::every]
+        self.start_dates = [self.calendar.dates[row] for row in rows]
+        self.factor_store = None
+
+    @property
+    def vectorizable(self) -> bool:
+        """策略是否实现了 weight_matrix，可以按起点批量向量化"""
+        return getattr(self.strategy_class, 'weight_matrix', None) is not BackTestFuncInfo.weight_matrix
+
+    def _strategy(self, index: int) -> Any:
+        """第 index 个起点的策略实例，共用交易日历和因子库"""
+        with redirect_stdout(io.StringIO()):
+            strategy = self.strategy_class(self.fund_list, self.start_dates[index], self.end_date)
+            strategy.set_params(**self.strategy_params)
+        strategy.verbose = 0
+        if self.factor_store is not None:
+            strategy.factor_store = self.factor_store
+        return strategy
+
+    @staticmethod
+    def _row(start_date: datetime, result: Dict[str, Any], error: Optional[str] = None) -> Dict[str, Any]:
+        row = {'start_date': start_date.strftime('%Y-%m-%d')}
+        result = dict(result)
+        result.pop('drawdown_duration_histogram', None)
+        row.update(result)
+        if error is not None:
+            row['error'] = error
+        return row
+
+    def run_chunk(self, indices: Sequence[int], mode: str) -> List[Dict[str, Any]]:
+        """
+        运行一组起点
+
+        Args:
+            indices: 起点下标，按时间正序
+            mode: 'vectorized' 或 'stateful'
+
+        Returns:
+            每个起点一行的结果
+        """
+        if mode == 'vectorized':
+            return self._run_vectorized(indices)
+        try:
+            return self._run_stateful(indices)
+        except Exception:
+            if len(indices) == 1:
+                raise
+            # 某个起点出错时逐个重新运行，只把出错的起点记为失败
+            rows = []
+            for index in indices:
+                try:
+                    rows.extend(self._run_stateful([index]))
+                except Exception as e:
+                    rows.append(self._row(self.start_dates[index], {}, f"{type(e).__name__}: {e}"))
+            return rows
+
+    def _run_stateful(self, indices: Sequence[int]) -> List[Dict[str, Any]]:
+        """一次日期遍历运行一组起点的逐日回测"""
+        strategies = [self._strategy(index) for index in indices]
+        runner = MultiStrategyRunner(strategies, verbose=0)
+        with redirect_stdout(io.StringIO()):
+            runner.run(self.calendar)
+        rows = []
+        for index, strategy in zip(indices, strategies):
+            error = strategy.log[-1] if strategy.log and strategy.log[-1].startswith('Error') else None
+            rows.append(self._row(self.start_dates[index], strategy.result_info_dict(), error))
+        return rows
+
+    def _run_vectorized(self, indices: Sequence[int]) -> List[Dict[str, Any]]:
+        """
+        一次NumPy运算运行一组起点的目标权重回测
+
+        所有起点对齐到最早起点的交易日：起点之前不调仓，保持策略的初始资产，
+        到起点时才按权重调仓，与从起点开始回测完全一致。
+        """
+        strategies = [self._strategy(index) for index in indices]
+        rows = strategies[0].backtest_rows(self.calendar)
+        n_days, n_assets = len(rows), len(self.fund_list) + 1
+        weights = np.empty((len(strategies), n_days, n_assets))
+        # 起点之前不调仓，靠拢系数不起作用
+        adjust = np.ones((len(strategies), n_days))
+        offsets = []
+        for s, strategy in enumerate(strategies):
+            # 结束日期相同，各起点的交易日是最早起点交易日的后缀
+            strategy.calendar = self.calendar
+            offset = int(np.searchsorted(rows, self.calendar.row(strategy.start_date)))
+            strategy_rows = rows[offset:]
+            matrix = np.asarray(strategy.weight_matrix(strategy_rows), dtype=float)
+            if matrix.shape != (len(strategy_rows), n_assets):
+                raise ValueError(f"权重矩阵形状应为 {(len(strategy_rows), n_assets)}，实际为 {matrix.shape}")
+            weights[s, :offset] = np.nan
+            weights[s, offset:] = matrix
+            adjust[s, offset:] = strategy.adjust_factors(strategy_rows)
+            offsets.append(offset)
+
+        prices = np.ones((n_days, n_assets))
+        prices[:, 1:] = self.calendar.prices[rows]
+        tradable = np.ones((n_days, n_assets), dtype=bool)
+        tradable[:, 1:] = self.calendar.has_data[rows]
+        initial_shares = np.array([strategy.asset_initial[1] for strategy in strategies], dtype=float)
+        result = VectorizedBacktest.run_target_weights(prices, weights, adjust, initial_shares, tradable)
+
+        dates = [strategies[0].row_date(row) for row in rows]
+        all_equity = result.equity
+        out = []
+        for s, (index, strategy, offset) in enumerate(zip(indices, strategies, offsets)):
+            equity = all_equity[s, offset:]
+            if equity.size == 0:
+                out.append(self._row(self.start_dates[index], {}))
+                continue
+            # 成交次数与 run_vectorized 记录交易的条件一致
+            tol = 1e-12 * max(float(np.max(np.abs(equity))), 1.0)
+            traded_value = BacktestMetrics.traded_value(
+                result.shares[s, offset:], prices[offset:], strategy.asset_initial[1])
+            metrics = BacktestMetrics.compute(
+                dates[offset:], equity, result.cash[s, offset:],
+                initial_value=sum(strategy.asset_initial[3]),
+                start_date=strategy.start_date, end_date=strategy.end_date,
+                trade_count=int(np.count_nonzero(result.traded_value[s, offset:] > tol)),
+                traded_value=traded_value)
+            out.append(self._row(self.start_dates[index], metrics))
+        return out
+
+    def _shared_factor_store(self) -> Optional[PointInTimeFactorStore]:
+        """所有起点共用的默认因子库，基金没有HDP因子（也没有HoltWinters参数）时为None"""
+        try:
+            return PointInTimeFactorStore.default(self.fund_list, self.calendar)
+        except ValueError:
+            return None
+
+    def run(self, mode: str = 'auto', max_workers: Optional[int] = None,
+            chunk_size: Optional[int] = None) -> RollingStartResult:
+        """
+        运行全部起点
+
+        Args:
+            mode: 'vectorized'、'stateful'，或 'auto'（策略实现了 weight_matrix 时向量化）
+            max_workers: 进程数，None为CPU核数，1为在当前进程中顺序运行
+            chunk_size: 每组的起点数，None时把起点平均分给各进程；向量化时每组占用 组大小×交易日×资产 的内存
+
+        Returns:
+            RollingStartResult
+        """
+        if mode == 'auto':
+            mode = 'vectorized' if self.vectorizable else 'stateful'
+        if mode not in ('vectorized', 'stateful'):
+            raise ValueError(f"未知的运行方式: {mode}")
+        if mode == 'vectorized' and not self.vectorizable:
+            raise ValueError(f"策略 {self.strategy_class.__name__} 没有实现 weight_matrix，不能向量化")
+        total = len(self.start_dates)
+        if total == 0:
+            raise ValueError("区间内没有可用的起点")
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        max_workers = max(1, min(max_workers, total))
+        if chunk_size is None:
+            chunk_size = -(-total // max_workers)
+        chunks = [list(range(i, min(i + chunk_size, total))) for i in range(0, total, max(1, chunk_size))]
+        tasks = [(mode, chunk) for chunk in chunks]
+        if self.factor_store is None:
+            self.factor_store = self._shared_factor_store()
+        # 基金数据、交易日历和因子库作为共享上下文，fork 的子进程直接继承
+        outputs = list(parallel_map(self, _run_task, tasks, max_workers))
+        runs = pd.DataFrame([row for rows in outputs for row in rows])
+        return RollingStartResult(runs, mode)
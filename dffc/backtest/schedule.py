@@ -0,0 +1,117 @@
+"""
+策略调度
+
+策略可以声明只在部分交易日运行：固定周期、因子穿越阈值（回测开始前对整个交易日历向量化计算）
+或指定日期。非调度日不调用策略函数，持仓保持不变，由回测引擎按当日净值批量计算市值。
+"""
+
+from bisect import bisect_left
+from typing import Any, Iterable, List, Tuple
+
+import numpy as np
+
+
+class StrategySchedule:
+    """
+    策略调度规则，多条规则取并集
+
+    用法（在策略的 __init__ 中）:
+        self.schedule = StrategySchedule().every(20).on_cross(0, -0.8, 'down').on_cross(0, 0.8, 'up')
+    """
+
+    DIRECTIONS = ('up', 'down', 'both')
+
+    def __init__(self, include_start: bool = True):
+        """
+        Args:
+            include_start: 回测的第一个交易日是否总是调度（大多数策略在开始日期建仓）
+        """
+        self.include_start = include_start
+        self._periods: List[Tuple[int, int]] = []
+        self._dates: List[str] = []
+        self._crosses: List[Tuple[int, float, str, str]] = []
+
+    def every(self, n: int, offset: int = 0) -> 'StrategySchedule':
+        """
+        每 n 个交易日调度一次（从回测第一个交易日开始计数）
+
+        Args:
+            n: 周期（交易日数）
+            offset: 周期内的偏移，0表示第一个交易日
+        """
+        if n < 1:
+            raise ValueError("调度周期必须大于0")
+        self._periods.append((int(n), int(offset) % int(n)))
+        return self
+
+    def on_dates(self, dates: Iterable[Any]) -> 'StrategySchedule':
+        """
+        在指定日期调度，不是交易日时顺延到之后最近的交易日
+
+        Args:
+            dates: datetime 或 'YYYY-MM-DD' 字符串
+        """
+        for date in dates:
+            self._dates.append(date if isinstance(date, str) else date.strftime('%Y-%m-%d'))
+        return self
+
+    def on_cross(self, fund: int, threshold: float, direction: str = 'both',
+                 factor: str = 'factor_holtwinters_delta_percentage') -> 'StrategySchedule':
+        """
+        基金因子穿越阈值的交易日调度
+
+        Args:
+            fund: 基金在 fund_list 中的下标（从0开始）
+            threshold: 阈值
+            direction: 'up' 上穿（前一日 < 阈值 <= 当日），'down' 下穿（前一日 > 阈值 >= 当日），'both' 两者
+            factor: 基金的因子属性名，与净值列表同序（最新在前）
+        """
+        if direction not in self.DIRECTIONS:
+            raise ValueError(f"未知的穿越方向: {direction}")
+        self._crosses.append((int(fund), float(threshold), direction, factor))
+        return self
+
+    def mask(self, backtest: Any, rows) -> np.ndarray:
+        """
+        计算回测区间内各交易日是否调度
+
+        Args:
+            backtest: 已设置交易日历的 BackTestFuncInfo
+            rows: 回测区间内的交易日行下标（升序）
+
+        Returns:
+            与 rows 等长的布尔数组
+        """
+        rows = np.asarray(rows, dtype=int)
+        mask = np.zeros(len(rows), dtype=bool)
+        if len(rows) == 0:
+            return mask
+        calendar = backtest.calendar
+        if self.include_start:
+            mask[0] = True
+
+        positions = np.arange(len(rows))
+        for n, offset in self._periods:
+            mask |= positions % n == offset
+
+        if self._dates:
+            targets = {bisect_left(calendar.date_strs, date_str) for date_str in self._dates}
+            mask |= np.isin(rows, list(targets))
+
+        if self._crosses:
+            # 从前一个交易日开始对齐，第一个交易日也能判断穿越
+            lo = max(int(rows[0]) - 1, 0)
+            window = slice(lo, int(rows[-1]) + 1)
+            aligned = {}
+            for fund, threshold, direction, factor in self._crosses:
+                if factor not in aligned:
+                    series = [getattr(f, factor, None) for f in backtest.fund_list]
+                    aligned[factor] = calendar.align(series)[window]
+                values = aligned[factor][:, fund]
+                prev = np.concatenate(([np.nan], values[:-1]))
+                with np.errstate(invalid='ignore'):
+                    up = (prev < threshold) & (values >= threshold)
+                    down = (prev > threshold) & (values <= threshold)
+                hit = up if direction == 'up' else down if direction == 'down' else up | down
+                mask |= hit[rows - lo]
+        return mask
@@ -0,0 +1,78 @@
+"""
+回测快照
+
+保存回测在某个交易日结束时的全部状态：账本、交易记录、日志、事件，以及策略自定义的属性
+（如 mode、highest_deltaHDP、fund_list_situation）。可以从快照继续回测、
+分叉出修改了规则的新回测，或在新增净值数据后只模拟新增的交易日。
+
+文件格式为压缩的 .npz：账本数组按列保存，其余状态序列化后以字节数组保存。
+读取时会反序列化其中的Python对象，只应读取自己保存的快照文件。
+"""
+
+import pickle
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .events import EventLog
+
+
+@dataclass
+class BacktestSnapshot:
+    """回测快照，由 BackTestFuncInfo.snapshot() 创建"""
+    strategy: str                   # 策略类名（module.qualname）
+    dates: np.ndarray               # 账本日期，形状为 (T,)
+    shares: np.ndarray              # 账本份额，形状为 (T, N)
+    values: np.ndarray              # 账本价值，形状为 (T, N)
+    trade_list: List[list] = field(default_factory=list)
+    log: List[str] = field(default_factory=list)
+    events: EventLog = field(default_factory=EventLog)
+    state: Dict[str, Any] = field(default_factory=dict)  # 策略实例的其余属性
+
+    @property
+    def date(self) -> Optional[datetime]:
+        """快照对应的交易日（账本最后一天），账本为空时为None"""
+        return self.dates[-1] if len(self.dates) else None
+
+    @property
+    def n_assets(self) -> int:
+        """资产数（现金 + 基金数）"""
+        return self.shares.shape[1]
+
+    def save(self, path: str) -> str:
+        """
+        写入压缩的 .npz 文件
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            写入的文件路径
+        """
+        payload = pickle.dumps({
+            'strategy': self.strategy,
+            'trade_list': self.trade_list,
+            'log': self.log,
+            'events': self.events,
+            'state': self.state,
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+        np.savez_compressed(path,
+                            dates=np.array([date.isoformat() for date in self.dates], dtype=str),
+                            shares=np.asarray(self.shares, dtype=float),
+                            values=np.asarray(self.values, dtype=float),
+                            payload=np.frombuffer(payload, dtype=np.uint8))
+        return path if path.endswith('.npz') else f"{path}.npz"
+
+    @classmethod
+    def load(cls, path: str) -> 'BacktestSnapshot':
+        """读取 save 写入的快照文件"""
+        with np.load(path, allow_pickle=False) as data:
+            dates = np.empty(len(data['dates']), dtype=object)
+            dates[:] = [datetime.fromisoformat(date) for date in data['dates'].tolist()]
+            shares = data['shares']
+            values = data['values']
+            payload = pickle.loads(data['payload'].tobytes())
+        return cls(payload['strategy'], dates, shares, values,
+                   payload['trade_list'], payload['log'], payload['events'], payload['state'])
@@ -0,0 +1,244 @@
+"""
+蒙特卡洛压力测试
+
+由基金的历史日收益率用块自助法（block bootstrap）生成大量模拟净值路径，在全部路径上同时运行
+目标权重策略，得到收益率、最大回撤等结果的分位数区间。
+
+抽样以交易日为单位：每条路径由若干段连续的历史交易日拼接而成，同一天所有基金一起取样，
+保留基金之间的相关性；块内保持连续，保留收益率的短期自相关和波动聚集。
+块在历史序列首尾相接处循环（circular block bootstrap），每个交易日被抽到的概率相同。
+
+模拟路径为 (路径, 交易日, 基金) 的三维数组，按时间正序，第0天净值为1；
+策略的目标权重由同样形状的数组（或根据模拟路径计算权重的函数）给出，由 VectorizedBacktest 一次运行全部路径。
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from ..analysis.indicators import HoltWintersIndicator
+from .calendar import TradingCalendar
+from .metrics import BacktestMetrics
+from .vectorized import VectorizedBacktest
+
+
+@dataclass
+class StressResult:
+    """
+    压力测试结果，P 为路径数，T 为交易日数（含第0天）
+
+    各项结果与 result_info_dict 的同名项定义相同（均由 BacktestMetrics 计算），
+    result_info_dict 中为None的情况（如波动率为0时的夏普比率）在数组中记为NaN。
+    """
+    equity: np.ndarray                 # 每日总价值，形状为 (P, T)
+    total_return: np.ndarray           # 收益率（%），形状为 (P,)
+    maximum_drawdown: np.ndarray       # 最大回撤（%，负数），形状为 (P,)
+    annualized_return: np.ndarray      # 年化收益率（%，按自然日跨度折算），形状为 (P,)
+    annualized_volatility: np.ndarray  # 年化波动率（%），形状为 (P,)
+    sharpe_ratio: np.ndarray           # 夏普比率，形状为 (P,)
+    turnover: np.ndarray               # 换手率，形状为 (P,)
+
+    METRICS = ('total_return', 'maximum_drawdown', 'annualized_return',
+               'annualized_volatility', 'sharpe_ratio', 'turnover')
+
+    @property
+    def n_paths(self) -> int:
+        return self.equity.shape[0]
+
+    def percentiles(self, q: Sequence[float] = (5, 25, 50, 75, 95)) -> pd.DataFrame:
+        """
+        各项结果在全部路径上的分位数
+
+        Args:
+            q: 百分位数（0-100）
+
+        Returns:
+            每项结果一行，每个百分位数一列（如 p5、p50）
+        """
+        columns = [f"p{v:g}" for v in q]
+        data = [np.nanpercentile(getattr(self, name), q) for name in self.METRICS]
+        return pd.DataFrame(data, index=list(self.METRICS), columns=columns)
+
+    def equity_bands(self, q: Sequence[float] = (5, 25, 50, 75, 95)) -> pd.DataFrame:
+        """
+        每个交易日总价值的分位数区间
+
+        Returns:
+            每个交易日一行，每个百分位数一列
+        """
+        columns = [f"p{v:g}" for v in q]
+        return pd.DataFrame(np.percentile(self.equity, q, axis=0).T, columns=columns)
+
+    def loss_probability(self, threshold: float = 0.0) -> float:
+        """收益率（%）低于 threshold 的路径比例"""
+        return float(np.mean(self.total_return < threshold))
+
+
+class MonteCarloStress:
+    """
+    蒙特卡洛压力测试
+
+    用法:
+        stress = MonteCarloStress(fund_list, datetime(2020, 1, 1), datetime(2025, 7, 1))
+        result = stress.run([0.2, 0.4, 0.4], n_paths=5000, horizon=250, block_size=20, seed=1)
+        result.percentiles()
+    """
+
+    def __init__(self, fund_list: List[Any], start_date: Optional[datetime] = None,
+                 end_date: Optional[datetime] = None):
+        """
+        Args:
+            fund_list: 已加载净值数据的基金列表（ExtendedFuncInfo实例）
+            start_date: 历史收益率的开始日期，None时从所有基金都有净值的第一天开始
+            end_date: 历史收益率的结束日期，None时到最后一个交易日
+        """
+        if not fund_list:
+            raise ValueError("压力测试中没有基金")
+        self.fund_list = fund_list
+        calendar = TradingCalendar(fund_list)
+        start = start_date if start_date is not None else calendar.dates[0]
+        end = end_date if end_date is not None else calendar.dates[-1]
+        rows = np.asarray(calendar.trading_rows(start, end), dtype=int)
+        # 只使用所有基金都已有净值的交易日，缺失的日期向前填充，当日收益率为0
+        rows = rows[~np.isnan(calendar.prices[rows]).any(axis=1)]
+        if len(rows) < 3:
+            raise ValueError("所有基金都有净值的交易日不足，无法估计收益率")
+        prices = calendar.prices[rows]
+        self.dates = [calendar.dates[row] for row in rows]
+        self.returns = prices[1:] / prices[:-1] - 1  # 历史日收益率，形状为 (n, F)
+        # 历史上平均每个交易日对应的自然日数，用于把模拟的交易日数折算为年化收益率的自然日跨度
+        self.period_days = (self.dates[-1] - self.dates[0]).days / len(self.returns)
+
+    @staticmethod
+    def block_indices(n_obs: int, n_paths: int, horizon: int, block_size: int,
+                      rng: np.random.Generator) -> np.ndarray:
+        """
+        循环块自助法的抽样下标
+
+        Args:
+            n_obs: 历史交易日数
+            n_paths: 路径数
+            horizon: 每条路径的交易日数
+            block_size: 块长度（交易日），1时为普通的逐日自助法
+            rng: 随机数生成器
+
+        Returns:
+            形状为 (n_paths, horizon) 的历史交易日下标
+        """
+        if block_size < 1:
+            raise ValueError("块长度必须大于0")
+        block_size = min(block_size, n_obs)
+        n_blocks = -(-horizon // block_size)
+        starts = rng.integers(0, n_obs, size=(n_paths, n_blocks))
+        indices = (starts[:, :, None] + np.arange(block_size)) % n_obs
+        return indices.reshape(n_paths, -1)[:, :horizon]
+
+    def paths(self, n_paths: int = 1000, horizon: Optional[int] = None, block_size: int = 20,
+              seed: Optional[int] = None) -> np.ndarray:
+        """
+        生成模拟净值路径
+
+        Args:
+            n_paths: 路径数
+            horizon: 每条路径的交易日数（不含第0天），None时与历史交易日数相同
+            block_size: 块长度（交易日）
+            seed: 随机种子
+
+        Returns:
+            形状为 (n_paths, horizon + 1, 基金数) 的净值，第0天为1
+        """
+        if n_paths < 1:
+            raise ValueError("路径数必须大于0")
+        n_obs, n_funds = self.returns.shape
+        horizon = n_obs if horizon is None else int(horizon)
+        if horizon < 1:
+            raise ValueError("模拟的交易日数必须大于0")
+        indices = self.block_indices(n_obs, n_paths, horizon, block_size, np.random.default_rng(seed))
+        paths = np.ones((n_paths, horizon + 1, n_funds))
+        np.cumprod(1 + self.returns[indices], axis=1, out=paths[:, 1:])
+        return paths
+
+    def holtwinters_delta(self, paths: np.ndarray) -> np.ndarray:
+        """
+        模拟路径上的HoltWinters差分（净值 - 平滑值），使用各基金的 factor_holtwinters_parameter，
+        所有路径批量计算，可用于编写根据模拟路径计算权重的函数
+
+        Args:
+            paths: paths() 生成的净值，形状为 (P, T, F)
+
+        Returns:
+            形状为 (P, T, F) 的差分
+        """
+        delta = np.empty_like(paths)
+        for j, fund in enumerate(self.fund_list):
+            params = fund.factor_holtwinters_parameter
+            if not params:
+                raise ValueError(f"基金 {fund.code} 未设置 factor_holtwinters_parameter")
+            smoothed = HoltWintersIndicator.rolling_smooth_batch(
+                paths[:, :, j], (params['alpha'], params['beta'], params['gamma']), params['season_length'])
+            delta[:, :, j] = paths[:, :, j] - smoothed
+        return delta
+
+    @staticmethod
+    def metrics(equity: np.ndarray, traded_value: np.ndarray,
+                period_days: float = 365.0 / BacktestMetrics.TRADING_DAYS) -> dict:
+        """
+        全部路径的结果指标，与 BacktestMetrics.compute 使用相同的公式
+
+        Args:
+            equity: 每日总价值，形状为 (P, T)
+            traded_value: 每日成交金额，形状为 (P, T)
+            period_days: 每个交易日对应的自然日数，年化收益率按 (T-1) × period_days 的自然日跨度折算
+        """
+        initial = equity[:, 0]
+        final = equity[:, -1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            total_return = (final - initial) / initial * 100
+        _, drawdowns = BacktestMetrics.drawdown_series(equity.T)
+        span_days = (equity.shape[1] - 1) * period_days
+        sharpe_ratio, annualized_volatility, _ = BacktestMetrics.return_ratios(equity)
+        return {
+            'total_return': total_return,
+            'maximum_drawdown': drawdowns.min(axis=0) * 100,
+            'annualized_return': BacktestMetrics.annualized_return(initial, final, span_days),
+            'annualized_volatility': annualized_volatility,
+            'sharpe_ratio': sharpe_ratio,
+            'turnover': BacktestMetrics.turnover(traded_value, equity),
+        }
+
+    def run(self, weights: Union[Sequence[float], np.ndarray, Callable[[np.ndarray], np.ndarray]],
+            n_paths: int = 1000, horizon: Optional[int] = None, block_size: int = 20,
+            adjust_factor: float = 1.0, seed: Optional[int] = None,
+            paths: Optional[np.ndarray] = None) -> StressResult:
+        """
+        在模拟路径上运行目标权重策略
+
+        Args:
+            weights: 各资产（现金 + 基金）的目标权重，形状为 (N,)、(T, N) 或 (P, T, N)，
+                     全为NaN的行表示当天不调仓；也可以是函数 weights(paths)，由模拟净值返回上述形状的权重
+            n_paths, horizon, block_size, seed: 见 paths()
+            adjust_factor: 调仓靠拢系数，见 VectorizedBacktest.run_target_weights
+            paths: 已生成的模拟净值，形状为 (P, T, F)，None时调用 paths() 生成
+
+        Returns:
+            StressResult
+        """
+        if paths is None:
+            paths = self.paths(n_paths, horizon, block_size, seed)
+        n_paths, n_days, n_funds = paths.shape
+        if n_funds != len(self.fund_list):
+            raise ValueError(f"模拟路径的基金数为 {n_funds}，与基金列表（{len(self.fund_list)} 个基金）不一致")
+        if callable(weights):
+            weights = weights(paths)
+        weights = np.asarray(weights, dtype=float)
+        if weights.ndim == 1:
+            weights = np.broadcast_to(weights, (n_days, weights.shape[0]))
+
+        prices = np.ones((n_paths, n_days, n_funds + 1))
+        prices[:, :, 1:] = paths
+        result = VectorizedBacktest.run_target_weights(prices, weights, adjust_factor)
+        equity = result.equity
+        return StressResult(equity, **self.metrics(equity, result.traded_value, self.period_days))
@@ -0,0 +1,186 @@
+"""
+策略参数扫描
+
+基金数据和因子只加载、计算一次，然后把同一组基金分发给多个回测进程：
+每组参数实例化一次策略类，用 BackTestFuncInfo.set_params 设置参数后运行回测，
+收集 result_info_dict 为 DataFrame 的一行。
+
+基金数据作为进程池的共享上下文（见 parallel_map），每个任务只传递参数字典。
+"""
+
+import io
+import os
+import random
+import itertools
+from contextlib import redirect_stdout
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type
+
+import pandas as pd
+
+from ..core.extended_funcinfo import ExtendedFuncInfo
+from .parallel import parallel_map
+
+
+def _run_task(context, task):
+    """在工作进程中运行一组参数的回测，context 为 (strategy_class, fund_list, start_date, end_date)"""
+    run_id, params = task
+    return ParameterSweep.run_single(*context, params, run_id)
+
+
+class ParameterSweep:
+    """
+    策略参数扫描器
+
+    用法:
+        sweep = ParameterSweep.from_config(StrategyExample, 'configs/funds/fund_config_dual.json',
+                                           './csv_data', datetime(2022, 7, 1), datetime(2025, 7, 1))
+        df = sweep.run(ParameterSweep.grid({'threshold': [1.5, 1.9], 'target': [0.95, 0.975]}))
+    """
+
+    def __init__(self, strategy_class: Type[Any], fund_list: List[Any], start_date, end_date):
+        """
+        Args:
+            strategy_class: 策略类（BackTestFuncInfo 子类），构造参数为 (fund_list, start_date, end_date)
+            fund_list: 已加载数据并计算因子的基金列表，各回测只读共享
+            start_date: 回测开始日期
+            end_date: 回测结束日期
+        """
+        if not fund_list:
+            raise ValueError("参数扫描中没有基金")
+        self.strategy_class = strategy_class
+        self.fund_list = list(fund_list)
+        self.start_date = start_date
+        self.end_date = end_date
+
+    @classmethod
+    def from_config(cls, strategy_class: Type[Any], config_file_path: str, csv_data_dir: str,
+                    start_date, end_date) -> 'ParameterSweep':
+        """
+        从基金配置文件和CSV数据目录创建参数扫描器，一次性计算全部基金的因子
+
+        Args:
+            strategy_class: 策略类
+            config_file_path: 基金配置文件路径
+            csv_data_dir: CSV数据目录，文件名为 {code}.csv
+            start_date: 回测开始日期
+            end_date: 回测结束日期
+        """
+        from ..analysis.panel import FactorPanel
+        funds = ExtendedFuncInfo.create_fundlist_config(config_file_path, csv_data_dir)
+        FactorPanel(funds).compute().apply_to_funds()
+        return cls(strategy_class, funds, start_date, end_date)
+
+    @staticmethod
+    def grid(param_grid: Dict[str, Iterable[Any]]) -> List[Dict[str, Any]]:
+        """
+        参数网格的全部组合
+
+        Args:
+            param_grid: {参数名: 候选值列表}
+
+        Returns:
+            参数字典列表
+        """
+        names = list(param_grid)
+        return [dict(zip(names, values)) for values in itertools.product(*(list(param_grid[name]) for name in names))]
+
+    @staticmethod
+    def sample(param_space: Dict[str, Any], n_samples: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        随机采样参数
+
+        Args:
+            param_space: {参数名: 取值范围}，取值范围可以是
+                         列表（等概率选取）、(low, high) 元组（均匀分布）或 callable(rng)
+            n_samples: 采样个数
+            seed: 随机种子
+
+        Returns:
+            参数字典列表
+        """
+        rng = random.Random(seed)
+        samples = []
+        for _ in range(n_samples):
+            params = {}
+            for name, space in param_space.items():
+                if callable(space):
+                    params[name] = space(rng)
+                elif isinstance(space, tuple) and len(space) == 2:
+                    params[name] = rng.uniform(space[0], space[1])
+                elif isinstance(space, (list, range)):
+                    params[name] = rng.choice(list(space))
+                else:
+                    raise ValueError(f"参数 {name} 的取值范围无法采样: {space!r}")
+            samples.append(params)
+        return samples
+
+    @staticmethod
+    def run_single(strategy_class: Type[Any], fund_list: List[Any], start_date, end_date,
+                   params: Dict[str, Any], run_id: int = 0) -> Dict[str, Any]:
+        """
+        运行一组参数的回测（verbose=0，不输出任何信息）
+
+        Returns:
+            结果行：run_id、参数、result_info_dict 的各项（回撤持续天数直方图展开为多列），
+            回测失败时包含 error 列
+        """
+        row = {'run_id': run_id, **params}
+        try:
+            strategy = strategy_class(fund_list, start_date, end_date).set_params(**params)
+            strategy.verbose = 0
+            # 回测本身不输出，策略中自行打印的内容也不写到终端
+            with redirect_stdout(io.StringIO()):
+                strategy.run()
+            result = strategy.result_info_dict()
+        except Exception as e:
+            row['error'] = f"{type(e).__name__}: {e}"
+            return row
+        histogram = result.pop('drawdown_duration_histogram', None) or {}
+        row.update(result)
+        for label, count in histogram.items():
+            row[f'drawdown_duration_{label}'] = count
+        if strategy.log and strategy.log[-1].startswith('Error'):
+            row['error'] = strategy.log[-1]
+        return row
+
+    def _check_params(self, param_list: List[Dict[str, Any]]) -> None:
+        """参数名必须是策略已有的属性，避免拼写错误时静默使用默认值"""
+        names = {name for params in param_list for name in params}
+        if not names:
+            return
+        with redirect_stdout(io.StringIO()):
+            probe = self.strategy_class(self.fund_list, self.start_date, self.end_date)
+        unknown = sorted(name for name in names if not hasattr(probe, name))
+        if unknown:
+            raise ValueError(f"策略 {self.strategy_class.__name__} 没有参数: {', '.join(unknown)}")
+
+    def run(self, param_list: Iterable[Dict[str, Any]], max_workers: Optional[int] = None,
+            chunksize: int = 1, progress: Optional[Callable[[int, int], None]] = None) -> pd.DataFrame:
+        """
+        运行参数扫描
+
+        Args:
+            param_list: 参数字典列表，可由 grid() 或 sample() 生成
+            max_workers: 进程数，None为CPU核数，1为在当前进程中顺序运行
+            chunksize: 每次分发给工作进程的任务数
+            progress: 进度回调 progress(完成数, 总数)
+
+        Returns:
+            每组参数一行的 DataFrame，按 run_id 排序
+        """
+        param_list = [dict(params) for params in param_list]
+        self._check_params(param_list)
+        total = len(param_list)
+        tasks = list(enumerate(param_list))
+        context = (self.strategy_class, self.fund_list, self.start_date, self.end_date)
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        max_workers = max(1, min(max_workers, total))
+
+        rows = []
+        for row in parallel_map(context, _run_task, tasks, max_workers, chunksize):
+            rows.append(row)
+            if progress is not None:
+                progress(len(rows), total)
+
+        return pd.DataFrame(rows).sort_values('run_id').reset_index(drop=True) if rows else pd.DataFrame()
@@ -0,0 +1,201 @@
+"""
+目标权重向量化回测
+
+策略给出每日各资产（现金 + 基金）的目标权重，引擎按时间只遍历一次，
+对资产维度（以及多组参数维度）做NumPy运算，得到每日份额、市值、成交金额和权益。
+支持部分调仓：每次只调整目标市值与当前市值差值的 adjust_factor 倍。
+
+权重约定：
+    权重非负，按行自动归一化；全为NaN的行表示当天不调仓；
+    当天不能交易的基金（没有净值）保持原有市值，其余资产按可交易资产的权重重新归一化分配；
+    可交易资产的权重全为0时全部持有现金。
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+
+@dataclass
+class TargetWeightResult:
+    """
+    向量化回测结果，单组参数时形状为 (T, N)，多组参数时在最前面多一维 S
+    """
+    shares: np.ndarray         # 每日调仓后的份额
+    values: np.ndarray         # 每日调仓后的市值
+    traded_value: np.ndarray   # 每日成交金额，形状为 (..., T)
+
+    @property
+    def equity(self) -> np.ndarray:
+        """每日总价值，形状为 (..., T)"""
+        return self.values.sum(axis=-1)
+
+    @property
+    def cash(self) -> np.ndarray:
+        """每日现金，形状为 (..., T)"""
+        return self.values[..., 0]
+
+    @property
+    def turnover(self) -> np.ndarray:
+        """换手率：总成交金额 / 平均总价值"""
+        mean_equity = self.equity.mean(axis=-1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(mean_equity != 0, self.traded_value.sum(axis=-1) / mean_equity, np.nan)
+
+
+class VectorizedBacktest:
+    """目标权重向量化回测引擎"""
+
+    @staticmethod
+    def _tradable_mask(prices: np.ndarray, tradable: Optional[np.ndarray]) -> np.ndarray:
+        """可交易资产掩码，默认净值不为NaN的资产可交易，现金总是可交易"""
+        mask = ~np.isnan(prices) if tradable is None else np.array(tradable, dtype=bool)
+        if mask.shape != prices.shape:
+            raise ValueError(f"可交易掩码形状 {mask.shape} 与净值形状 {prices.shape} 不一致")
+        mask = mask & ~np.isnan(prices)
+        mask[..., 0] = True
+        return mask
+
+    @staticmethod
+    def _normalize(weights: np.ndarray, tradable: np.ndarray) -> np.ndarray:
+        """NaN记为0，只保留可交易资产的权重并按行归一化，全为0时全部持有现金"""
+        if np.any(weights < 0):
+            raise ValueError("目标权重不能为负")
+        weights = np.where(np.isnan(weights), 0.0, weights) * tradable
+        total = weights.sum(axis=-1, keepdims=True)
+        weights = np.divide(weights, total, out=np.zeros_like(weights), where=total > 0)
+        weights[..., 0] += total[..., 0] <= 0
+        return weights
+
+    @staticmethod
+    def _check_adjust(adjust_factor) -> np.ndarray:
+        adjust = np.asarray(adjust_factor, dtype=float)
+        if np.any(adjust < 0) or np.any(adjust > 1):
+            raise ValueError("调仓靠拢系数必须在 [0, 1] 之间")
+        return adjust
+
+    @staticmethod
+    def run_target_weights(prices, weights, adjust_factor=1.0, initial_shares=None,
+                           tradable=None) -> TargetWeightResult:
+        """
+        按目标权重运行回测
+
+        Args:
+            prices: 单位净值，形状为 (T, N)，第0列为现金（恒为1），没有数据为NaN；
+                    也可以每组一条净值路径 (S, T, N)（如模拟路径）
+            weights: 目标权重，形状为 (T, N)，或多组参数 (S, T, N)
+            adjust_factor: 调仓靠拢系数，标量或形状为 (S,)，1表示一次调到目标；
+                           逐日不同时形状为 (S, T) 或 (1, T)
+            initial_shares: 回测开始前的份额，形状为 (N,) 或 (S, N)，None时为1单位现金
+            tradable: 各资产当天是否可交易，形状与 prices 相同，None时净值不为NaN即可交易
+
+        Returns:
+            TargetWeightResult
+        """
+        prices = np.asarray(prices, dtype=float)
+        weights = np.asarray(weights, dtype=float)
+        if prices.ndim not in (2, 3):
+            raise ValueError(f"净值形状应为 (T, N) 或 (S, T, N)，实际为 {prices.shape}")
+        single = weights.ndim == 2 and prices.ndim == 2
+        if weights.ndim == 2:
+            weights = weights[None]
+        if prices.ndim == 3 and weights.ndim == 3 and weights.shape[0] == 1:
+            weights = np.broadcast_to(weights, (prices.shape[0],) + weights.shape[1:])
+        if (weights.ndim != 3 or weights.shape[1:] != prices.shape[-2:]
+                or (prices.ndim == 3 and weights.shape[0] != prices.shape[0])):
+            raise ValueError(f"权重形状 {weights.shape} 与净值形状 {prices.shape} 不一致")
+        n_sets, n_days, n_assets = weights.shape
+
+        adjust = VectorizedBacktest._check_adjust(adjust_factor)
+        adjust = np.broadcast_to(adjust if adjust.ndim == 2 else adjust.reshape(-1, 1), (n_sets, n_days))
+        if initial_shares is None:
+            initial_shares = np.eye(1, n_assets)[0]
+        shares = np.array(np.broadcast_to(np.asarray(initial_shares, dtype=float), (n_sets, n_assets)))
+
+        tradable = VectorizedBacktest._tradable_mask(prices, tradable)
+        price = np.nan_to_num(prices)
+        safe_price = np.where(price > 0, price, 1.0)
+        hold = np.isnan(weights).all(axis=-1)  # (S, T)
+        targets = VectorizedBacktest._normalize(weights, tradable.reshape((-1, n_days, n_assets)))
+
+        out_shares = np.empty((n_sets, n_days, n_assets))
+        out_values = np.empty((n_sets, n_days, n_assets))
+        traded = np.empty((n_sets, n_days))
+        for t in range(n_days):
+            # 共用净值时取 (N,)，每组一条路径时取 (S, N)
+            price_t, tradable_t = price[..., t, :], tradable[..., t, :]
+            v_pre = shares * price_t
+            # 不能交易的资产保持原有市值，只分配可交易部分
+            available = np.sum(v_pre * tradable_t, axis=-1, keepdims=True)
+            target = np.where(tradable_t, targets[:, t] * available, v_pre)
+            v_post = v_pre + adjust[:, t, None] * (target - v_pre)
+            v_post = np.where(hold[:, t, None], v_pre, v_post)
+            shares = np.where(tradable_t, v_post / safe_price[..., t, :], shares)
+            out_shares[:, t] = shares
+            out_values[:, t] = v_post
+            traded[:, t] = 0.5 * np.abs(v_post - v_pre).sum(axis=-1)
+
+        if single:
+            return TargetWeightResult(out_shares[0], out_values[0], traded[0])
+        return TargetWeightResult(out_shares, out_values, traded)
+
+    @staticmethod
+    def pair_trades(delta_value, prices, tol: float = 1e-12) -> List[list]:
+        """
+        把各资产的市值变化配对成回测引擎的交易格式 [卖出序号, 买入序号, 卖出份额, 成交金额]
+
+        卖出和买入都按金额从大到小贪心配对，最多 N-1 笔交易。
+
+        Args:
+            delta_value: 各资产调仓后减调仓前的市值，形状为 (N,)
+            prices: 当日单位净值，形状为 (N,)
+            tol: 忽略绝对值不超过 tol 的变化
+        """
+        sells = [[i, -float(d)] for i, d in enumerate(delta_value) if d < -tol]
+        buys = [[i, float(d)] for i, d in enumerate(delta_value) if d > tol]
+        sells.sort(key=lambda x: x[1], reverse=True)
+        buys.sort(key=lambda x: x[1], reverse=True)
+        trades = []
+        i = j = 0
+        while i < len(sells) and j < len(buys):
+            amount = min(sells[i][1], buys[j][1])
+            sell, buy = sells[i][0], buys[j][0]
+            trades.append([sell, buy, amount / float(prices[sell]), amount])
+            sells[i][1] -= amount
+            buys[j][1] -= amount
+            if sells[i][1] <= tol:
+                i += 1
+            if buys[j][1] <= tol:
+                j += 1
+        return trades
+
+    @staticmethod
+    def weights_to_trades(shares, prices, target, adjust_factor: float = 1.0, tradable=None) -> List[list]:
+        """
+        由当前份额和目标权重计算当天的交易列表（不含日期），与 run_target_weights 单日的调仓一致
+
+        Args:
+            shares: 当前份额，形状为 (N,)
+            prices: 当日单位净值，形状为 (N,)，没有数据为NaN或None
+            target: 目标权重，形状为 (N,)，全为NaN表示不调仓
+            adjust_factor: 调仓靠拢系数
+            tradable: 各资产当天是否可交易，形状为 (N,)，None时净值不为NaN即可交易
+
+        Returns:
+            [[卖出序号, 买入序号, 卖出份额, 成交金额], ...]
+        """
+        prices = np.array([np.nan if p is None else p for p in prices], dtype=float)
+        target = np.asarray(target, dtype=float)
+        if target.shape != prices.shape:
+            raise ValueError(f"权重形状 {target.shape} 与净值形状 {prices.shape} 不一致")
+        if np.isnan(target).all():
+            return []
+        adjust = float(VectorizedBacktest._check_adjust(adjust_factor))
+        tradable = VectorizedBacktest._tradable_mask(prices, tradable)
+        weights = VectorizedBacktest._normalize(target, tradable)
+        price = np.nan_to_num(prices)
+        v_pre = np.asarray(shares, dtype=float) * price
+        available = np.sum(v_pre * tradable)
+        delta = np.where(tradable, adjust * (weights * available - v_pre), 0.0)
+        return VectorizedBacktest.pair_trades(delta, price, tol=1e-12 * max(abs(available), 1.0))
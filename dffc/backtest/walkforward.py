@@ -0,0 +1,299 @@
+"""
+滚动前推（walk-forward）回测
+
+把回测区间划分为连续的样本外测试窗口，每个窗口之前的训练窗口上优化各基金的HoltWinters参数，
+再用优化得到的参数在测试窗口上回测，最后把各窗口的样本外权益曲线按复利拼接。
+
+重复计算都只做一次：
+    交易日历（净值对齐）只构建一次，所有窗口共用；
+    HoltWinters平滑和HDP是因果的（第t天的值只依赖t天及之前的数据），对完整净值序列计算一次
+    即可用于任意测试窗口，因此因子数组按（基金, 参数）缓存，参数相同的窗口直接复用；
+    各窗口的参数优化和回测分别在进程池中并行运行，基金数据由 fork 的子进程直接继承。
+"""
+
+import io
+import os
+from contextlib import redirect_stdout
+from copy import copy
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+import numpy as np
+import pandas as pd
+
+from ..analysis.indicators import HoltWintersIndicator
+from .calendar import TradingCalendar
+from .metrics import BacktestMetrics
+from .parallel import parallel_map
+
+
+def _optimize_task(walk, task):
+    """在工作进程中优化一个窗口、一个基金的参数"""
+    fold_index, fund_index = task
+    return walk.optimize(fold_index, fund_index)
+
+
+def _backtest_task(walk, fold_index):
+    """在工作进程中回测一个窗口"""
+    return walk.run_fold(fold_index)
+
+
+def _default_optimizer(values, begin, end):
+    from ..optimization.holtwinter_op import optimize_holtwinters_parameters
+    return optimize_holtwinters_parameters(values, begin, end, disp=False)
+
+
+@dataclass
+class WalkForwardFold:
+    """一个训练/测试窗口，日期均为交易日"""
+    index: int
+    train_start: datetime
+    train_end: datetime
+    test_start: datetime
+    test_end: datetime
+
+
+@dataclass
+class WalkForwardResult:
+    """滚动前推回测结果"""
+    folds: pd.DataFrame                                       # 每个窗口一行：日期、各基金参数和回测结果信息
+    fold_equity: List[pd.Series] = field(default_factory=list)  # 每个窗口的样本外权益曲线（从1开始）
+    equity: pd.Series = None                                  # 按复利拼接的样本外权益曲线
+    summary: Dict[str, Any] = field(default_factory=dict)     # 拼接曲线的回测结果信息
+
+
+class WalkForward:
+    """
+    滚动前推回测
+
+    用法:
+        wf = WalkForward(StrategyClass, fund_list, datetime(2021, 1, 1), datetime(2025, 1, 1),
+                         train_days=500, test_days=120)
+        result = wf.run()
+        result.equity.plot()
+    """
+
+    # 训练窗口内净值少于该个数的基金不优化，沿用基金原有的参数
+    MIN_TRAIN_POINTS = 60
+
+    def __init__(self, strategy_class: Type[Any], fund_list: List[Any], start_date: datetime, end_date: datetime,
+                 train_days: int = 500, test_days: int = 120, anchored: bool = False,
+                 strategy_params: Optional[Dict[str, Any]] = None,
+                 optimizer: Optional[Callable] = None, param_decimals: Optional[int] = None):
+        """
+        Args:
+            strategy_class: 策略类（BackTestFuncInfo 子类），构造参数为 (fund_list, start_date, end_date)
+            fund_list: 已加载净值数据的基金列表
+            start_date: 样本外区间开始日期（第一个测试窗口不早于此日期，且之前至少有 train_days 个交易日）
+            end_date: 样本外区间结束日期
+            train_days: 训练窗口的交易日数
+            test_days: 测试窗口的交易日数，各测试窗口首尾相接
+            anchored: True时训练窗口从第一个可用交易日开始逐步扩大
+            strategy_params: 每个窗口的策略实例都使用的属性，构造后用 BackTestFuncInfo.set_params 设置
+            optimizer: 参数优化函数 optimizer(values, begin, end) -> ([alpha, beta, gamma], season_length, rss)，
+                       values 为截至训练窗口结束的净值（按时间正序），None时使用 optimize_holtwinters_parameters；
+                       无法拟合时返回的参数为None，该窗口沿用基金的 factor_holtwinters_parameter
+            param_decimals: 优化得到的 alpha/beta/gamma 保留的小数位数，None时不取整；取整后相同参数的窗口复用因子
+        """
+        if not fund_list:
+            raise ValueError("滚动前推回测中没有基金")
+        if train_days < 1 or test_days < 1:
+            raise ValueError("训练窗口和测试窗口的交易日数必须大于0")
+        self.strategy_class = strategy_class
+        self.fund_list = list(fund_list)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.train_days = int(train_days)
+        self.test_days = int(test_days)
+        self.anchored = anchored
+        self.strategy_params = dict(strategy_params or {})
+        self.optimizer = _default_optimizer if optimizer is None else optimizer
+        self.param_decimals = param_decimals
+        self.calendar = TradingCalendar(self.fund_list)
+        self._factor_cache: Dict[Tuple, Dict[str, list]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._fold_rows = self._schedule()
+        self._fold_params: List[List[Dict[str, Any]]] = []
+        self._fold_funds: List[List[Any]] = []
+
+    def _schedule(self) -> List[Tuple[int, int, int]]:
+        """各窗口的 (训练开始行, 测试开始行, 测试结束行)，结束行不包含"""
+        rows = self.calendar.trading_rows(self.start_date, self.end_date)
+        folds = []
+        test_start = max(rows.start, self.train_days)
+        while test_start < rows.stop:
+            train_start = 0 if self.anchored else test_start - self.train_days
+            folds.append((train_start, test_start, min(test_start + self.test_days, rows.stop)))
+            test_start += self.test_days
+        return folds
+
+    @property
+    def folds(self) -> List[WalkForwardFold]:
+        """全部训练/测试窗口"""
+        dates = self.calendar.dates
+        return [WalkForwardFold(i, dates[train], dates[test - 1], dates[test], dates[stop - 1])
+                for i, (train, test, stop) in enumerate(self._fold_rows)]
+
+    def optimize(self, fold_index: int, fund_index: int) -> Dict[str, Any]:
+        """
+        在窗口的训练区间上优化一个基金的HoltWinters参数，只使用训练窗口结束前的净值
+
+        Returns:
+            factor_holtwinters_parameter 格式的参数字典
+        """
+        train_start, test_start, _ = self._fold_rows[fold_index]
+        fund = self.fund_list[fund_index]
+        has_data = self.calendar.has_data[:, fund_index]
+        n = len(fund._unit_value_ls)
+        # 训练窗口结束时基金按时间正序的净值个数，以及窗口内的净值个数
+        end = int(np.count_nonzero(has_data[:test_start]))
+        count = int(np.count_nonzero(has_data[train_start:test_start]))
+        if count < self.MIN_TRAIN_POINTS:
+            if not fund.factor_holtwinters_parameter:
+                raise ValueError(f"基金 {fund.code} 在第{fold_index}个训练窗口中净值不足，且没有默认参数")
+            return dict(fund.factor_holtwinters_parameter)
+        values = np.asarray(fund._unit_value_ls[n - end:], dtype=float)[::-1]
+        best_params, best_season, _ = self.optimizer(values, end - count, end)
+        if best_params is None:
+            # 训练窗口内没有任何季节长度能拟合（例如净值长期不变），沿用基金的默认参数
+            if not fund.factor_holtwinters_parameter:
+                raise ValueError(f"基金 {fund.code} 在第{fold_index}个训练窗口中无法优化参数，且没有默认参数")
+            return dict(fund.factor_holtwinters_parameter)
+        alpha, beta, gamma = (float(x) for x in best_params)
+        if self.param_decimals is not None:
+            alpha, beta, gamma = (round(x, self.param_decimals) for x in (alpha, beta, gamma))
+        return {'alpha': alpha, 'beta': beta, 'gamma': gamma, 'season_length': int(best_season)}
+
+    def factor_arrays(self, fund_index: int, params: Dict[str, Any]) -> Dict[str, list]:
+        """
+        基金在一组参数下的HoltWinters因子（最新在前），按（基金, 参数）缓存
+
+        因子是因果的，在完整净值序列上计算一次即可用于任意测试窗口。
+        """
+        key = (fund_index, params['alpha'], params['beta'], params['gamma'], int(params['season_length']))
+        if key in self._factor_cache:
+            self.cache_hits += 1
+            return self._factor_cache[key]
+        self.cache_misses += 1
+        fund = self.fund_list[fund_index]
+        chronological = np.asarray(fund._unit_value_ls, dtype=float)[::-1]
+        smoothed = HoltWintersIndicator.rolling_smooth(
+            chronological, params['alpha'], params['beta'], params['gamma'], int(params['season_length']))
+        delta = (chronological - smoothed)[::-1]
+        hdp, _ = HoltWintersIndicator.calculate_delta_percentage(delta.tolist())
+        arrays = {
+            'factor_holtwinters': smoothed[::-1].tolist(),
+            'factor_holtwinters_delta': delta.tolist(),
+            'factor_holtwinters_delta_percentage': hdp,
+        }
+        self._factor_cache[key] = arrays
+        return arrays
+
+    def fold_funds(self, params_list: List[Dict[str, Any]]) -> List[Any]:
+        """使用给定参数的基金列表：浅复制基金对象（共用净值数据），只替换参数和因子属性"""
+        funds = []
+        for j, (fund, params) in enumerate(zip(self.fund_list, params_list)):
+            fold_fund = copy(fund)
+            fold_fund.factor_holtwinters_parameter = dict(params)
+            for name, values in self.factor_arrays(j, params).items():
+                setattr(fold_fund, name, values)
+            # 增量计算的状态属于原参数，不能沿用
+            fold_fund.factor_holtwinters_state = None
+            fold_fund.factor_holtwinters_delta_sorted_head = []
+            funds.append(fold_fund)
+        return funds
+
+    def run_fold(self, fold_index: int) -> Tuple[Dict[str, Any], pd.DataFrame]:
+        """
+        回测一个测试窗口（verbose=0，不输出任何信息）
+
+        Returns:
+            (结果行, 每日 equity/cash 的 DataFrame)，回测失败时结果行包含 error 列
+        """
+        fold = self.folds[fold_index]
+        row: Dict[str, Any] = {'fold': fold_index}
+        curve = pd.DataFrame({'equity': [], 'cash': []})
+        try:
+            strategy = self.strategy_class(self._fold_funds[fold_index], fold.test_start, fold.test_end)
+            strategy.set_params(**self.strategy_params)
+            strategy.verbose = 0
+            with redirect_stdout(io.StringIO()):
+                strategy.run()
+            result = strategy.result_info_dict()
+        except Exception as e:
+            row['error'] = f"{type(e).__name__}: {e}"
+            return row, curve
+        result.pop('drawdown_duration_histogram', None)
+        row.update(result)
+        if strategy.log and strategy.log[-1].startswith('Error'):
+            row['error'] = strategy.log[-1]
+        ledger = strategy.ledger
+        curve = pd.DataFrame({'equity': ledger.total_values(), 'cash': ledger.values[:, 0]},
+                             index=pd.DatetimeIndex(list(ledger.dates)))
+        return row, curve
+
+    def run(self, max_workers: Optional[int] = None) -> WalkForwardResult:
+        """
+        运行全部窗口：并行优化参数，按（基金, 参数）计算因子，并行回测并拼接样本外权益曲线
+
+        Args:
+            max_workers: 进程数，None为CPU核数，1为在当前进程中顺序运行
+
+        Returns:
+            WalkForwardResult
+        """
+        if not self._fold_rows:
+            raise ValueError("回测区间内没有可用的滚动窗口，请检查日期和训练窗口长度")
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        n_folds, n_funds = len(self._fold_rows), len(self.fund_list)
+
+        # 1. 各窗口、各基金的参数优化相互独立
+        tasks = [(i, j) for i in range(n_folds) for j in range(n_funds)]
+        params = list(parallel_map(self, _optimize_task, tasks, max_workers))
+        self._fold_params = [params[i * n_funds:(i + 1) * n_funds] for i in range(n_folds)]
+        # 2. 因子在主进程中按（基金, 参数）计算一次，回测进程直接继承
+        self._fold_funds = [self.fold_funds(fold_params) for fold_params in self._fold_params]
+        # 3. 各窗口的回测相互独立
+        outputs = list(parallel_map(self, _backtest_task, list(range(n_folds)), max_workers))
+        return self._collect(outputs)
+
+    def _collect(self, outputs: List[Tuple[Dict[str, Any], pd.DataFrame]]) -> WalkForwardResult:
+        """汇总各窗口的结果并按复利拼接样本外权益曲线"""
+        rows, fold_equity = [], []
+        stitched, stitched_cash = [], []
+        scale = 1.0
+        for fold, (row, curve) in zip(self.folds, outputs):
+            info = {
+                'fold': fold.index,
+                'train_start': fold.train_start.strftime('%Y-%m-%d'),
+                'train_end': fold.train_end.strftime('%Y-%m-%d'),
+                'test_start': fold.test_start.strftime('%Y-%m-%d'),
+                'test_end': fold.test_end.strftime('%Y-%m-%d'),
+            }
+            for j, params in enumerate(self._fold_params[fold.index]):
+                for name, value in params.items():
+                    info[f'{name}_{j}'] = value
+            row.pop('fold', None)
+            rows.append({**info, **row})
+
+            initial = row.get('initial_value') or 1.0
+            equity = curve['equity'] / initial
+            fold_equity.append(equity)
+            if len(equity):
+                stitched.append(equity * scale)
+                stitched_cash.append(curve['cash'] / initial * scale)
+                scale *= float(equity.iloc[-1])
+
+        equity = pd.concat(stitched) if stitched else pd.Series(dtype=float)
+        summary = {}
+        if len(equity):
+            cash = pd.concat(stitched_cash)
+            summary = BacktestMetrics.compute(
+                list(equity.index.to_pydatetime()), equity.to_numpy(), cash.to_numpy(), initial_value=1.0,
+                start_date=self.folds[0].test_start, end_date=self.folds[-1].test_end,
+                trade_count=int(sum(row.get('trade_count', 0) for row in rows)))
+            summary.pop('drawdown_duration_histogram', None)
+        return WalkForwardResult(pd.DataFrame(rows), fold_equity, equity, summary)
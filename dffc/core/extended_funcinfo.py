@@ -6,6 +6,8 @@ import json
 import os
 from datetime import datetime
 from ..data_provider.stock_net_value_crawler import StockNetValueCrawler
+from ..analysis.indicators import TechnicalIndicators, HoltWintersIndicator, HoltWintersResult, HoltWintersState
+from .factor_cache import FactorCache
 import matplotlib.pyplot as plt
 
 class ExtendedFuncInfo(FuncInfo):
@@ -13,9 +15,11 @@ class ExtendedFuncInfo(FuncInfo):
     扩展FuncInfo类，新增方法用于处理单位净值数据，
     例如计算HoltWinters平滑、差分以及概率密度分布。
     """
-    def __init__(self, estimate_info = {'code': '', 'type': ''}, *args, **kwargs, ):
+
+    def __init__(self, estimate_info = {'code': '', 'type': ''}, *args, factor_cache=None, **kwargs, ):
         super().__init__(*args, **kwargs)
         self.info_dict = {}          # 新增属性：存储信息的字典
+        self.factor_cache = factor_cache  # 因子磁盘缓存（FactorCache），为None时不使用缓存
         # 从某个ETF抓取当日估值信息，调整爬虫数据的字符串值，变为浮点数和Datetime对象
         self.estimate_info = copy.deepcopy(estimate_info)  # 新增属性：存储估计信息
         self.estimate_able = False     # 判断估计值是否可用
@@ -24,9 +28,11 @@ class ExtendedFuncInfo(FuncInfo):
         self.estimate_value = None  # 新增属性：存储估计值
         # 使用的因子参数
         self.factor_holtwinters_parameter=None
+        self.factor_holtwinters_state = None  # HoltWinters递推状态，用于新增数据时的增量计算
         self.factor_holtwinters=[]
         self.factor_holtwinters_delta=[]
         self.factor_holtwinters_delta_percentage = []
+        self.factor_holtwinters_delta_sorted_head = []  # 已排序的最近 (n-1)//2 个差分，用于估计值百分比的快速计算
         self.factor_holtwinters_estimate = None
         self.factor_holtwinters_estimate_delta = None
         self.factor_holtwinters_estimate_delta_percentage = None
@@ -144,6 +150,56 @@ class ExtendedFuncInfo(FuncInfo):
         df.to_csv(csv_file)
         print(f"数据已保存到 {csv_file}")
 
+    # 保存HoltWinters递推状态
+    def save_holtwinters_state(self, state_file):
+        """
+        将HoltWinters递推状态和已计算的平滑结果保存到JSON文件，
+        一般与基金CSV数据放在一起，例如 ./csv_data/{code}_hwstate.json
+        
+        Args:
+            state_file (str): 状态文件路径
+        """
+        if self.factor_holtwinters_state is None:
+            raise ValueError("factor_holtwinters_state 未计算，请先调用 factor_cal_holtwinters()")
+        state = self.factor_holtwinters_state
+        data = {
+            'code': self.code,
+            'last_date': self._date_ls[len(self._date_ls) - state.count].strftime('%Y-%m-%d'),
+            'state': state.to_dict(),
+            'holtwinters': self.factor_holtwinters[::-1],  # 按时间正序保存
+        }
+        with open(state_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        print(f"HoltWinters状态已保存到 {state_file}")
+
+    # 加载HoltWinters递推状态
+    def load_holtwinters_state(self, state_file):
+        """
+        从JSON文件加载HoltWinters递推状态，需在加载基金数据之后调用。
+        若状态与当前数据不一致（日期或数值对不上），则忽略该状态。
+        参数是否一致在 factor_cal_holtwinters 中检查。
+        
+        Args:
+            state_file (str): 状态文件路径
+            
+        Returns:
+            bool: 是否成功加载
+        """
+        with open(state_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        state = HoltWintersState.from_dict(data['state'])
+        n = len(self._date_ls)
+        if not 0 < state.count <= n or len(data['holtwinters']) != state.count:
+            print(f"警告：HoltWinters状态与基金 {self.code} 的数据长度不一致，忽略该状态")
+            return False
+        idx = n - state.count
+        if self._date_ls[idx].strftime('%Y-%m-%d') != data['last_date'] or self._unit_value_ls[idx] != state.last_value:
+            print(f"警告：HoltWinters状态与基金 {self.code} 的数据不一致，忽略该状态")
+            return False
+        self.factor_holtwinters_state = state
+        self.factor_holtwinters = data['holtwinters'][::-1]
+        return True
+
     # 通过爬虫获取下一日估计值
     def load_estimate_net(self):
         # 检查 estimate_info 是否为 None, 或空值{'code': '', 'type': ''}
@@ -187,9 +243,11 @@ class ExtendedFuncInfo(FuncInfo):
     def clear_data_extended(self):
         self.clear_data()  # 清除FuncInfo类中的数据
         self.info_dict = {}  # 清除info_dict字典
+        self.factor_holtwinters_state = None  # 清除HoltWinters递推状态
         self.factor_holtwinters = []  # 清除HoltWinters平滑结果
         self.factor_holtwinters_delta = []  # 清除HoltWinters差分结果
         self.factor_holtwinters_delta_percentage = []  # 清除HoltWinters
+        self.factor_holtwinters_delta_sorted_head = []  # 清除已排序的差分窗口
         self.factor_holtwinters_estimate = None  # 清除HoltWinters估计结果
         self.factor_holtwinters_estimate_delta = None  # 清除HoltWinters估计差分结果
         self.factor_holtwinters_estimate_delta_percentage = None  # 清除HoltWinters估计百分比变化
@@ -233,23 +291,42 @@ class ExtendedFuncInfo(FuncInfo):
         Returns:
             list: 与 self._unit_value_ls 相同长度的数组，包含CMA结果
         """
-        data = copy.deepcopy(self._unit_value_ls)
-        n = len(data)
-        result = [None] * n
-        # 计算窗口的半径（前后各取多少个点）
-        half_window = windowsize // 2
-        # 计算中心移动平均
-        for i in range(half_window, n - half_window):
-            # 对于奇数窗口大小，窗口完全对称
-            # 对于偶数窗口大小，左边少取一个点
-            if windowsize % 2 == 1:
-                # 奇数窗口：左右各取 half_window 个点
-                window_data = data[i - half_window:i + half_window + 1]
-            else:
-                # 偶数窗口：左边取 half_window-1 个点，右边取 half_window 个点
-                window_data = data[i - half_window + 1:i + half_window + 1]
-            result[i] = sum(window_data) / len(window_data)
-        return result
+        result = TechnicalIndicators.centered_rolling_mean(self._unit_value_ls, windowsize)
+        # 保持原有约定：前 windowsize//2 个点不计算（偶数窗口时第 half-1 个点虽然窗口完整也置为None）
+        result[:windowsize // 2] = np.nan
+        return [None if np.isnan(v) else v for v in result.tolist()]
+
+    @staticmethod
+    def batch_cal_CMA30(funds):
+        """
+        一次向量化计算多个基金的 factor_CMA30 和 factor_fluctuationrateCMA30。
+        各基金数据按最新日期对齐到同一矩阵的行（长度不足的部分填充NaN），
+        结果与逐个调用 factor_cal_CMA(30)、factor_cal_fluctuationrateCMA30 一致；
+        没有有效CMA30数据的基金，其波动率比率为None。
+        
+        Args:
+            funds (list): ExtendedFuncInfo 列表
+        """
+        if not funds:
+            return
+        windowsize = 30
+        max_len = max(len(fund._unit_value_ls) for fund in funds)
+        values = np.full((max_len, len(funds)), np.nan)
+        for j, fund in enumerate(funds):
+            values[:len(fund._unit_value_ls), j] = fund._unit_value_ls
+        cma = TechnicalIndicators.centered_rolling_mean(values, windowsize)
+        cma[:windowsize // 2] = np.nan
+        ratios = TechnicalIndicators.volatility_ratio_matrix(values, cma)
+        for j, fund in enumerate(funds):
+            column = cma[:len(fund._unit_value_ls), j].tolist()
+            fund.factor_CMA30 = [None if np.isnan(v) else v for v in column]
+            fund.factor_fluctuationrateCMA30 = None if np.isnan(ratios[j]) else float(ratios[j])
+
+    def _factor_cache_key(self):
+        """当前数据和HoltWinters参数对应的因子缓存键，未启用缓存时为None"""
+        if self.factor_cache is None or not self.factor_holtwinters_parameter or not self._unit_value_ls:
+            return None
+        return FactorCache.make_key(self.code, self._unit_value_ls, self.factor_holtwinters_parameter)
 
     def factor_cal_holtwinters(self) -> None:
         """
@@ -265,57 +342,54 @@ class ExtendedFuncInfo(FuncInfo):
         gamma = self.factor_holtwinters_parameter['gamma']
         season_length = self.factor_holtwinters_parameter['season_length']
         
-        # 准备计算用的数组
-        if self.estimate_able and self.estimate_value is not None:
-            # 在最前面插入估计值
-            temp_unit_value_ls = copy.deepcopy([self.estimate_value] + self._unit_value_ls)
-        else:
-            temp_unit_value_ls = copy.deepcopy(self._unit_value_ls)
-        
-        # 将数组转换为 numpy 数组并反转
-        arr = np.array(temp_unit_value_ls, dtype=float)[::-1]
-        n = len(arr)
-        smoothed = np.zeros(n)
+        has_estimate = self.estimate_able and self.estimate_value is not None
+        if not self._unit_value_ls:
+            self.factor_holtwinters_state = None
+            self.factor_holtwinters = []
+            self.factor_holtwinters_estimate = None
+            self.factor_holtwinters_delta = []
+            self.factor_holtwinters_delta_sorted_head = []
+            return
         
-        for t in range(n):
-            prefix = arr[:t+1]
-            m = season_length
-            if len(prefix) < m:
-                level = prefix[0]
-                for i in range(1, len(prefix)):
-                    level = alpha * prefix[i] + (1 - alpha) * level
-                smoothed[t] = level
-            else:
-                level = np.mean(prefix[:m])
-                if len(prefix)==m:
-                    trend = prefix[m-1] - prefix[m-2] if m >= 2 else 0
-                else:
-                    trend = (np.mean(prefix[m:]) - np.mean(prefix[:m])) / m
-                seasonal = [prefix[i] - level for i in range(m)]
-                for i in range(m, len(prefix)):
-                    last_level = level
-                    last_trend = trend
-                    seasonal_index = (i - m) % m
-                    level = alpha * (prefix[i] - seasonal[seasonal_index]) + (1 - alpha) * (last_level + last_trend)
-                    trend = beta * (level - last_level) + (1 - beta) * last_trend
-                    seasonal[seasonal_index] = gamma * (prefix[i] - level) + (1 - gamma) * seasonal[seasonal_index]
-                fitted = level + trend + seasonal[(len(prefix)-m) % m]
-                smoothed[t] = fitted
+        # 数据和参数都未变化时直接读取因子缓存
+        cache_key = self._factor_cache_key()
+        cached = self.factor_cache.get(cache_key) if cache_key is not None else None
+        if cached is not None and 'holtwinters' in cached and 'holtwinters_state' in cached:
+            self.factor_holtwinters_state = HoltWintersState.from_dict(json.loads(str(cached['holtwinters_state'])))
+            self.factor_holtwinters = cached['holtwinters'].tolist()
+            estimate_value = None
+            if has_estimate:
+                estimate_value = self.factor_holtwinters_state.copy().update(self.estimate_value)[0]
+        else:
+            # 参数未变且只是新增了数据时，从保存的递推状态继续计算，不重算历史
+            previous = None
+            if self.factor_holtwinters_state is not None:
+                previous = HoltWintersResult(smoothed_values=self.factor_holtwinters, state=self.factor_holtwinters_state)
+            result = HoltWintersIndicator.calculate(
+                self._unit_value_ls, alpha, beta, gamma, season_length,
+                estimate_value=self.estimate_value if has_estimate else None,
+                previous=previous
+            )
+            self.factor_holtwinters_state = result.state
+            self.factor_holtwinters = result.smoothed_values
+            estimate_value = result.estimate_value
+            if cache_key is not None:
+                self.factor_cache.set(cache_key, {
+                    'holtwinters': np.array(self.factor_holtwinters, dtype=float),
+                    'holtwinters_state': np.array(json.dumps(result.state.to_dict())),
+                })
         
-        # 根据是否有估计值来分配结果，注意要反转回来
-        if self.estimate_able and self.estimate_value is not None:
-            # 有估计值时，第一个元素是当前日的估计结果（反转后）
-            smoothed_reversed = smoothed[::-1]
-            self.factor_holtwinters_estimate = smoothed_reversed[0]
-            self.factor_holtwinters = copy.deepcopy(smoothed_reversed[1:].tolist())
+        if has_estimate:
+            # 估计值在历史状态上推进一步得到
+            self.factor_holtwinters_estimate = estimate_value
             self.factor_holtwinters_estimate_delta = self.factor_holtwinters_estimate - self.estimate_value
         else:
-            # 没有估计值时，所有结果都存储在 factor_holtwinters 中，需要反转
             self.factor_holtwinters_estimate = None
-            self.factor_holtwinters = copy.deepcopy(smoothed[::-1].tolist())
         
         # 计算差分
         self.factor_holtwinters_delta = copy.deepcopy((np.array(self._unit_value_ls) - np.array(self.factor_holtwinters)).tolist())
+        # 差分已变化，排序窗口需在 factor_cal_holtwinters_delta_percentage 中重建
+        self.factor_holtwinters_delta_sorted_head = []
         
  
     def factor_cal_fluctuationrateCMA30(self):
@@ -328,22 +402,11 @@ class ExtendedFuncInfo(FuncInfo):
         if not hasattr(self, 'factor_CMA30') or not self.factor_CMA30:
             raise ValueError("factor_CMA30 未计算，请先调用 factor_cal_CMA(30)")
         
-        # 转换为numpy数组进行计算
-        unit_values = np.array(copy.deepcopy(self._unit_value_ls))
-        cma30_values = np.array(copy.deepcopy(self.factor_CMA30))
-        # 计算差值，只考虑非None的部分
-        diff_values = []
-        recent_cma30 = None
-        for i in range(len(unit_values)):
-            if self.factor_CMA30[i] is not None:
-                diff_values.append(unit_values[i] - cma30_values[i])
-                recent_cma30 = cma30_values[i]  # 更新最近的CMA30值
-        if not diff_values or recent_cma30 is None:
+        cma30_values = np.array([np.nan if v is None else v for v in self.factor_CMA30], dtype=float)
+        if np.isnan(cma30_values).all():
             raise ValueError("没有有效的CMA30数据用于计算")
-        # 计算标准差
-        std_diff = np.std(diff_values)
-        # 计算波动率比率
-        fluctuation_rate = std_diff / recent_cma30
+        # 计算差值的标准差，只考虑非None的部分，再除以CMA30的最近值
+        fluctuation_rate = float(TechnicalIndicators.volatility_ratio_matrix(self._unit_value_ls, cma30_values))
         return fluctuation_rate
 
     def factor_cal_holtwinters_delta_percentage(self):
@@ -354,26 +417,78 @@ class ExtendedFuncInfo(FuncInfo):
         if not self.factor_holtwinters_delta:
             raise ValueError("factor_holtwinters_delta 未计算，请先调用 factor_cal_holtwinters()")
         
-        # 清空之前的结果，避免累积
-        self.factor_holtwinters_delta_percentage = []
-        
-        for i in range(len(self.factor_holtwinters_delta)):
-            if i > len(self.factor_holtwinters_delta) - 3:
-                delta_percentage_i = 0
-            else:
-                len_i = (len(self.factor_holtwinters_delta)-i)//2
-                sublist = copy.deepcopy(self.factor_holtwinters_delta[i+1:i+1+len_i])
-                delta_percentage_i = (float(len([x for x in sublist if x < self.factor_holtwinters_delta[i]]))/float(len(sublist)))*2 -1
-            self.factor_holtwinters_delta_percentage.append(delta_percentage_i)
         # 处理最后一个estimate点
+        estimate_delta = None
         if self.estimate_able and self.estimate_value is not None:
-            # 如果有估计值，最后一个点的百分比变化为0
             self.factor_holtwinters_estimate_delta = self.estimate_value - self.factor_holtwinters_estimate
-            lendata = (len(self.factor_holtwinters_delta)-1)//2
-            sublist = copy.deepcopy(self.factor_holtwinters_delta[0:lendata])
-            delta_percentage= (float(len([x for x in sublist if x < self.factor_holtwinters_estimate_delta])) / float(len(sublist))) * 2 - 1
-            self.factor_holtwinters_estimate_delta_percentage = delta_percentage
-        return copy.deepcopy(self.factor_holtwinters_delta_percentage)
+            estimate_delta = self.factor_holtwinters_estimate_delta
+        
+        # 保存排序后的比较窗口，盘中刷新估计值时只需二分查找
+        lendata = (len(self.factor_holtwinters_delta) - 1) // 2
+        self.factor_holtwinters_delta_sorted_head = sorted(self.factor_holtwinters_delta[0:lendata])
+        
+        # 数据和参数都未变化、且缓存的HDP由同一个差分序列计算得到时直接读取因子缓存
+        cache_key = self._factor_cache_key()
+        cached = self.factor_cache.get(cache_key) if cache_key is not None else None
+        delta_digest = FactorCache.digest(self.factor_holtwinters_delta) if cache_key is not None else None
+        if (cached is not None and 'holtwinters_delta_percentage' in cached
+                and str(cached.get('holtwinters_delta_digest')) == delta_digest):
+            self.factor_holtwinters_delta_percentage = cached['holtwinters_delta_percentage'].tolist()
+            if estimate_delta is not None:
+                self.factor_holtwinters_estimate_delta_percentage = HoltWintersIndicator.estimate_delta_percentage(
+                    self.factor_holtwinters_delta_sorted_head, estimate_delta)
+            return list(self.factor_holtwinters_delta_percentage)
+        
+        # 基于树状数组的秩统计，O(n log n)，结果与逐日比较一致
+        delta_percentage, estimate_delta_percentage = HoltWintersIndicator.calculate_delta_percentage(
+            self.factor_holtwinters_delta, estimate_delta)
+        self.factor_holtwinters_delta_percentage = delta_percentage
+        if estimate_delta is not None:
+            self.factor_holtwinters_estimate_delta_percentage = estimate_delta_percentage
+        if cache_key is not None:
+            entry = cached if cached is not None else {}
+            entry['holtwinters_delta_percentage'] = np.array(delta_percentage, dtype=float)
+            entry['holtwinters_delta_digest'] = np.array(delta_digest)
+            self.factor_cache.set(cache_key, entry)
+        return list(self.factor_holtwinters_delta_percentage)
+
+    def factor_cal_holtwinters_estimate(self):
+        """
+        盘中快速刷新估计值相关因子。
+        在已保存的HoltWinters递推状态上推进一步得到 factor_holtwinters_estimate，
+        再在已排序的差分窗口中二分查找得到 factor_holtwinters_estimate_delta_percentage，
+        不重算历史平滑序列和HDP。结果与依次调用 factor_cal_holtwinters、
+        factor_cal_holtwinters_delta_percentage 一致。
+        若状态或排序窗口不可用（参数变化、数据已更新等），则退回完整计算。
+        
+        Returns:
+            float or None: 估计值差分的百分比，没有估计值时为None
+        """
+        if not self.estimate_able or self.estimate_value is None:
+            self.factor_holtwinters_estimate = None
+            return None
+        if not self.factor_holtwinters_parameter:
+            raise ValueError("factor_holtwinters_parameter 未设置")
+        
+        state = self.factor_holtwinters_state
+        params = self.factor_holtwinters_parameter
+        lendata = (len(self.factor_holtwinters_delta) - 1) // 2
+        fast_able = (state is not None
+                     and state.matches(params['alpha'], params['beta'], params['gamma'], params['season_length'])
+                     and state.count == len(self._unit_value_ls)
+                     and state.last_value == self._unit_value_ls[0]
+                     and len(self.factor_holtwinters_delta) == state.count
+                     and len(self.factor_holtwinters_delta_sorted_head) == lendata)
+        if not fast_able:
+            self.factor_cal_holtwinters()
+            self.factor_cal_holtwinters_delta_percentage()
+            return self.factor_holtwinters_estimate_delta_percentage
+        
+        self.factor_holtwinters_estimate = state.copy().update(self.estimate_value)[0]
+        self.factor_holtwinters_estimate_delta = self.estimate_value - self.factor_holtwinters_estimate
+        self.factor_holtwinters_estimate_delta_percentage = HoltWintersIndicator.estimate_delta_percentage(
+            self.factor_holtwinters_delta_sorted_head, self.factor_holtwinters_estimate_delta)
+        return self.factor_holtwinters_estimate_delta_percentage
     
     def plot_fund(self):
         """
@@ -413,12 +528,13 @@ class ExtendedFuncInfo(FuncInfo):
         plt.show()
     
     @staticmethod
-    def create_fundlist_config(config_file_path, csv_data_dir=None):
+    def create_fundlist_config(config_file_path, csv_data_dir=None, factor_cache=None):
         """
         从配置文件创建ExtendedFuncInfo实例列表
         Args:
             config_file_path (str): 配置文件的路径，支持相对路径和绝对路径
             csv_data_dir (str, optional): CSV数据文件的目录路径。如果提供此参数，将自动加载对应的CSV数据；如果为None则不加载数据
+            factor_cache (FactorCache, optional): 各基金实例使用的因子磁盘缓存，为None时不使用缓存
         Returns:
             list: ExtendedFuncInfo实例的列表
         """
@@ -456,7 +572,8 @@ class ExtendedFuncInfo(FuncInfo):
                         estimate_info=estimate_info,
                         code=fund_code,
                         name=fund_name,
-                        fund_type=fund_type
+                        fund_type=fund_type,
+                        factor_cache=factor_cache
                     )
                     
                     # 设置HoltWinters参数
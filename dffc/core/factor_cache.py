@@ -0,0 +1,156 @@
+"""
+因子磁盘缓存
+
+以 基金代码 + 净值数组哈希 + HoltWinters参数 + 代码版本 为键，
+把计算好的因子数组以 .npz 二进制格式保存到磁盘。数据和参数都未变化时，
+ExtendedFuncInfo 的因子方法直接读取缓存而不重新计算。
+"""
+
+import os
+import glob
+import json
+import time
+import hashlib
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .. import __version__
+from ..data_provider.base import DataCache
+
+# 因子算法版本，算法或缓存内容变化时修改，使旧缓存全部失效
+FACTOR_CACHE_VERSION = '2'
+
+
+class FactorCache(DataCache):
+    """
+    基于 .npz 文件的因子缓存
+
+    每个键对应缓存目录下的一个文件，值为 {名称: 数组} 字典。
+    读取时刷新文件的修改时间，缓存总大小超过上限时按最久未使用的顺序淘汰。
+    """
+
+    def __init__(self, cache_dir: str = './cache/factors', max_size_mb: float = 200):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_size_mb: 缓存总大小上限（MB）
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(code: str, values, params: Optional[Dict[str, Any]],
+                 version: str = f"{__version__}-{FACTOR_CACHE_VERSION}") -> str:
+        """
+        生成缓存键
+
+        Args:
+            code: 基金代码
+            values: 净值数组
+            params: HoltWinters参数字典
+            version: 代码版本
+
+        Returns:
+            形如 {code}_{摘要} 的键，可直接用作文件名
+        """
+        digest = hashlib.sha1()
+        digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+        digest.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+        digest.update(version.encode('utf-8'))
+        return f"{code}_{digest.hexdigest()[:20]}"
+
+    @staticmethod
+    def digest(values) -> str:
+        """浮点数组的摘要（逐字节哈希），用于校验缓存内容对应的输入数据"""
+        return hashlib.sha1(np.ascontiguousarray(values, dtype=np.float64).tobytes()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """读取缓存，不存在、已过期或文件损坏时返回None"""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                value = {name: data[name] for name in data.files}
+        except Exception as e:
+            print(f"警告：读取因子缓存 {path} 失败: {str(e)}")
+            self.delete(key)
+            return None
+        expires_at = value.pop('_expires_at', None)
+        if expires_at is not None and time.time() > float(expires_at):
+            self.delete(key)
+            return None
+        # 刷新修改时间，作为最近使用时间
+        os.utime(path, None)
+        return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: {名称: 数组} 字典
+            ttl: 有效期（秒），None表示不过期
+        """
+        arrays = {name: np.asarray(array) for name, array in value.items()}
+        if ttl is not None:
+            arrays['_expires_at'] = np.array(time.time() + ttl)
+        path = self._path(key)
+        # 先写临时文件再替换，避免并发读取到写了一半的文件
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def delete(self, key: str) -> None:
+        """删除一个缓存项"""
+        path = self._path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        for path in glob.glob(os.path.join(self.cache_dir, '*.npz')):
+            os.remove(path)
+
+    def invalidate(self, code: Optional[str] = None) -> int:
+        """
+        使缓存失效
+
+        Args:
+            code: 基金代码，None表示全部基金
+
+        Returns:
+            删除的缓存项个数
+        """
+        pattern = f"{code}_*.npz" if code is not None else '*.npz'
+        paths = glob.glob(os.path.join(self.cache_dir, pattern))
+        for path in paths:
+            os.remove(path)
+        return len(paths)
+
+    def _evict(self) -> None:
+        """缓存总大小超过上限时，删除最久未使用的缓存项"""
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, '*.npz')):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
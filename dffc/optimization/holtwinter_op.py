@@ -7,11 +7,19 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from ..core.fund_info import FuncInfo
+from ..analysis.indicators import TechnicalIndicators, HoltWintersIndicator
 from concurrent.futures import ProcessPoolExecutor, as_completed  # 新增导入
 
 # 添加均线窗口大小设置
 MOVING_AVERAGE_WINDOW = 30
 
+# 粗网格搜索的候选参数，用于为L-BFGS-B选择初始点
+COARSE_GRID_ALPHA = [0.01, 0.05, 0.1, 0.2, 0.35, 0.5]
+COARSE_GRID_BETA = [0.0001, 0.001, 0.005, 0.01, 0.05, 0.2]
+COARSE_GRID_GAMMA = [0.01, 0.05, 0.1, 0.2, 0.5, 1.0]
+# 有限差分梯度步长
+FD_STEP = 1e-8
+
 # %%
 # 新增函数：导入CSV数据，返回单位净值列的numpy数组
 def get_unit_nav_numpy(path):
@@ -34,22 +42,7 @@ def sliding_average(arr, window):
       arr: numpy数组，支持一维或多维（默认沿 axis=0）
       window: 整数，滑动窗口大小
     """
-    arr = np.asarray(arr, dtype=float)
-    n = arr.shape[0]
-    half = window // 2
-    result = np.empty_like(arr, dtype=float)
-    
-    if arr.ndim == 1:
-        for i in range(n):
-            start = max(0, i - half)
-            end = min(n, i + half + 1)
-            result[i] = arr[start:end].mean()
-    else:
-        for i in range(n):
-            start = max(0, i - half)
-            end = min(n, i + half + 1)
-            result[i] = arr[start:end].mean(axis=0)
-    return result
+    return TechnicalIndicators.centered_rolling_mean(arr, window, edge='shrink')
 
 
 def holtwinters_rolling(arr, alpha, beta, gamma, season_length):
@@ -65,40 +58,45 @@ def holtwinters_rolling(arr, alpha, beta, gamma, season_length):
     返回:
       与arr形状相同的平滑结果数组
     """
-    arr = np.asarray(arr, dtype=float)
-    n = len(arr)
-    smoothed = np.zeros(n)
+    return HoltWintersIndicator.rolling_smooth(arr, alpha, beta, gamma, season_length)
+
+
+def holtwinters_rolling_batch(arr, params, season_length):
+    """
+    对同一数组批量计算多组参数的Holt-Winters滚动平滑。
+    
+    参数:
+      arr: 1维numpy数组，或形状为 (S, n) 的多条序列
+      params: 形状为 (P, 3) 的 (alpha, beta, gamma) 参数组
+      season_length: 季节周期长度（整数）
+      
+    返回:
+      形状为 (max(S, P), n) 的平滑结果矩阵
+    """
+    return HoltWintersIndicator.rolling_smooth_batch(arr, params, season_length)
+
+
+def batch_RSS(original_data, fluc_data, params, season_length, begindate, enddate):
+    """
+    批量计算多组参数对应的残差平方和（已按最优缩放因子缩放）。
     
-    for t in range(n):
-        prefix = arr[:t+1]
-        m = season_length
-        # 如果数据不足一个周期，采用简单指数平滑
-        if len(prefix) < m:
-            level = prefix[0]
-            for i in range(1, len(prefix)):
-                level = alpha * prefix[i] + (1 - alpha) * level
-            smoothed[t] = level
-        else:
-            # 初始化：使用前m个数据计算初始水平与季节效应
-            level = np.mean(prefix[:m])
-            # 当只有一个周期时，用相邻差值近似趋势
-            if len(prefix) == m:
-                trend = prefix[m-1] - prefix[m-2] if m >=2 else 0
-            else:
-                trend = (np.mean(prefix[m:]) - np.mean(prefix[:m])) / m
-            seasonal = [prefix[i] - level for i in range(m)]
-            # 递推更新：从第m个点开始
-            for i in range(m, len(prefix)):
-                last_level = level
-                last_trend = trend
-                seasonal_index = (i - m) % m
-                level = alpha * (prefix[i] - seasonal[seasonal_index]) + (1 - alpha) * (last_level + last_trend)
-                trend = beta * (level - last_level) + (1 - beta) * last_trend
-                seasonal[seasonal_index] = gamma * (prefix[i] - level) + (1 - gamma) * seasonal[seasonal_index]
-            # 计算最后一个点的平滑值: 预测值 = level + trend + 季节项
-            fitted = level + trend + seasonal[(len(prefix)-m) % m]
-            smoothed[t] = fitted
-    return smoothed
+    参数:
+      original_data: 原始数据 numpy 数组
+      fluc_data: 原始数据相对均线的波动
+      params: 形状为 (P, 3) 的参数组
+      season_length: 季节周期长度
+      begindate, enddate: 比较区间的切片索引
+      
+    返回:
+      长度为P的RSS数组
+    """
+    smoothed = holtwinters_rolling_batch(original_data, params, season_length)
+    holtwinters_fluc_sub = (original_data - smoothed)[:, begindate:enddate]
+    fluc_sub = fluc_data[begindate:enddate]
+    # 残差全为0（净值不变）时缩放因子为NaN，调用方会跳过RSS全为NaN的季节长度
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scaling = (holtwinters_fluc_sub @ fluc_sub) / np.einsum('ij,ij->i', holtwinters_fluc_sub, holtwinters_fluc_sub)
+    return np.sum((fluc_sub - scaling[:, None] * holtwinters_fluc_sub) ** 2, axis=1)
 
 def calc_scaling_factor(fluc_A, fluc_B):
     """
@@ -147,18 +145,32 @@ def objective(params, arr, season_length, data_begindate, fluc_data):
     rss = calc_RSS(fluc_sub, holtwinters_fluc_sub, a)
     return rss
 
-def optimize_holtwinters_parameters(original_data, holtwinters_begindate, holtwinters_enddate):
+def coarse_grid_params(initial_guess=None):
+    """
+    生成粗网格搜索的参数组，形状为 (P, 3)，可附加一个初始猜测点。
+    """
+    grid = np.array(np.meshgrid(COARSE_GRID_ALPHA, COARSE_GRID_BETA, COARSE_GRID_GAMMA, indexing='ij')).reshape(3, -1).T
+    if initial_guess is not None:
+        grid = np.vstack([np.asarray(initial_guess, dtype=float), grid])
+    return grid
+
+
+def optimize_holtwinters_parameters(original_data, holtwinters_begindate, holtwinters_enddate, disp=True):
     """
     对给定数据区间进行参数优化，返回最优参数和最优季节长度。
+    
+    每个季节长度先用批量核做一次粗网格搜索选出初始点，
+    再用L-BFGS-B优化，梯度由一次批量计算的前向差分给出。
 
     参数:
       original_data: 原始数据 numpy 数组
       holtwinters_begindate: 开始拟合的索引
       holtwinters_enddate: 结束拟合的索引（不包含此索引之后的数据）
+      disp: 是否输出优化器的详细信息
 
     返回:
-      best_params: [alpha, beta, gamma]
-      best_season: 最佳季节长度
+      best_params: [alpha, beta, gamma]，所有季节长度都无法拟合时为 None
+      best_season: 最佳季节长度，所有季节长度都无法拟合时为 None
       best_rss: 最小残差平方和
     """
     # 在函数内计算波动数据，使用设定的均线窗口
@@ -174,25 +186,30 @@ def optimize_holtwinters_parameters(original_data, holtwinters_begindate, holtwi
         'gtol': 1e-6,
         'maxiter': 10000,
         'maxfun': 10000,
-        'disp': True
+        'disp': disp
     }
+    bounds = [(0.0001, 0.5), (0.0001, 0.5), (0.0001, 1.0)]
+    upper = np.array([b[1] for b in bounds])
 
     for season in range(7, 25):
-        initial_guess = [0.05, 0.01, 0.2]
-        bounds = [(0.0001, 0.5), (0.0001, 0.5), (0.0001, 1.0)]
+        # 粗网格搜索：所有候选参数一次批量计算
+        grid = coarse_grid_params(initial_guess=[0.05, 0.01, 0.2])
+        grid_rss = batch_RSS(original_data, fluc_data, grid, season, holtwinters_begindate, holtwinters_enddate)
+        if np.all(np.isnan(grid_rss)):
+            continue  # 区间太短或数据无波动时该季节长度没有可用的拟合，跳过
+        initial_guess = grid[np.nanargmin(grid_rss)]
 
         def local_objective(params):
-            alpha, beta, gamma = params
-            smoothed = holtwinters_rolling(original_data, alpha, beta, gamma, season_length=season)
-            holtwinters_fluc = original_data - smoothed
-            fluc_sub = fluc_data[holtwinters_begindate:holtwinters_enddate]
-            holtwinters_fluc_sub = holtwinters_fluc[holtwinters_begindate:holtwinters_enddate]
-            a = calc_scaling_factor(fluc_sub, holtwinters_fluc_sub)
-            rss = calc_RSS(fluc_sub, holtwinters_fluc_sub, a)
-            return rss
+            # 当前点和三个前向差分点一次批量计算；靠近上界时改用后向差分
+            steps = np.where(params + FD_STEP > upper, -FD_STEP, FD_STEP)
+            points = np.vstack([params, params + np.diag(steps)])
+            rss = batch_RSS(original_data, fluc_data, points, season, holtwinters_begindate, holtwinters_enddate)
+            grad = (rss[1:] - rss[0]) / steps
+            return rss[0], grad
 
         res = opt.minimize(local_objective,
                            initial_guess,
+                           jac=True,
                            bounds=bounds,
                            method='L-BFGS-B',
                            options=options)
@@ -8,6 +8,8 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from ..core.fund_info import FuncInfo
+from ..analysis.indicators import TechnicalIndicators, HoltWintersIndicator
+from .holtwinter_op import optimize_holtwinters_parameters as _optimize_holtwinters_parameters
 from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # 添加均线窗口大小设置
@@ -29,62 +31,14 @@ def sliding_average(arr, window):
     计算一个numpy数组的滑动平均，窗口大小自定义，
     两侧不足部分使用较小窗口平均补全，输出形状与原数据相同。
     """
-    arr = np.asarray(arr, dtype=float)
-    n = arr.shape[0]
-    half = window // 2
-    result = np.empty_like(arr, dtype=float)
-    
-    if arr.ndim == 1:
-        for i in range(n):
-            start = max(0, i - half)
-            end = min(n, i + half + 1)
-            result[i] = arr[start:end].mean()
-    else:
-        for i in range(n):
-            start = max(0, i - half)
-            end = min(n, i + half + 1)
-            result[i] = arr[start:end].mean(axis=0)
-    return result
+    return TechnicalIndicators.centered_rolling_mean(arr, window, edge='shrink')
 
 def holtwinters_rolling(arr, alpha, beta, gamma, season_length):
     """
     对numpy数组进行三参数Holt-Winters滚动平滑，
     第t个点的平滑结果只使用原数组的前t个数据。
     """
-    arr = np.asarray(arr, dtype=float)
-    n = len(arr)
-    smoothed = np.zeros(n)
-    
-    for t in range(n):
-        prefix = arr[:t+1]
-        m = season_length
-        # 如果数据不足一个周期，采用简单指数平滑
-        if len(prefix) < m:
-            level = prefix[0]
-            for i in range(1, len(prefix)):
-                level = alpha * prefix[i] + (1 - alpha) * level
-            smoothed[t] = level
-        else:
-            # 初始化：使用前m个数据计算初始水平与季节效应
-            level = np.mean(prefix[:m])
-            # 当只有一个周期时，用相邻差值近似趋势
-            if len(prefix) == m:
-                trend = prefix[m-1] - prefix[m-2] if m >=2 else 0
-            else:
-                trend = (np.mean(prefix[m:]) - np.mean(prefix[:m])) / m
-            seasonal = [prefix[i] - level for i in range(m)]
-            # 递推更新：从第m个点开始
-            for i in range(m, len(prefix)):
-                last_level = level
-                last_trend = trend
-                seasonal_index = (i - m) % m
-                level = alpha * (prefix[i] - seasonal[seasonal_index]) + (1 - alpha) * (last_level + last_trend)
-                trend = beta * (level - last_level) + (1 - beta) * last_trend
-                seasonal[seasonal_index] = gamma * (prefix[i] - level) + (1 - gamma) * seasonal[seasonal_index]
-            # 计算最后一个点的平滑值: 预测值 = level + trend + 季节项
-            fitted = level + trend + seasonal[(len(prefix)-m) % m]
-            smoothed[t] = fitted
-    return smoothed
+    return HoltWintersIndicator.rolling_smooth(arr, alpha, beta, gamma, season_length)
 
 def calc_scaling_factor(fluc_A, fluc_B):
     """
@@ -104,47 +58,8 @@ def optimize_holtwinters_parameters(original_data, holtwinters_begindate, holtwi
     """
     对给定数据区间进行参数优化，返回最优参数和最优季节长度。
     """
-    # 在函数内计算波动数据，使用设定的均线窗口
-    mean_data = sliding_average(original_data, MOVING_AVERAGE_WINDOW)
-    fluc_data = original_data - mean_data
-
-    best_rss = np.inf
-    best_params = None
-    best_season = None
-
-    options = {
-        'ftol': 1e-9,
-        'gtol': 1e-6,
-        'maxiter': 10000,
-        'maxfun': 10000,
-        'disp': False  # 关闭详细输出
-    }
-
-    for season in range(7, 25):
-        initial_guess = [0.05, 0.01, 0.2]
-        bounds = [(0.0001, 0.5), (0.0001, 0.5), (0.0001, 1.0)]
-
-        def local_objective(params):
-            alpha, beta, gamma = params
-            smoothed = holtwinters_rolling(original_data, alpha, beta, gamma, season_length=season)
-            holtwinters_fluc = original_data - smoothed
-            fluc_sub = fluc_data[holtwinters_begindate:holtwinters_enddate]
-            holtwinters_fluc_sub = holtwinters_fluc[holtwinters_begindate:holtwinters_enddate]
-            a = calc_scaling_factor(fluc_sub, holtwinters_fluc_sub)
-            rss = calc_RSS(fluc_sub, holtwinters_fluc_sub, a)
-            return rss
-
-        res = opt.minimize(local_objective,
-                           initial_guess,
-                           bounds=bounds,
-                           method='L-BFGS-B',
-                           options=options)
-        if res.fun < best_rss:
-            best_rss = res.fun
-            best_params = res.x
-            best_season = season
-
-    return best_params, best_season, best_rss
+    # 批量网格搜索 + 批量差分梯度的实现见 holtwinter_op，这里关闭详细输出
+    return _optimize_holtwinters_parameters(original_data, holtwinters_begindate, holtwinters_enddate, disp=False)
 
 def compute_optimize_result(end_day, original_data):
     """辅助函数，用于并行计算"""
@@ -20,7 +20,8 @@ def preisach_hysteresis(H_array, threshold_max=1.0, grid_size=50, sigma=40, cent
     返回:
         M_array: 归一化磁化强度数组 (0~1)
     """
-    H_input = np.array(H_array)
+    H_input = np.asarray(H_array, dtype=float)
+    n = len(H_input)
     
     # 创建网格
     alpha_grid = np.linspace(-threshold_max, threshold_max, grid_size)
@@ -28,35 +29,34 @@ def preisach_hysteresis(H_array, threshold_max=1.0, grid_size=50, sigma=40, cent
     dα = alpha_grid[1] - alpha_grid[0]
     dβ = beta_grid[1] - beta_grid[0]
     
-    # 预计算分布函数
-    distribution = np.zeros((grid_size, grid_size))
-    valid_mask = np.zeros((grid_size, grid_size), dtype=bool)
-    
-    for i, alpha in enumerate(alpha_grid):
-        for j, beta in enumerate(beta_grid):
-            if alpha >= beta:
-                da = alpha - center_bias
-                db = beta + center_bias
-                distribution[i, j] = np.exp(-2 * sigma**2 * (da**2 + db**2))
-                valid_mask[i, j] = True
-    
-    # 初始化滞后算子状态
-    relay_states = np.full((grid_size, grid_size), -1.0)
-    M_result = np.zeros_like(H_input)
-    
-    # 计算磁化强度
-    for idx, H in enumerate(H_input):
-        # 更新滞后算子状态
-        for i, alpha in enumerate(alpha_grid):
-            for j, beta in enumerate(beta_grid):
-                if valid_mask[i, j]:
-                    if H >= alpha:
-                        relay_states[i, j] = 1.0
-                    elif H <= beta:
-                        relay_states[i, j] = -1.0
-        
-        # 计算当前磁化强度
-        M_result[idx] = np.sum(distribution * relay_states * valid_mask) * dα * dβ
+    # 用广播预计算分布函数，只保留 alpha >= beta 的有效继电器
+    valid_mask = alpha_grid[:, None] >= beta_grid[None, :]
+    da = alpha_grid[:, None] - center_bias
+    db = beta_grid[None, :] + center_bias
+    distribution = np.where(valid_mask, np.exp(-2 * sigma**2 * (da**2 + db**2)), 0.0)
+    if n == 0:
+        return np.zeros(0)
+    
+    # 每个阈值最近一次被触发的时刻（未触发为-1）
+    steps = np.arange(n)
+    last_up = np.maximum.accumulate(np.where(H_input[:, None] >= alpha_grid[None, :], steps[:, None], -1), axis=0)
+    last_down = np.maximum.accumulate(np.where(H_input[:, None] <= beta_grid[None, :], steps[:, None], -1), axis=0)
+    
+    # 继电器(i, j)为+1 当且仅当 alpha_i 被触发过且 last_down[j] <= last_up[i]（同一时刻向上优先），否则为-1。
+    # last_down 随 beta 单调不减，满足条件的 j 构成前缀，前缀长度用二分查找得到：
+    # 给每一行加上互不重叠的偏移后展平，一次 searchsorted 完成所有时刻的查找
+    offset = (steps * (n + 1))[:, None]
+    flat_down = (last_down + offset).ravel()
+    prefix_len = np.searchsorted(flat_down, (last_up + offset).ravel(), side='right').reshape(n, grid_size)
+    prefix_len -= steps[:, None] * grid_size
+    
+    # 行累计权重：cum_weights[i, k] 为第i行前k个继电器的权重和
+    cum_weights = np.zeros((grid_size, grid_size + 1))
+    cum_weights[:, 1:] = np.cumsum(distribution, axis=1)
+    positive = np.where(last_up >= 0, cum_weights[np.arange(grid_size)[None, :], prefix_len], 0.0).sum(axis=1)
+    
+    # 计算磁化强度：+1 的权重和减去 -1 的权重和
+    M_result = (2 * positive - distribution.sum()) * dα * dβ
     
     # 归一化到0~1
     M_min, M_max = M_result.min(), M_result.max()
@@ -65,6 +65,78 @@ def preisach_hysteresis(H_array, threshold_max=1.0, grid_size=50, sigma=40, cent
     M_result = M_result * (2*updownclip-1) + (1 - updownclip)
     return M_result
 
+class PreisachOperator:
+    """
+    可逐点推进的Preisach磁滞算子
+    
+    继电器状态在多次调用之间保留，每输入一个新的H只需对整个网格做一次向量化的掩码更新；
+    归一化使用到当前为止的磁化强度最小/最大值（滚动极值）。
+    依次输入 H_array 时，第t次 update 的结果等于 preisach_hysteresis(H_array[:t+1]) 的最后一个值。
+    """
+    def __init__(self, threshold_max=1.0, grid_size=50, sigma=40, center_bias=0.5, updownclip=0.9):
+        """
+        参数:
+            threshold_max: 最大阈值
+            grid_size: 网格大小
+            sigma: 高斯分布参数
+            center_bias: 中心偏移
+            updownclip: 上下限归一化参数 (0~1)
+        """
+        alpha_grid = np.linspace(-threshold_max, threshold_max, grid_size)
+        beta_grid = np.linspace(-threshold_max, threshold_max, grid_size)
+        dα = alpha_grid[1] - alpha_grid[0]
+        dβ = beta_grid[1] - beta_grid[0]
+        alpha, beta = np.meshgrid(alpha_grid, beta_grid, indexing='ij')
+        # 只保留 alpha >= beta 的有效继电器
+        valid_mask = alpha >= beta
+        self.alpha = alpha[valid_mask]
+        self.beta = beta[valid_mask]
+        self.weights = np.exp(-2 * sigma**2 * ((self.alpha - center_bias)**2 + (self.beta + center_bias)**2))
+        self.cell_area = dα * dβ
+        self.updownclip = updownclip
+        self.reset()
+    
+    def reset(self):
+        """恢复初始状态：全部继电器为-1，清空滚动极值"""
+        self.relay_states = np.full(self.alpha.shape, -1.0)
+        self.magnetization = None  # 最近一次的原始磁化强度
+        self.M_min = np.inf
+        self.M_max = -np.inf
+        self.count = 0
+    
+    def normalize(self, M):
+        """按当前的滚动极值把原始磁化强度归一化到 (1-updownclip, updownclip)"""
+        if self.M_max > self.M_min:
+            M = (M - self.M_min) / (self.M_max - self.M_min)
+        return M * (2*self.updownclip-1) + (1 - self.updownclip)
+    
+    def update(self, H):
+        """
+        输入一个新的磁场值
+        
+        返回:
+            归一化后的磁化强度
+        """
+        # H >= alpha 的继电器翻转为+1，其余 H <= beta 的翻转为-1
+        up = H >= self.alpha
+        self.relay_states[up] = 1.0
+        self.relay_states[~up & (H <= self.beta)] = -1.0
+        M = np.sum(self.weights * self.relay_states) * self.cell_area
+        self.magnetization = M
+        self.M_min = min(self.M_min, M)
+        self.M_max = max(self.M_max, M)
+        self.count += 1
+        return self.normalize(M)
+    
+    def update_many(self, H_array):
+        """
+        依次输入多个磁场值
+        
+        返回:
+            每个输入点对应的归一化磁化强度（各点使用截至该点的滚动极值）
+        """
+        return np.array([self.update(H) for H in H_array], dtype=float)
+
 def create_sinusoidal_input(num_points=200, frequency_cycles=2, amplitude=1.0, noise_level=0.0, amplitude_variation=0.0, decay_rate=0.0):
     """创建正弦波输入"""
     t = np.linspace(0, 2 * np.pi * frequency_cycles, num_points)
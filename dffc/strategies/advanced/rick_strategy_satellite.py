@@ -1,8 +1,9 @@
 from datetime import datetime
 from copy import deepcopy
 import matplotlib.pyplot as plt
-from source.backtest_funcinfo import BackTestFuncInfo
-from source.extended_funcinfo import ExtendedFuncInfo
+from dffc.backtest.backtest_funcinfo import BackTestFuncInfo
+from dffc.core.extended_funcinfo import ExtendedFuncInfo
+from dffc.analysis.panel import FactorPanel
 
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
@@ -102,59 +103,45 @@ if __name__ == "__main__":
     fundmain = ExtendedFuncInfo(code='011320', name='国泰上证综指ETF联接')
     fundmain.factor_holtwinters_parameter = {'alpha': 0.1018, 'beta': 0.00455, 'gamma': 0.0861, 'season_length': 13}
     fundmain.load_data_net()  # 从网络加载数据
-    fundmain.factor_cal_holtwinters()
-    fundmain.factor_cal_holtwinters_delta_percentage()
-    fundmain.set_info_dict()
 
     # 华夏阿尔法精选混合 ===============================================================
     fund1 = ExtendedFuncInfo(code='011937', name='华夏阿尔法精选混合')
     fund1.factor_holtwinters_parameter = {'alpha': 0.0941, 'beta': 0.02156, 'gamma': 0.1914, 'season_length': 16}
     fund1.load_data_net()  # 从网络加载数据
-    fund1.factor_cal_holtwinters()
-    fund1.factor_cal_holtwinters_delta_percentage()
-    fund1.set_info_dict()
 
     # 大摩数字经济混合A ===============================================================
     fund2 = ExtendedFuncInfo(code='017102', name='大摩数字经济混合A')
     fund2.factor_holtwinters_parameter = {'alpha': 0.1045, 'beta': 0.01346, 'gamma': 0.04151, 'season_length': 24}
     fund2.load_data_net()  # 从网络加载数据
-    fund2.factor_cal_holtwinters()
-    fund2.factor_cal_holtwinters_delta_percentage()
 
     # 鹏华优选回报灵活配置混合C ===============================================================
     fund3 = ExtendedFuncInfo(code='012997', name='鹏华优选回报灵活配置混合C')
     fund3.factor_holtwinters_parameter = {'alpha': 0.1280, 'beta': 0.007697, 'gamma': 0.1855, 'season_length': 16}
     fund3.load_data_net()  # 从网络加载数据
-    fund3.factor_cal_holtwinters()
-    fund3.factor_cal_holtwinters_delta_percentage()
-    fund3.set_info_dict()
 
     # 申万菱信消费增长混合C ===============================================================
     fund4 = ExtendedFuncInfo(code='015254', name='申万菱信消费增长混合C')
     fund4.factor_holtwinters_parameter = {'alpha': 0.11077, 'beta': 0.02186, 'gamma': 0.4113, 'season_length': 16}
     fund4.load_data_net()  # 从网络加载数据
-    fund4.factor_cal_holtwinters()
-    fund4.factor_cal_holtwinters_delta_percentage()
-    fund4.set_info_dict()
 
     # 华夏中证港股通内地金融ETF联接C ===============================================================
     fund5 = ExtendedFuncInfo(code='020423', name='华夏中证港股通内地金融ETF联接C', estimate_info={'code': '513190', 'type': 'fund'})
     fund5.factor_holtwinters_parameter = {'alpha': 0.05508, 'beta': 0.016598, 'gamma': 0.12826, 'season_length': 24}
     fund5.load_data_net()  # 从网络加载数据
-    fund5.factor_cal_holtwinters()
-    fund5.factor_cal_holtwinters_delta_percentage()
-    fund5.set_info_dict()
 
     # 大摩沪港深精选混合A ===============================================================
     fund8 = ExtendedFuncInfo(code='013356', name='大摩沪港深精选混合A')
     fund8.factor_holtwinters_parameter = {'alpha': 0.117, 'beta': 0.009484, 'gamma': 0.05293, 'season_length': 20}
     fund8.load_data_net()  # 从网络加载数据
-    fund8.factor_cal_holtwinters()
-    fund8.factor_cal_holtwinters_delta_percentage()
-    fund8.set_info_dict()
+
+    fund_list = [fundmain, fund1, fund2, fund3, fund4, fund5, fund8]
+    # 所有基金加载后一次计算因子
+    FactorPanel(fund_list).compute().apply_to_funds()
+    for fund in fund_list:
+        fund.set_info_dict()
     print("==========================================================")
 
     # 运行策略回测
-    strategy = StrategyExample(fund_list=[fundmain, fund1, fund2, fund3, fund4, fund5, fund8], start_date=datetime(2020, 1, 1), end_date=datetime(2025, 6, 1))
+    strategy = StrategyExample(fund_list=fund_list, start_date=datetime(2020, 1, 1), end_date=datetime(2025, 6, 1))
     strategy.run()
     strategy.plot_result()
\ No newline at end of file
@@ -1,8 +1,9 @@
 from datetime import datetime
 from copy import deepcopy
 import matplotlib.pyplot as plt
-from source.backtest_funcinfo import BackTestFuncInfo
-from source.extended_funcinfo import ExtendedFuncInfo
+from dffc.backtest.backtest_funcinfo import BackTestFuncInfo
+from dffc.core.extended_funcinfo import ExtendedFuncInfo
+from dffc.analysis.panel import FactorPanel
 
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']
@@ -108,8 +109,9 @@ if __name__ == "__main__":
     etflist = ExtendedFuncInfo.create_fundlist_config("fund_config_ndvsgd.json")
     for fund in etflist:
         fund.load_data_csv(f"./csv_data/{fund.code}.csv")  # 从本地CSV文件加载数据
-        fund.factor_cal_holtwinters()
-        fund.factor_cal_holtwinters_delta_percentage()
+    # 所有基金加载后一次计算因子
+    FactorPanel(etflist).compute().apply_to_funds()
+    for fund in etflist:
         fund.set_info_dict()
     print("==========================================================")
 
@@ -2,8 +2,10 @@ from datetime import datetime
 from copy import deepcopy
 import numpy as np
 import matplotlib.pyplot as plt
-from source.backtest_funcinfo import BackTestFuncInfo
-from source.extended_funcinfo import ExtendedFuncInfo
+from dffc.backtest.backtest_funcinfo import BackTestFuncInfo
+from dffc.core.extended_funcinfo import ExtendedFuncInfo
+from dffc.analysis.panel import FactorPanel
+from dffc.strategies.advanced.preisach_hysteresis_model import preisach_hysteresis as _preisach_hysteresis
 
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
@@ -27,50 +29,9 @@ def preisach_hysteresis(H_array, threshold_max=1.0, grid_size=30, sigma=4, cente
     返回:
         M_array: 归一化磁化强度数组 (0~1)
     """
-    H_input = np.array(H_array)
-    
-    # 创建网格
-    alpha_grid = np.linspace(-threshold_max, threshold_max, grid_size)
-    beta_grid = np.linspace(-threshold_max, threshold_max, grid_size)
-    dα = alpha_grid[1] - alpha_grid[0]
-    dβ = beta_grid[1] - beta_grid[0]
-    
-    # 预计算分布函数
-    distribution = np.zeros((grid_size, grid_size))
-    valid_mask = np.zeros((grid_size, grid_size), dtype=bool)
-    
-    for i, alpha in enumerate(alpha_grid):
-        for j, beta in enumerate(beta_grid):
-            if alpha >= beta:
-                da = alpha - center_bias
-                db = beta + center_bias
-                distribution[i, j] = np.exp(-2 * sigma**2 * (da**2 + db**2))
-                valid_mask[i, j] = True
-    
-    # 初始化滞后算子状态
-    relay_states = np.full((grid_size, grid_size), -1.0)
-    M_result = np.zeros_like(H_input)
-    
-    # 计算磁化强度
-    for idx, H in enumerate(H_input):
-        # 更新滞后算子状态
-        for i, alpha in enumerate(alpha_grid):
-            for j, beta in enumerate(beta_grid):
-                if valid_mask[i, j]:
-                    if H >= alpha:
-                        relay_states[i, j] = 1.0
-                    elif H <= beta:
-                        relay_states[i, j] = -1.0
-        
-        # 计算当前磁化强度
-        M_result[idx] = np.sum(distribution * relay_states * valid_mask) * dα * dβ
-    
-    # 归一化到0~1
-    M_min, M_max = M_result.min(), M_result.max()
-    if M_max > M_min:
-        M_result = (M_result - M_min) / (M_max - M_min)
-    M_result = M_result * (2*updownclip-1) + (1 - updownclip)
-    return M_result
+    # 使用向量化的实现，这里只保留本策略的默认参数
+    return _preisach_hysteresis(H_array, threshold_max=threshold_max, grid_size=grid_size, sigma=sigma,
+                                center_bias=center_bias, updownclip=updownclip)
 
 
 class StrategyExample(BackTestFuncInfo):
@@ -143,8 +104,9 @@ if __name__ == "__main__":
         fund.load_data_csv(f"./csv_data/{fund.code}.csv")  # 从本地CSV文件加载数据
         #fund.load_data_net()  # 从网络加载数据
         #fund.save_data_csv(f"./csv_data/{fund.code}.csv") # 保存网络数据到本地CSV文件
-        fund.factor_cal_holtwinters()
-        fund.factor_cal_holtwinters_delta_percentage()
+    # 所有基金加载后一次计算因子
+    FactorPanel(etflist).compute().apply_to_funds()
+    for fund in etflist:
         fund.set_info_dict()
     print("==========================================================")
 
@@ -1,8 +1,10 @@
 from datetime import datetime
 from copy import deepcopy
+import numpy as np
 import matplotlib.pyplot as plt
-from source.backtest_funcinfo import BackTestFuncInfo
-from source.extended_funcinfo import ExtendedFuncInfo
+from dffc.backtest.backtest_funcinfo import BackTestFuncInfo
+from dffc.core.extended_funcinfo import ExtendedFuncInfo
+from dffc.analysis.panel import FactorPanel
 
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
@@ -12,40 +14,35 @@ plt.rcParams['axes.unicode_minus'] = False
 策略：超级水货小方块
 '''
 
+FACTOR = 'factor_holtwinters_delta_percentage'
+
 
 class StrategyExample(BackTestFuncInfo):
     """
     继承自BackTestFuncInfo，重写strategy_func方法
+
+    同时实现了 weight_matrix，可以用 run_vectorized() 一次算完整个回测，结果与逐日的 run() 一致
     """
     def __init__(self, fund_list, start_date, end_date):
         super().__init__(fund_list, start_date, end_date)
 
         # 目标仓位列表
         self.target_position = [0., 1.]
-        self.target_position = [x / sum(self.target_position) for x in self.target_position] # 归一化目标仓位
         self.threshold1 = 0.6  # 磁滞回线阈值
         self.targetposition_list = [[0.2, 0.8], [0.5, 0.5], [0.8, 0.2], [0.5, 0.5]]  # 目标仓位列表
         self.adjust_factor = 0.2  # 调整因子，控制调仓力度
 
         # 初始化目标仓位记忆开关
         self.memory_switch = 0
+        self._derive()
+
+    def _derive(self):
+        """归一化目标仓位，目标仓位记忆从目标仓位开始"""
+        self.target_position = [x / sum(self.target_position) for x in self.target_position] # 归一化目标仓位
         self.memory_target_position = deepcopy(self.target_position)
-        
 
-    # 重写策略函数
-    def strategy_func(self):
-        nowdate = deepcopy(self.current_date)
-        operation_list = []  # 当日的交易列表
-        operation_list.append(nowdate)  # 初始化当日交易列表
-
-        # 如果是回测开始日期，则初始化为0状态HDP的目标持仓
-        if nowdate == self.start_date:
-            for i in range(len(self.target_position)):
-                operation_list.append([0, i + 1, self.target_position[i], self.target_position[i]])  # 初始化目标仓位   
-            return operation_list
-        
-        # 1. 极简版磁滞回线逻辑
-        deltahdp = - (self.strategy_factor_list[0][0] - self.strategy_factor_list[1][0])  # 计算HDP差值
+    def update_memory(self, deltahdp):
+        """极简版磁滞回线：按两只基金的HDP差值切换目标仓位记忆，差值为NaN（基金当日没有数据）时不切换"""
         if self.memory_switch == 0:
             if deltahdp > self.threshold1:
                 self.memory_target_position = self.targetposition_list[1]
@@ -63,34 +60,45 @@ class StrategyExample(BackTestFuncInfo):
                 self.memory_target_position = self.targetposition_list[0]
                 self.memory_switch = 0
 
-        # 记忆目标仓位
-        target_position_hdp = deepcopy(self.memory_target_position)
-        target_position_hdp = [target_position_hdp[i]*self.target_position[i] for i in range(len(target_position_hdp))]
-        target_position_hdp = [x / sum(target_position_hdp) for x in target_position_hdp]  # 归一化目标仓位
-
-
-        # 计算当前持仓价值
-        currentprice = [self.current_asset[1][i+1]* self.strategy_unit_value_list[i][0] for i in range(len(self.target_position))]
-        targetprice = [sum(currentprice) * target_position_hdp[i] for i in range(len(target_position_hdp))]  # 目标持仓的资产值
-        # 计算当前持仓和目标持仓的差值
-        diffprice = [targetprice[i] - currentprice[i] for i in range(len(targetprice))]  # 计算差值
-        diffshare = [diffprice[i] / self.strategy_unit_value_list[i][0] for i in range(len(diffprice))]  # 转换为份额差值   
-
-        # 计算调仓量，按照差值的0.5倍进行调整
-        adjust_factor = self.adjust_factor  # 可调参数，调整差值的倍率
-        adjust_diffshare = [diffshare[i]*adjust_factor for i in range(len(diffshare))]  # 调整差值
-
-        # 初始化买入和卖出数量
-        if adjust_diffshare[0] > 0:
-            buy_fund = 1
-            sell_fund = 2
-            operation_list.append([sell_fund, buy_fund, abs(adjust_diffshare[1]), abs(adjust_diffshare[1]) * self.strategy_unit_value_list[1][0]])
-            return operation_list
-        else:
-            buy_fund = 2
-            sell_fund = 1
-            operation_list.append([sell_fund, buy_fund, abs(adjust_diffshare[0]), abs(adjust_diffshare[0]) * self.strategy_unit_value_list[0][0]])
-            return operation_list
+    def target_weights(self):
+        """记忆目标仓位与目标仓位相乘后归一化，返回现金 + 两只基金的目标权重"""
+        target_position_hdp = [self.memory_target_position[i] * self.target_position[i] for i in range(len(self.target_position))]
+        return [0.] + [x / sum(target_position_hdp) for x in target_position_hdp]  # 归一化目标仓位
+
+    # 重写策略函数
+    def strategy_func(self):
+        # 还没有建仓时按目标仓位一次建仓
+        if len(self.ledger) == 0:
+            return self.target_weight_trades([0.] + self.target_position, adjust_factor=1.0)
+
+        # 1. 极简版磁滞回线逻辑
+        hdp = [self.factor(i) for i in range(len(self.target_position))]
+        deltahdp = np.nan if None in hdp else -(hdp[0] - hdp[1])  # 计算HDP差值
+        self.update_memory(deltahdp)
+
+        # 2. 按记忆目标仓位调仓，每次调整差值的 adjust_factor 倍
+        return self.target_weight_trades(self.target_weights())
+
+    def weight_matrix(self, rows):
+        """逐日目标权重：HDP差值一次取出，磁滞回线按交易日顺序推进（与逐日回测一样更新目标仓位记忆）"""
+        rows = np.asarray(rows, dtype=int)
+        hdp = np.where(self.calendar.has_data[rows], self.aligned_factor(FACTOR, rows), np.nan)
+        deltahdp = -(hdp[:, 0] - hdp[:, 1])
+        weights = np.empty((len(rows), len(self.fund_list) + 1))
+        for i, delta in enumerate(deltahdp.tolist()):
+            if i == 0 and len(self.ledger) == 0:
+                weights[i] = [0.] + self.target_position
+                continue
+            self.update_memory(delta)
+            weights[i] = self.target_weights()
+        return weights
+
+    def adjust_factors(self, rows):
+        """建仓日一次调到目标，之后每次调整差值的 adjust_factor 倍"""
+        factors = np.full(len(rows), float(self.adjust_factor))
+        if len(rows) and len(self.ledger) == 0:
+            factors[0] = 1.0
+        return factors
 
 if __name__ == "__main__":
     print("==========================================================")
@@ -99,12 +107,13 @@ if __name__ == "__main__":
         fund.load_data_csv(f"./csv_data/{fund.code}.csv")  # 从本地CSV文件加载数据
         #fund.load_data_net()  # 从网络加载数据
         #fund.save_data_csv(f"./csv_data/{fund.code}.csv") # 保存网络数据到本地CSV文件
-        fund.factor_cal_holtwinters()
-        fund.factor_cal_holtwinters_delta_percentage()
+    # 所有基金加载后一次计算因子
+    FactorPanel(etflist).compute().apply_to_funds()
+    for fund in etflist:
         fund.set_info_dict()
     print("==========================================================")
 
     # 运行策略回测
     strategy = StrategyExample(etflist, start_date=datetime(2022, 7, 1), end_date=datetime(2025, 7, 1))
     strategy.run()
-    strategy.plot_result()
\ No newline at end of file
+    strategy.plot_result()
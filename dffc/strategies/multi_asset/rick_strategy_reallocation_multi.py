@@ -2,8 +2,10 @@ from datetime import datetime
 from copy import deepcopy
 import numpy as np
 import matplotlib.pyplot as plt
-from source.backtest_funcinfo import BackTestFuncInfo
-from source.extended_funcinfo import ExtendedFuncInfo
+from dffc.backtest.backtest_funcinfo import BackTestFuncInfo
+from dffc.core.extended_funcinfo import ExtendedFuncInfo
+from dffc.analysis.panel import FactorPanel
+from dffc.strategies.advanced.preisach_hysteresis_model import PreisachOperator
 
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
@@ -24,65 +26,6 @@ plt.rcParams['axes.unicode_minus'] = False
 
 '''
 
-def preisach_hysteresis(H_array, threshold_max=1.0, grid_size=30, sigma=4, center_bias=0.3, updownclip=0.9):
-    """
-    Preisach磁滞回线模型
-    
-    参数:
-        H_array: 磁场输入数组
-        threshold_max: 最大阈值
-        grid_size: 网格大小
-        sigma: 高斯分布参数
-        center_bias: 中心偏移
-        updownclip: 上下限归一化参数 (0~1)
-    返回:
-        M_array: 归一化磁化强度数组 (0~1)
-    """
-    H_input = np.array(H_array)
-    
-    # 创建网格
-    alpha_grid = np.linspace(-threshold_max, threshold_max, grid_size)
-    beta_grid = np.linspace(-threshold_max, threshold_max, grid_size)
-    dα = alpha_grid[1] - alpha_grid[0]
-    dβ = beta_grid[1] - beta_grid[0]
-    
-    # 预计算分布函数
-    distribution = np.zeros((grid_size, grid_size))
-    valid_mask = np.zeros((grid_size, grid_size), dtype=bool)
-    
-    for i, alpha in enumerate(alpha_grid):
-        for j, beta in enumerate(beta_grid):
-            if alpha >= beta:
-                da = alpha - center_bias
-                db = beta + center_bias
-                distribution[i, j] = np.exp(-2 * sigma**2 * (da**2 + db**2))
-                valid_mask[i, j] = True
-    
-    # 初始化滞后算子状态
-    relay_states = np.full((grid_size, grid_size), -1.0)
-    M_result = np.zeros_like(H_input)
-    
-    # 计算磁化强度
-    for idx, H in enumerate(H_input):
-        # 更新滞后算子状态
-        for i, alpha in enumerate(alpha_grid):
-            for j, beta in enumerate(beta_grid):
-                if valid_mask[i, j]:
-                    if H >= alpha:
-                        relay_states[i, j] = 1.0
-                    elif H <= beta:
-                        relay_states[i, j] = -1.0
-        
-        # 计算当前磁化强度
-        M_result[idx] = np.sum(distribution * relay_states * valid_mask) * dα * dβ
-    
-    # 归一化到0~1
-    M_min, M_max = M_result.min(), M_result.max()
-    if M_max > M_min:
-        M_result = (M_result - M_min) / (M_max - M_min)
-    M_result = M_result * (2*updownclip-1) + (1 - updownclip)
-    return M_result
-
 class StrategyExample(BackTestFuncInfo):
     """
     继承自BackTestFuncInfo，重写strategy_func方法
@@ -100,6 +43,10 @@ class StrategyExample(BackTestFuncInfo):
         self.level_list = [0 for _ in range(len(self.target_position))]  # 初始化HDP水平列表
         self.parameter_list = [[0.8, 0.2] for _ in range(len(self.target_position))]  # 初始化HDP参数列表
         self.threshold_list = [[-0.5, 0.5] for _ in range(len(self.target_position))]  # 初始化HDP阈值列表
+        # 每个资产一个磁滞算子，继电器状态在各交易日之间保留，每天只输入新增的HDP
+        self.preisach_operator_list = [PreisachOperator(threshold_max=1.0, grid_size=30, sigma=3, center_bias=0.6, updownclip=0.95)
+                                       for _ in range(len(self.target_position))]
+        self.preisach_result_list = [None for _ in range(len(self.target_position))]
 
     # 重写策略函数
     def strategy_func(self):
@@ -109,6 +56,8 @@ class StrategyExample(BackTestFuncInfo):
 
         # 如果是回测开始日期，则初始化为0状态HDP的目标持仓
         if nowdate == self.start_date:
+            for operator in self.preisach_operator_list:
+                operator.reset()
             for i in range(len(self.target_position)):
                 if self.target_position[i] > 0:
                     # 初始化目标仓位
@@ -124,11 +73,16 @@ class StrategyExample(BackTestFuncInfo):
                 target_position_parameter.append(0.5)
                 continue
             
-            hdp_list = self.strategy_factor_list[i-1].copy()
-            hdp_list.reverse()
-            # 使用磁滞回线模型计算HDP
-            hdp_result = preisach_hysteresis(hdp_list, threshold_max=1.0, grid_size=30, sigma=3, center_bias=0.6, updownclip=0.95)
-            target_position_parameter.append(1-hdp_result[-1])  # 取最后一个值作为目标仓位系数
+            # 使用磁滞回线模型计算HDP：按时间顺序只输入上次之后新增的HDP（列表中最新的在前）
+            hdp_list = self.strategy_factor_list[i-1]
+            operator = self.preisach_operator_list[i]
+            new_count = len(hdp_list) - operator.count
+            if new_count < 0:
+                operator.reset()
+                new_count = len(hdp_list)
+            for k in range(new_count - 1, -1, -1):
+                self.preisach_result_list[i] = operator.update(hdp_list[k])
+            target_position_parameter.append(1-self.preisach_result_list[i])  # 取最后一个值作为目标仓位系数
         
         # 使用小方块策略
         '''
@@ -239,8 +193,9 @@ if __name__ == "__main__":
         fund.load_data_csv(f"./csv_data/{fund.code}.csv")  # 从本地CSV文件加载数据
         #fund.load_data_net()  # 从网络加载数据
         #fund.save_data_csv(f"./csv_data/{fund.code}.csv") # 保存网络数据到本地CSV文件
-        fund.factor_cal_holtwinters()
-        fund.factor_cal_holtwinters_delta_percentage()
+    # 所有基金加载后一次计算因子
+    FactorPanel(etflist).compute().apply_to_funds()
+    for fund in etflist:
         fund.set_info_dict()
     print("==========================================================")
 
@@ -2,6 +2,7 @@
 import json
 import copy
 from dffc.core.extended_funcinfo import ExtendedFuncInfo
+from dffc.analysis.panel import FactorPanel
 
 def load_fund_config():
     """加载基金配置文件"""
@@ -14,15 +15,15 @@ def print_fund_info(fund):
     for key, value in fund.info_dict.items():
         print(f"{key}: {value}")
 
-def analyze_fund(fund_config):
-    """分析单个基金"""
+def load_fund(fund_config):
+    """加载单个基金的数据和估计值"""
     code = fund_config['code']
     name = fund_config['name']
     params = copy.deepcopy(fund_config['params'])  # 使用深拷贝保护原始参数
     estimate_info = copy.deepcopy(fund_config.get('estimate_info'))  # 使用深拷贝保护原始配置
     
     print("=" * 60)
-    print(f"分析基金: {name} ({code})")
+    print(f"加载基金: {name} ({code})")
     
     # 创建基金对象
     fund = ExtendedFuncInfo(code=code, name=name, estimate_info=estimate_info)
@@ -35,34 +36,29 @@ def analyze_fund(fund_config):
     
     # 设置HoltWinters参数
     fund.factor_holtwinters_parameter = params
-    
-    # 计算HoltWinters因子和增量百分比
-    fund.factor_cal_holtwinters()
-    fund.factor_cal_holtwinters_delta_percentage()
-    
-    # 计算30日中心移动平均
-    fund.factor_CMA30 = fund.factor_cal_CMA(30)
-    
-    # 计算波动率比率
-    fund.factor_fluctuationrateCMA30 = fund.factor_cal_fluctuationrateCMA30()
-    
-    # 设置信息字典并打印
-    fund.set_info_dict()
-    print_fund_info(fund)
-    
     return fund
 
+def analyze_funds(funds):
+    """一次计算所有基金的因子（HoltWinters、增量百分比、CMA30、波动率比率）并打印"""
+    panel = FactorPanel(funds).compute()
+    panel.apply_to_funds()
+    for fund in funds:
+        # 估计值相关因子
+        fund.factor_cal_holtwinters_estimate()
+        print("=" * 60)
+        print(f"分析基金: {fund.name} ({fund.code})")
+        print_fund_info(fund)
+    return panel
+
 def main():
     try:
         # 加载配置
         fund_configs = load_fund_config()
         print(f"开始分析 {len(fund_configs)} 只基金...")
         
-        # 分析所有基金
-        funds = []
-        for config in fund_configs:
-            fund = analyze_fund(config)
-            funds.append(fund)
+        # 加载所有基金后统一计算因子
+        funds = [load_fund(config) for config in fund_configs]
+        analyze_funds(funds)
         
         print("=" * 60)
         print("所有基金分析完成！")
@@ -8,8 +8,9 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal, QObject
 from PyQt5.QtGui import QFont, QFontDatabase
-from source.extended_funcinfo import ExtendedFuncInfo
-from datetime import datetime
+from dffc.core.extended_funcinfo import ExtendedFuncInfo
+from dffc.analysis.panel import FactorPanel
+from datetime import datetime, time
 
 
 class ClickableLabel(QLabel):
@@ -58,12 +59,10 @@ class FundDataWorker(QThread):
                     return
                 
                 try:
-                    self.progress_update.emit(f"正在处理: {cfg['code']} ({i+1}/{total})")
-                    fund = create_fund_from_config(cfg)
+                    self.progress_update.emit(f"正在加载: {cfg['code']} ({i+1}/{total})")
+                    fund = load_fund_from_config(cfg)
                     if fund is not None:
                         funds.append(fund)
-                        # 发送单个基金处理完成的信号，供GUI实时更新
-                        self.fund_processed.emit(cfg['code'], fund.info_dict)
                     else:
                         self.progress_update.emit(f"处理失败: {cfg['code']}")
                 except Exception as e:
@@ -71,6 +70,13 @@ class FundDataWorker(QThread):
                     self.progress_update.emit(f"处理失败: {cfg.get('code', 'unknown')} - {str(e)}")
                     continue
             
+            # 所有基金加载后一次计算因子
+            self.progress_update.emit(f"正在计算 {len(funds)} 个基金的因子...")
+            funds = compute_fund_factors(funds)
+            for fund in funds:
+                # 发送单个基金处理完成的信号，供GUI实时更新
+                self.fund_processed.emit(fund.code, fund.info_dict)
+            
             # 发送完整数据
             self.progress_update.emit(f"完成处理 {len(funds)} 个基金")
             self.data_ready.emit(funds)
@@ -80,13 +86,20 @@ class FundDataWorker(QThread):
             self.progress_update.emit(f"数据获取失败: {str(e)}")
             self.data_ready.emit([])
 
+def refresh_fund_estimate(fund):
+    """盘中只刷新估计值：重新获取估值，并在已有的HoltWinters状态上快速计算估计因子"""
+    fund.load_estimate_net()
+    fund.factor_cal_holtwinters_estimate()
+    fund.set_info_dict()
+    return fund
+
 def get_all_funds():
     # 默认启动不加载任何基金
     return []
 
 
-def create_fund_from_config(cfg):
-    """从配置创建基金对象（同步方式）"""
+def load_fund_from_config(cfg):
+    """从配置创建基金对象并加载净值和估计值（不计算因子）"""
     try:
         # 确保estimate_info有正确的默认值，使用深拷贝避免修改原始配置
         cfg_copy = copy.deepcopy(cfg)
@@ -106,23 +119,44 @@ def create_fund_from_config(cfg):
         
         # 设置HoltWinters参数，使用深拷贝保护原始参数
         fund.factor_holtwinters_parameter = copy.deepcopy(cfg_copy['params'])
-        
-        # 计算HoltWinters因子和增量百分比
-        fund.factor_cal_holtwinters()
-        fund.factor_cal_holtwinters_delta_percentage()
-        
-        # 计算30日中心移动平均
-        fund.factor_CMA30 = fund.factor_cal_CMA(30)
-        
-        # 计算波动率比率
-        fund.factor_fluctuationrateCMA30 = fund.factor_cal_fluctuationrateCMA30()
-        
-        # 设置信息字典
-        fund.set_info_dict()
         return fund
     except Exception as e:
         print(f"创建基金对象失败 {cfg.get('code', 'unknown')}: {e}")
         return None
+
+
+def compute_fund_factors(funds):
+    """
+    用一个因子面板计算所有基金的因子（HoltWinters、增量百分比、CMA30、波动率比率），
+    再在递推状态上计算估计值因子并设置信息字典
+
+    Returns:
+        计算了因子的基金列表，没有净值数据的基金不在其中
+    """
+    loaded = [fund for fund in funds if fund._unit_value_ls]
+    for fund in funds:
+        if not fund._unit_value_ls:
+            print(f"基金 {fund.code} 没有净值数据，未计算因子")
+    if not loaded:
+        return []
+    FactorPanel(loaded).compute().apply_to_funds()
+    for fund in loaded:
+        fund.factor_cal_holtwinters_estimate()
+        fund.set_info_dict()
+    return loaded
+
+
+def create_fund_from_config(cfg):
+    """从配置创建单个基金对象并计算因子（同步方式）"""
+    fund = load_fund_from_config(cfg)
+    if fund is None:
+        return None
+    try:
+        funds = compute_fund_factors([fund])
+        return funds[0] if funds else None
+    except Exception as e:
+        print(f"创建基金对象失败 {cfg.get('code', 'unknown')}: {e}")
+        return None
     """添加/编辑基金信息弹窗"""
     def __init__(self, parent=None, fund_cfg=None):
         super().__init__(parent)
@@ -266,8 +300,11 @@ class MainWindow(QWidget):
         
         # 简化的缓存机制
         self.fund_cache = {}  # 缓存基金对象
-        self.cache_timestamp = {}  # 缓存时间戳
+        self.cache_timestamp = {}  # 缓存时间戳（最近一次刷新，含只刷新估计值）
         self.cache_timeout = 60  # 缓存60秒
+        self.history_timestamp = {}  # 最近一次重新加载历史净值的时间
+        self.nav_publish_time = time(18, 0)  # 当日净值开始公布的时间
+        self.history_retry_interval = 600  # 当日净值公布后、尚未取得时，每10分钟重新加载一次历史净值
         
         # 线程状态管理（GUI主线程 + 数据工作线程）
         self.is_refreshing = False
@@ -601,24 +638,58 @@ class MainWindow(QWidget):
         """清除基金对象缓存"""
         self.fund_cache.clear()
         self.cache_timestamp.clear()
+        self.history_timestamp.clear()
     
+    def history_expired(self, cache_key, current_time):
+        """
+        缓存的历史净值是否需要重新加载
+
+        跨天时总是重新加载；当天的净值公布时间之后，如果缓存中还没有当日净值，
+        每隔 history_retry_interval 秒重新加载一次，取得当日净值后只刷新估计值。
+        """
+        history_time = self.history_timestamp.get(cache_key)
+        if history_time is None or history_time.date() != current_time.date():
+            return True
+        if current_time.weekday() >= 5 or current_time.time() < self.nav_publish_time:
+            return False
+        fund = self.fund_cache[cache_key]
+        if fund._date_ls and fund._date_ls[0].date() >= current_time.date():
+            return False  # 当日净值已加载
+        return (current_time - history_time).total_seconds() >= self.history_retry_interval
+
     def create_fund_with_cache(self, cfg, force_refresh=False):
-        """创建基金对象，支持缓存"""
+        """
+        创建基金对象，支持缓存
+
+        返回缓存中的基金对象本身（调用方只读取，不修改）。历史净值没有变化时在缓存的对象上
+        原地刷新估计值，不复制净值、因子序列和HoltWinters状态，每次刷新与历史长度无关。
+        """
         # 生成缓存键
         cache_key = f"{cfg['code']}_{cfg.get('estimate_info', {}).get('code', '')}"
         current_time = datetime.now()
         
         # 检查缓存（除非强制刷新）
+        fund = None
         if not force_refresh and cache_key in self.fund_cache and cache_key in self.cache_timestamp:
             if (current_time - self.cache_timestamp[cache_key]).total_seconds() < self.cache_timeout:
-                return copy.deepcopy(self.fund_cache[cache_key])
+                return self.fund_cache[cache_key]
+            if not self.history_expired(cache_key, current_time):
+                # 历史净值没有变化，只刷新估计值
+                try:
+                    fund = refresh_fund_estimate(self.fund_cache[cache_key])
+                except Exception as e:
+                    print(f"刷新估计值失败 {cfg.get('code', 'unknown')}: {e}")
+                    fund = None
         
-        # 创建新的基金对象
-        fund = create_fund_from_config(cfg)
+        # 创建新的基金对象（重新加载历史净值）
+        if fund is None:
+            fund = create_fund_from_config(cfg)
+            if fund is not None:
+                self.history_timestamp[cache_key] = current_time
         
         if fund is not None:
-            # 缓存基金对象
-            self.fund_cache[cache_key] = copy.deepcopy(fund)
+            # 缓存基金对象；只刷新估计值时保留原来的历史净值加载时间
+            self.fund_cache[cache_key] = fund
             self.cache_timestamp[cache_key] = current_time
         
         return fund
@@ -713,6 +784,7 @@ class MainWindow(QWidget):
                     del self.fund_cache[cache_key]
                 if cache_key in self.cache_timestamp:
                     del self.cache_timestamp[cache_key]
+                self.history_timestamp.pop(cache_key, None)
                 self.last_update_label.setText(f"已编辑基金: {new_cfg['code']}")
             else:
                 # 新增基金
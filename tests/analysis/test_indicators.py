@@ -0,0 +1,410 @@
+"""
+analysis.indicators 模块测试
+重点验证各快速实现与原始逐点实现的数值一致性
+"""
+
+import pytest
+import numpy as np
+
+from dffc.analysis.indicators import TechnicalIndicators, HoltWintersIndicator, HoltWintersState
+from dffc.core.extended_funcinfo import ExtendedFuncInfo
+
+
+def reference_holtwinters_rolling(arr, alpha, beta, gamma, season_length):
+    """原始的O(n²)实现：对每个前缀重新初始化并完整递推"""
+    arr = np.asarray(arr, dtype=float)
+    n = len(arr)
+    smoothed = np.zeros(n)
+    for t in range(n):
+        prefix = arr[:t+1]
+        m = season_length
+        if len(prefix) < m:
+            level = prefix[0]
+            for i in range(1, len(prefix)):
+                level = alpha * prefix[i] + (1 - alpha) * level
+            smoothed[t] = level
+        else:
+            level = np.mean(prefix[:m])
+            if len(prefix) == m:
+                trend = prefix[m-1] - prefix[m-2] if m >= 2 else 0
+            else:
+                trend = (np.mean(prefix[m:]) - np.mean(prefix[:m])) / m
+            seasonal = [prefix[i] - level for i in range(m)]
+            for i in range(m, len(prefix)):
+                last_level = level
+                last_trend = trend
+                seasonal_index = (i - m) % m
+                level = alpha * (prefix[i] - seasonal[seasonal_index]) + (1 - alpha) * (last_level + last_trend)
+                trend = beta * (level - last_level) + (1 - beta) * last_trend
+                seasonal[seasonal_index] = gamma * (prefix[i] - level) + (1 - gamma) * seasonal[seasonal_index]
+            smoothed[t] = level + trend + seasonal[(len(prefix)-m) % m]
+    return smoothed
+
+
+@pytest.fixture
+def nav_series():
+    """模拟的基金净值序列（按时间正序）"""
+    rng = np.random.default_rng(7)
+    return np.cumprod(1 + rng.normal(0.0003, 0.012, 400))
+
+
+class TestHoltWintersRollingSmooth:
+    """线性时间HoltWinters引擎与原始实现的等价性测试"""
+
+    @pytest.mark.parametrize("params", [
+        (0.2, 0.02, 0.2, 12),
+        (0.1018, 0.00455, 0.0861, 13),
+        (0.5, 0.5, 1.0, 7),
+        (0.05, 0.01, 0.2, 24),
+        (0.3, 0.1, 0.3, 1),
+        (0.3, 0.1, 0.3, 2),
+    ])
+    def test_matches_reference(self, nav_series, params):
+        alpha, beta, gamma, m = params
+        expected = reference_holtwinters_rolling(nav_series, alpha, beta, gamma, m)
+        result = HoltWintersIndicator.rolling_smooth(nav_series, alpha, beta, gamma, m)
+        np.testing.assert_allclose(result, expected, rtol=1e-10, atol=1e-12)
+
+    @pytest.mark.parametrize("n", [1, 2, 5, 11, 12, 13, 14])
+    def test_short_series(self, n):
+        data = np.linspace(1.0, 1.5, n)
+        expected = reference_holtwinters_rolling(data, 0.2, 0.02, 0.2, 12)
+        result = HoltWintersIndicator.rolling_smooth(data, 0.2, 0.02, 0.2, 12)
+        np.testing.assert_allclose(result, expected, rtol=1e-12)
+
+    def test_empty_series(self):
+        assert len(HoltWintersIndicator.rolling_smooth([], 0.2, 0.02, 0.2, 12)) == 0
+
+    def test_extended_funcinfo_uses_equivalent_engine(self, nav_series):
+        """ExtendedFuncInfo.factor_cal_holtwinters 与原始实现一致（含估计值）"""
+        fund = ExtendedFuncInfo(code='000000', name='测试')
+        fund._unit_value_ls = nav_series[::-1].tolist()
+        fund.factor_holtwinters_parameter = {'alpha': 0.2, 'beta': 0.02, 'gamma': 0.2, 'season_length': 12}
+        fund.estimate_able = True
+        fund.estimate_value = fund._unit_value_ls[0] * 1.01
+        fund.factor_cal_holtwinters()
+
+        arr = np.concatenate([nav_series, [fund.estimate_value]])
+        expected = reference_holtwinters_rolling(arr, 0.2, 0.02, 0.2, 12)
+        np.testing.assert_allclose(fund.factor_holtwinters[::-1], expected[:-1], rtol=1e-10)
+        assert fund.factor_holtwinters_estimate == pytest.approx(expected[-1], rel=1e-10)
+
+    def test_indicator_calculate_matches_reference(self, nav_series):
+        data = nav_series[::-1].tolist()
+        result = HoltWintersIndicator.calculate(data, 0.1, 0.01, 0.1, 12)
+        expected = reference_holtwinters_rolling(nav_series, 0.1, 0.01, 0.1, 12)[::-1]
+        np.testing.assert_allclose(result.smoothed_values, expected, rtol=1e-10)
+
+
+class TestHoltWintersBatch:
+    """批量HoltWinters核测试"""
+
+    @pytest.mark.parametrize("n_params", [3, 40])
+    def test_batch_matches_single(self, nav_series, n_params):
+        rng = np.random.default_rng(1)
+        params = np.column_stack([
+            rng.uniform(0.01, 0.5, n_params),
+            rng.uniform(0.0001, 0.5, n_params),
+            rng.uniform(0.0001, 1.0, n_params),
+        ])
+        result = HoltWintersIndicator.rolling_smooth_batch(nav_series, params, 18)
+        assert result.shape == (n_params, len(nav_series))
+        for k in range(n_params):
+            expected = HoltWintersIndicator.rolling_smooth(nav_series, *params[k], 18)
+            np.testing.assert_allclose(result[k], expected, rtol=1e-10, atol=1e-12)
+
+    def test_batch_pairs_series_with_params(self, nav_series):
+        series = np.vstack([nav_series * (1 + 0.01 * k) for k in range(16)])
+        params = np.tile([0.2, 0.02, 0.2], (16, 1))
+        params[:, 0] = np.linspace(0.05, 0.5, 16)
+        result = HoltWintersIndicator.rolling_smooth_batch(series, params, 12)
+        for k in (0, 7, 15):
+            expected = HoltWintersIndicator.rolling_smooth(series[k], *params[k], 12)
+            np.testing.assert_allclose(result[k], expected, rtol=1e-10)
+
+    def test_batch_short_series(self):
+        data = np.linspace(1.0, 1.2, 5)
+        params = np.tile([0.2, 0.02, 0.2], (20, 1))
+        result = HoltWintersIndicator.rolling_smooth_batch(data, params, 12)
+        expected = reference_holtwinters_rolling(data, 0.2, 0.02, 0.2, 12)
+        np.testing.assert_allclose(result[0], expected)
+
+    @pytest.mark.parametrize("n_rows", [3, 16])
+    def test_batch_states_match_from_series(self, nav_series, n_rows):
+        """各行在自身有效长度处的递推状态与 from_series 一致，之后的NaN不影响状态"""
+        lengths = np.linspace(5, len(nav_series), n_rows).astype(int)
+        series = np.full((n_rows, len(nav_series)), np.nan)
+        for k, n in enumerate(lengths):
+            series[k, :n] = nav_series[:n]
+        params = np.column_stack([np.linspace(0.05, 0.5, n_rows), np.full(n_rows, 0.02), np.full(n_rows, 0.2)])
+        _, states = HoltWintersIndicator.rolling_smooth_batch(series, params, 12, lengths=lengths, return_state=True)
+        for k, n in enumerate(lengths):
+            expected, _ = HoltWintersState.from_series(nav_series[:n], *params[k], 12)
+            assert states[k].count == n and states[k].fingerprint == expected.fingerprint
+            np.testing.assert_allclose(states[k].seasonal, expected.seasonal, rtol=1e-10)
+            assert states[k].copy().update(1.0)[0] == pytest.approx(expected.copy().update(1.0)[0], rel=1e-10)
+        with pytest.raises(ValueError):
+            HoltWintersIndicator.rolling_smooth_batch(series, params, 12, lengths=lengths[:-1], return_state=True)
+
+    def test_batch_shape_mismatch(self, nav_series):
+        series = np.vstack([nav_series, nav_series])
+        with pytest.raises(ValueError):
+            HoltWintersIndicator.rolling_smooth_batch(series, np.ones((3, 3)) * 0.1, 12)
+
+
+class TestHoltWintersState:
+    """HoltWinters递推状态测试"""
+
+    def test_update_matches_full_recompute(self, nav_series):
+        state, fitted = HoltWintersState.from_series(nav_series[:300], 0.2, 0.02, 0.2, 12)
+        new_fitted = [state.update(x) for x in nav_series[300:]]
+        expected = HoltWintersIndicator.rolling_smooth(nav_series, 0.2, 0.02, 0.2, 12)
+        np.testing.assert_allclose(fitted, expected[:300], rtol=1e-12)
+        np.testing.assert_allclose([f for f, _ in new_fitted], expected[300:], rtol=1e-12)
+        np.testing.assert_allclose([d for _, d in new_fitted], nav_series[300:] - expected[300:], rtol=1e-10)
+        assert state.count == len(nav_series)
+
+    def test_update_through_initialization(self, nav_series):
+        """从空状态开始逐点追加，跨过季节周期初始化点"""
+        state = HoltWintersState(alpha=0.3, beta=0.1, gamma=0.3, season_length=5)
+        fitted = [state.update(x)[0] for x in nav_series[:20]]
+        expected = reference_holtwinters_rolling(nav_series[:20], 0.3, 0.1, 0.3, 5)
+        np.testing.assert_allclose(fitted, expected, rtol=1e-12)
+
+    def test_save_and_load(self, nav_series, tmp_path):
+        state, _ = HoltWintersState.from_series(nav_series, 0.2, 0.02, 0.2, 12)
+        path = tmp_path / 'state.json'
+        state.save(str(path))
+        loaded = HoltWintersState.load(str(path))
+        assert loaded == state
+        assert loaded.matches(0.2, 0.02, 0.2, 12)
+        assert not loaded.matches(0.2, 0.02, 0.3, 12)
+
+    def test_calculate_extends_previous_result(self, nav_series):
+        data = nav_series[::-1].tolist()
+        previous = HoltWintersIndicator.calculate(data[5:], 0.2, 0.02, 0.2, 12)
+        result = HoltWintersIndicator.calculate(data, 0.2, 0.02, 0.2, 12, estimate_value=data[0] * 1.01, previous=previous)
+        full = HoltWintersIndicator.calculate(data, 0.2, 0.02, 0.2, 12, estimate_value=data[0] * 1.01)
+        np.testing.assert_allclose(result.smoothed_values, full.smoothed_values, rtol=1e-12)
+        assert result.estimate_value == pytest.approx(full.estimate_value, rel=1e-12)
+        # 上一次的结果不应被修改
+        assert previous.state.count == len(data) - 5
+
+    def test_calculate_recomputes_when_history_revised(self, nav_series):
+        data = nav_series[::-1].tolist()
+        previous = HoltWintersIndicator.calculate(data[5:], 0.2, 0.02, 0.2, 12)
+        # 历史中间的一个净值被修正（如分红调整），最后处理的数据不变
+        revised = list(data)
+        revised[len(data) // 2] *= 1.05
+        result = HoltWintersIndicator.calculate(revised, 0.2, 0.02, 0.2, 12, previous=previous)
+        full = HoltWintersIndicator.calculate(revised, 0.2, 0.02, 0.2, 12)
+        np.testing.assert_allclose(result.smoothed_values, full.smoothed_values, rtol=1e-12)
+        assert result.state.fingerprint == full.state.fingerprint
+
+    def test_extended_funcinfo_incremental_update(self, nav_series, tmp_path):
+        """保存状态后新增一天数据，只需增量计算"""
+        from datetime import datetime, timedelta
+        dates = [datetime(2020, 1, 1) + timedelta(days=i) for i in range(len(nav_series))]
+        params = {'alpha': 0.2, 'beta': 0.02, 'gamma': 0.2, 'season_length': 12}
+
+        fund = ExtendedFuncInfo(code='000000', name='测试')
+        fund._date_ls = dates[:-1][::-1]
+        fund._unit_value_ls = nav_series[:-1][::-1].tolist()
+        fund.factor_holtwinters_parameter = params
+        fund.factor_cal_holtwinters()
+        state_file = str(tmp_path / '000000_hwstate.json')
+        fund.save_holtwinters_state(state_file)
+
+        # 次日重新加载数据（多了一天），再加载状态
+        fund.clear_data_extended()
+        fund._date_ls = dates[::-1]
+        fund._unit_value_ls = nav_series[::-1].tolist()
+        fund.factor_holtwinters_parameter = params
+        assert fund.load_holtwinters_state(state_file)
+        fund.factor_cal_holtwinters()
+
+        expected = HoltWintersIndicator.rolling_smooth(nav_series, 0.2, 0.02, 0.2, 12)[::-1]
+        np.testing.assert_allclose(fund.factor_holtwinters, expected, rtol=1e-12)
+        assert fund.factor_holtwinters_state.count == len(nav_series)
+
+    def test_extended_funcinfo_parameter_change_recomputes(self, nav_series):
+        fund = ExtendedFuncInfo(code='000000', name='测试')
+        fund._unit_value_ls = nav_series[::-1].tolist()
+        fund.factor_holtwinters_parameter = {'alpha': 0.2, 'beta': 0.02, 'gamma': 0.2, 'season_length': 12}
+        fund.factor_cal_holtwinters()
+        fund.factor_holtwinters_parameter = {'alpha': 0.1, 'beta': 0.02, 'gamma': 0.2, 'season_length': 12}
+        fund.factor_cal_holtwinters()
+        expected = HoltWintersIndicator.rolling_smooth(nav_series, 0.1, 0.02, 0.2, 12)[::-1]
+        np.testing.assert_allclose(fund.factor_holtwinters, expected, rtol=1e-12)
+
+
+def reference_delta_percentage(delta_values, estimate_delta=None):
+    """原始的O(n²)实现：逐日统计后续半窗口内的较小值个数"""
+    n = len(delta_values)
+    result = []
+    for i in range(n):
+        if i > n - 3:
+            result.append(0)
+        else:
+            len_i = (n - i) // 2
+            sublist = delta_values[i+1:i+1+len_i]
+            result.append((float(len([x for x in sublist if x < delta_values[i]])) / float(len(sublist))) * 2 - 1)
+    estimate = None
+    if estimate_delta is not None:
+        lendata = (n - 1) // 2
+        sublist = delta_values[0:lendata]
+        estimate = (float(len([x for x in sublist if x < estimate_delta])) / float(len(sublist))) * 2 - 1
+    return result, estimate
+
+
+class TestDeltaPercentage:
+    """树状数组秩统计与原始实现的等价性测试"""
+
+    @pytest.mark.parametrize("n", [3, 4, 5, 10, 11, 400])
+    def test_matches_reference(self, n):
+        rng = np.random.default_rng(n)
+        delta = rng.normal(0, 0.01, n).tolist()
+        result, estimate = HoltWintersIndicator.calculate_delta_percentage(delta, 0.003)
+        expected, expected_estimate = reference_delta_percentage(delta, 0.003)
+        assert result == expected
+        assert estimate == expected_estimate
+
+    def test_ties(self):
+        rng = np.random.default_rng(3)
+        delta = rng.integers(-3, 4, 200).astype(float).tolist()
+        result, estimate = HoltWintersIndicator.calculate_delta_percentage(delta, 0.0)
+        expected, expected_estimate = reference_delta_percentage(delta, 0.0)
+        assert result == expected
+        assert estimate == expected_estimate
+
+    def test_short_and_empty(self):
+        assert HoltWintersIndicator.calculate_delta_percentage([]) == ([], None)
+        assert HoltWintersIndicator.calculate_delta_percentage([0.1, 0.2], 0.3) == ([0, 0], 0)
+
+    def test_extended_funcinfo_matches_reference(self, nav_series):
+        fund = ExtendedFuncInfo(code='000000', name='测试')
+        fund._unit_value_ls = nav_series[::-1].tolist()
+        fund.factor_holtwinters_parameter = {'alpha': 0.2, 'beta': 0.02, 'gamma': 0.2, 'season_length': 12}
+        fund.estimate_able = True
+        fund.estimate_value = fund._unit_value_ls[0] * 1.01
+        fund.factor_cal_holtwinters()
+        fund.factor_cal_holtwinters_delta_percentage()
+
+        estimate_delta = fund.estimate_value - fund.factor_holtwinters_estimate
+        expected, expected_estimate = reference_delta_percentage(fund.factor_holtwinters_delta, estimate_delta)
+        assert fund.factor_holtwinters_delta_percentage == expected
+        assert fund.factor_holtwinters_estimate_delta == estimate_delta
+        assert fund.factor_holtwinters_estimate_delta_percentage == expected_estimate
+
+    def test_extended_funcinfo_estimate_fast_path(self, nav_series):
+        """盘中快速刷新与完整重算结果一致"""
+        params = {'alpha': 0.2, 'beta': 0.02, 'gamma': 0.2, 'season_length': 12}
+        fund = ExtendedFuncInfo(code='000000', name='测试')
+        fund._unit_value_ls = nav_series[::-1].tolist()
+        fund.factor_holtwinters_parameter = params
+        fund.factor_cal_holtwinters()
+        fund.factor_cal_holtwinters_delta_percentage()
+
+        fund.estimate_able = True
+        for change in [0.01, -0.02, 0.0]:
+            fund.estimate_value = fund._unit_value_ls[0] * (1 + change)
+            state = fund.factor_holtwinters_state
+            fund.factor_cal_holtwinters_estimate()
+            assert fund.factor_holtwinters_state is state  # 未重算历史
+
+            full = ExtendedFuncInfo(code='000000', name='测试')
+            full._unit_value_ls = list(fund._unit_value_ls)
+            full.factor_holtwinters_parameter = params
+            full.estimate_able = True
+            full.estimate_value = fund.estimate_value
+            full.factor_cal_holtwinters()
+            full.factor_cal_holtwinters_delta_percentage()
+            assert fund.factor_holtwinters_estimate == full.factor_holtwinters_estimate
+            assert fund.factor_holtwinters_estimate_delta == full.factor_holtwinters_estimate_delta
+            assert fund.factor_holtwinters_estimate_delta_percentage == full.factor_holtwinters_estimate_delta_percentage
+
+    def test_extended_funcinfo_estimate_fallback(self, nav_series):
+        """没有可用状态时退回完整计算"""
+        fund = ExtendedFuncInfo(code='000000', name='测试')
+        fund._unit_value_ls = nav_series[::-1].tolist()
+        fund.factor_holtwinters_parameter = {'alpha': 0.2, 'beta': 0.02, 'gamma': 0.2, 'season_length': 12}
+        fund.estimate_able = True
+        fund.estimate_value = fund._unit_value_ls[0] * 1.01
+        percentage = fund.factor_cal_holtwinters_estimate()
+        assert fund.factor_holtwinters_state is not None
+        assert len(fund.factor_holtwinters_delta_percentage) == len(nav_series)
+        assert percentage == fund.factor_holtwinters_estimate_delta_percentage
+
+
+def reference_sliding_average(arr, window):
+    """原始的逐窗口切片实现（两端使用较小窗口）"""
+    arr = np.asarray(arr, dtype=float)
+    n = arr.shape[0]
+    half = window // 2
+    result = np.empty_like(arr, dtype=float)
+    for i in range(n):
+        result[i] = arr[max(0, i - half):min(n, i + half + 1)].mean(axis=0)
+    return result
+
+
+class TestCenteredRollingMean:
+    """前缀和中心移动平均与原始实现的一致性测试"""
+
+    @pytest.mark.parametrize("window", [1, 4, 5, 30, 31])
+    def test_central_moving_average_matches_reference(self, nav_series, window):
+        data = nav_series.tolist()
+        result = TechnicalIndicators.central_moving_average(data, window)
+        half = window // 2
+        for i in range(len(data)):
+            lo = i - half if window % 2 == 1 else i - half + 1
+            if lo < 0 or i >= len(data) - half:
+                assert result[i] is None
+            else:
+                window_data = data[lo:i + half + 1]
+                assert result[i] == pytest.approx(sum(window_data) / len(window_data), rel=1e-12)
+
+    @pytest.mark.parametrize("window", [4, 5, 30])
+    def test_factor_cal_CMA_keeps_edges(self, nav_series, window):
+        fund = ExtendedFuncInfo(code='000000', name='测试')
+        fund._unit_value_ls = nav_series.tolist()
+        result = fund.factor_cal_CMA(window)
+        half = window // 2
+        expected = TechnicalIndicators.central_moving_average(fund._unit_value_ls, window)
+        assert all(v is None for v in result[:half])
+        assert all(v is None for v in result[len(result) - half:])
+        assert result[half:] == expected[half:]
+
+    def test_shrink_matches_sliding_average(self, nav_series):
+        matrix = np.column_stack([nav_series, nav_series[::-1]])
+        for window in [0, 1, 7, 30]:
+            np.testing.assert_allclose(
+                TechnicalIndicators.centered_rolling_mean(matrix, window, edge='shrink'),
+                reference_sliding_average(matrix, window), rtol=1e-12)
+
+    def test_nan_window_is_invalid(self):
+        data = np.array([1.0, 2.0, np.nan, 4.0, 5.0, 6.0, 7.0])
+        result = TechnicalIndicators.centered_rolling_mean(data, 3)
+        assert np.isnan(result[:4]).all()
+        np.testing.assert_allclose(result[4:6], [5.0, 6.0])
+        assert np.isnan(result[6])
+
+    def test_invalid_edge(self):
+        with pytest.raises(ValueError):
+            TechnicalIndicators.centered_rolling_mean([1.0, 2.0], 2, edge='wrap')
+
+    def test_batch_cal_CMA30_matches_single(self, nav_series):
+        funds = []
+        for length in [400, 250, 20]:
+            fund = ExtendedFuncInfo(code='000000', name='测试')
+            fund._unit_value_ls = nav_series[:length][::-1].tolist()
+            funds.append(fund)
+        ExtendedFuncInfo.batch_cal_CMA30(funds)
+        for fund in funds[:2]:
+            cma = fund.factor_cal_CMA(30)
+            assert len(fund.factor_CMA30) == len(cma)
+            for a, b in zip(fund.factor_CMA30, cma):
+                assert (a is None and b is None) or a == pytest.approx(b, rel=1e-12)
+            fund.factor_CMA30 = cma
+            assert fund.factor_fluctuationrateCMA30 == pytest.approx(fund.factor_cal_fluctuationrateCMA30(), rel=1e-10)
+        assert all(v is None for v in funds[2].factor_CMA30)
+        assert funds[2].factor_fluctuationrateCMA30 is None
@@ -0,0 +1,152 @@
+"""
+analysis.panel 模块测试
+验证因子面板的批量结果与逐个基金计算的结果一致
+"""
+
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dffc.analysis.panel import FactorPanel
+from dffc.core.extended_funcinfo import ExtendedFuncInfo
+
+
+@pytest.fixture
+def funds(make_fund):
+    rng = np.random.default_rng(11)
+    base = [datetime(2022, 1, 3) + timedelta(days=i) for i in range(300)]
+    result = []
+    specs = [
+        ('000001', base, {'alpha': 0.2, 'beta': 0.02, 'gamma': 0.2, 'season_length': 12}),
+        ('000002', base[40:], {'alpha': 0.1, 'beta': 0.01, 'gamma': 0.3, 'season_length': 12}),
+        ('000003', [d for i, d in enumerate(base) if i % 7 != 3], {'alpha': 0.3, 'beta': 0.05, 'gamma': 0.1, 'season_length': 18}),
+    ]
+    for code, dates, params in specs:
+        values = np.cumprod(1 + rng.normal(0.0003, 0.012, len(dates))).tolist()
+        result.append(make_fund(code, dates, values, params))
+    return result
+
+
+def assert_fund_factors_match(panel, fund, make_fund):
+    """面板结果与 ExtendedFuncInfo 逐个计算的结果一致"""
+    single = make_fund(fund.code, fund._date_ls[::-1], fund._unit_value_ls[::-1], fund.factor_holtwinters_parameter)
+    single.factor_cal_holtwinters()
+    single.factor_cal_holtwinters_delta_percentage()
+    cma = single.factor_cal_CMA(30)
+
+    j = panel.fund_index(fund.code)
+    rows = [panel.date_index(date) for date in single._date_ls]
+    np.testing.assert_allclose(panel.nav[rows, j], single._unit_value_ls)
+    np.testing.assert_allclose(panel.holtwinters[rows, j], single.factor_holtwinters, rtol=1e-10)
+    np.testing.assert_allclose(panel.holtwinters_delta[rows, j], single.factor_holtwinters_delta, atol=1e-10)
+    np.testing.assert_array_equal(panel.holtwinters_delta_percentage[rows, j], single.factor_holtwinters_delta_percentage)
+    expected_cma = np.array([np.nan if v is None else v for v in cma])
+    np.testing.assert_allclose(panel.cma30[rows, j], expected_cma, rtol=1e-12)
+    single.factor_CMA30 = cma
+    assert panel.fluctuation_rate[j] == pytest.approx(single.factor_cal_fluctuationrateCMA30(), rel=1e-10)
+
+
+class TestFactorPanel:
+
+    def test_alignment(self, funds):
+        panel = FactorPanel(funds)
+        assert panel.codes == ['000001', '000002', '000003']
+        assert len(panel.dates) == 300
+        assert np.all(np.diff(panel.dates.astype(np.int64)) > 0)
+        # 第二个基金前40天没有数据
+        assert np.isnan(panel.nav[:40, 1]).all()
+        assert not np.isnan(panel.nav[40:, 1]).any()
+        # 第三个基金部分日期缺失
+        assert np.isnan(panel.nav[3, 2])
+
+    def test_factors_match_single_fund(self, funds, make_fund):
+        panel = FactorPanel(funds).compute()
+        for fund in funds:
+            assert_fund_factors_match(panel, fund, make_fund)
+
+    def test_batch_kernel_path(self, make_fund):
+        """同一季节长度的基金足够多时走批量递推"""
+        rng = np.random.default_rng(5)
+        dates = [datetime(2022, 1, 3) + timedelta(days=i) for i in range(200)]
+        funds = []
+        for k in range(14):
+            values = np.cumprod(1 + rng.normal(0.0, 0.01, 200 - k)).tolist()
+            params = {'alpha': 0.05 + 0.02 * k, 'beta': 0.01, 'gamma': 0.2, 'season_length': 13}
+            funds.append(make_fund(f'{k:06d}', dates[k:], values, params))
+        panel = FactorPanel(funds).compute()
+        for fund in funds[::5]:
+            assert_fund_factors_match(panel, fund, make_fund)
+
+    def test_apply_to_funds(self, funds, make_fund):
+        panel = FactorPanel(funds).compute()
+        panel.apply_to_funds()
+        fund = funds[1]
+        single = make_fund(fund.code, fund._date_ls[::-1], fund._unit_value_ls[::-1], fund.factor_holtwinters_parameter)
+        single.factor_cal_holtwinters()
+        single.factor_cal_holtwinters_delta_percentage()
+        np.testing.assert_allclose(fund.factor_holtwinters, single.factor_holtwinters, rtol=1e-10)
+        assert fund.factor_holtwinters_delta_percentage == single.factor_holtwinters_delta_percentage
+        assert len(fund.factor_CMA30) == len(fund._unit_value_ls)
+        assert fund.factor_CMA30[0] is None
+        assert fund.factor_fluctuationrateCMA30 == pytest.approx(panel.fluctuation_rate[1])
+        assert fund.factor_holtwinters_delta_sorted_head == sorted(single.factor_holtwinters_delta[:(len(fund._unit_value_ls) - 1) // 2])
+
+    def test_apply_to_funds_enables_fast_estimate(self, funds, make_fund):
+        """apply_to_funds 后 factor_cal_holtwinters_estimate 直接在递推状态上推进，不重算历史"""
+        panel = FactorPanel(funds).compute()
+        panel.apply_to_funds()
+        for fund in funds:
+            fund.estimate_able = True
+            fund.estimate_value = fund._unit_value_ls[0] * 1.01
+            single = make_fund(fund.code, fund._date_ls[::-1], fund._unit_value_ls[::-1], fund.factor_holtwinters_parameter)
+            single.estimate_able = True
+            single.estimate_value = fund.estimate_value
+            expected = single.factor_cal_holtwinters_estimate()
+
+            with patch.object(ExtendedFuncInfo, 'factor_cal_holtwinters', side_effect=AssertionError("不应重算")):
+                result = fund.factor_cal_holtwinters_estimate()
+            assert result == pytest.approx(expected)
+            assert fund.factor_holtwinters_estimate == pytest.approx(single.factor_holtwinters_estimate, rel=1e-10)
+
+    def test_index_helpers(self, funds):
+        panel = FactorPanel(funds).compute()
+        date = funds[0]._date_ls[0]
+        assert panel.get('nav', date, '000001') == funds[0]._unit_value_ls[0]
+        assert panel.get('nav', '2022-01-03', '000002') is None
+        with pytest.raises(ValueError):
+            panel.fund_index('999999')
+        with pytest.raises(ValueError):
+            panel.date_index('1999-01-01')
+        with pytest.raises(ValueError):
+            panel.factor('unknown')
+
+    def test_factor_before_compute(self, funds):
+        panel = FactorPanel(funds)
+        with pytest.raises(ValueError):
+            panel.factor('holtwinters')
+        with pytest.raises(ValueError):
+            panel.apply_to_funds()
+
+    def test_from_config(self, funds, make_fund, tmp_path):
+        config = []
+        for fund in funds:
+            df = pd.DataFrame({
+                '净值日期': [d.strftime('%Y-%m-%d') for d in fund._date_ls],
+                '单位净值': fund._unit_value_ls,
+                '累计净值': fund._unit_value_ls,
+                '日增长率': [''] * len(fund._date_ls),
+            })
+            df.to_csv(tmp_path / f'{fund.code}.csv')
+            config.append({'code': fund.code, 'name': fund.name, 'params': fund.factor_holtwinters_parameter})
+        config.append({'code': '999999', 'name': '无数据', 'params': funds[0].factor_holtwinters_parameter})
+        config_path = tmp_path / 'fund_config.json'
+        config_path.write_text(json.dumps(config, ensure_ascii=False), encoding='utf-8')
+
+        panel = FactorPanel.from_config(str(config_path), str(tmp_path)).compute()
+        assert panel.codes == ['000001', '000002', '000003']
+        for fund in funds:
+            assert_fund_factors_match(panel, fund, make_fund)
@@ -11,7 +11,9 @@ from datetime import datetime, timedelta
 from unittest.mock import Mock, patch, MagicMock
 
 import dffc
-from dffc.backtest.backtest_funcinfo import BackTestFuncInfo
+from dffc.backtest.backtest_funcinfo import BackTestFuncInfo, PointInTimeView
+from dffc.backtest.ledger import AssetLedger
+from dffc.backtest.events import EventLog
 from dffc.core.extended_funcinfo import ExtendedFuncInfo
 
 
@@ -512,6 +514,129 @@ class TestBackTestFuncInfo:
         assert 'holding_rate' in result
 
 
+    def test_cal_strategy_list_point_in_time_views(self, multi_fund_backtest, mock_fund1):
+        """策略列表是从当前日期开始的只读视图，与切片结果一致且不含未来数据"""
+        multi_fund_backtest.current_date = datetime(2023, 1, 10)
+        multi_fund_backtest.cal_strategy_list()
+        idx = mock_fund1._date2idx_map['2023-01-10']
+        values = multi_fund_backtest.strategy_unit_value_list[0]
+        dates = multi_fund_backtest.strategy_date_list[0]
+
+        assert isinstance(values, PointInTimeView)
+        assert values == mock_fund1._unit_value_ls[idx:]
+        assert values.copy() == mock_fund1._unit_value_ls[idx:]
+        assert dates[0] == datetime(2023, 1, 10)
+        assert values[0] == mock_fund1._unit_value_ls[idx]
+        assert values[-1] == mock_fund1._unit_value_ls[-1]
+        assert values[1:20] == mock_fund1._unit_value_ls[idx + 1:idx + 20]
+        assert values[5:1:-1] == mock_fund1._unit_value_ls[idx + 5:idx + 1:-1]
+        assert len(values) == len(mock_fund1._unit_value_ls) - idx
+        np.testing.assert_array_equal(np.array(values), mock_fund1._unit_value_ls[idx:])
+        assert list(multi_fund_backtest.strategy_factor_list[1]) == [0.1] * len(values)
+        # 无法访问未来数据，也无法修改原始数据
+        with pytest.raises(IndexError):
+            values[len(values)]
+        with pytest.raises(IndexError):
+            values[-len(values) - 1]
+        with pytest.raises(TypeError):
+            values[0] = 1.0
+
+    def test_cal_strategy_list_does_not_copy_funds(self, basic_backtest):
+        """构建策略列表时不再复制基金对象"""
+        basic_backtest.current_date = datetime(2023, 1, 10)
+        with patch('dffc.backtest.backtest_funcinfo.deepcopy', side_effect=AssertionError):
+            basic_backtest.cal_strategy_list()
+
+    @patch('builtins.print')
+    def test_run_iterates_trading_calendar(self, mock_print, multi_fund_backtest, mock_fund2):
+        """回测只遍历交易日，缺失数据的基金使用最近交易日的净值"""
+        for fund in multi_fund_backtest.fund_list:
+            del fund._date2idx_map['2023-01-07']  # 所有基金都没有数据：非交易日
+        del mock_fund2._date2idx_map['2023-01-09']  # 仅基金2没有数据
+        multi_fund_backtest.strategy_func = lambda: (
+            [multi_fund_backtest.current_date, [0, 2, 1.0, 1.0]]
+            if multi_fund_backtest.current_date == multi_fund_backtest.start_date else None)
+
+        multi_fund_backtest.run()
+
+        dates = [record[0] for record in multi_fund_backtest.asset_list]
+        assert datetime(2023, 1, 7) not in dates
+        assert dates == [datetime(2023, 1, d) for d in (5, 6, 8, 9, 10, 11, 12, 13, 14, 15)]
+        shares = multi_fund_backtest.asset_list[0][1][2]
+        record = multi_fund_backtest.asset_list[dates.index(datetime(2023, 1, 9))]
+        expected = shares * mock_fund2._unit_value_ls[mock_fund2._date2idx_map['2023-01-08']]
+        assert abs(record[3][2] - expected) < 1e-12
+
+    @patch('builtins.print')
+    def test_asset_list_is_columnar_ledger(self, mock_print, basic_backtest):
+        """资产列表为列式账本，记录兼容旧格式且可以直接赋值普通列表"""
+        basic_backtest.run()
+
+        ledger = basic_backtest.asset_list
+        assert isinstance(ledger, AssetLedger)
+        assert ledger.shares.shape == (len(ledger), 2)
+        np.testing.assert_allclose(ledger.total_values(), [sum(record[3]) for record in ledger])
+        assert basic_backtest.current_asset[1][0] == ledger[-1][1][0]
+
+        records = ledger.tolist()
+        basic_backtest.asset_list = records
+        assert isinstance(basic_backtest.asset_list, AssetLedger)
+        assert basic_backtest.asset_list == records
+
+    @patch('builtins.print')
+    def test_result_info_dict_extended_and_cached(self, mock_print, basic_backtest):
+        """结果信息包含扩展指标，重复调用使用缓存"""
+        basic_backtest.run()
+        result = basic_backtest.result_info_dict()
+        for key in ('annualized_return', 'annualized_volatility', 'sortino_ratio', 'calmar_ratio',
+                    'turnover', 'max_drawdown_duration', 'drawdown_duration_histogram'):
+            assert key in result
+        # 第一天全仓买入，成交金额等于初始资金
+        total = basic_backtest.asset_list.total_values()
+        assert result['turnover'] == pytest.approx(1.0 / total.mean())
+
+        with patch('dffc.backtest.backtest_funcinfo.BacktestMetrics.compute') as mock_compute:
+            assert basic_backtest.result_info_dict() == result
+            mock_compute.assert_not_called()
+        # 账本变化后重新计算
+        basic_backtest.asset_list = basic_backtest.asset_list.tolist()[:3]
+        assert basic_backtest.result_info_dict()['final_value'] == pytest.approx(total[2])
+
+    def test_quiet_mode_and_events(self, basic_backtest, tmp_path, capsys):
+        """verbose=0 时不输出，交易写入结构化事件日志"""
+        basic_backtest.verbose = 0
+        basic_backtest.event_log_path = str(tmp_path / 'events.npz')
+        basic_backtest.run()
+
+        assert capsys.readouterr().out == ''
+        assert len(basic_backtest.events) == 1
+        event = basic_backtest.events[0]
+        assert (event.kind, event.sellfund, event.buyfund) == ('trade', 0, 1)
+        assert event.date == basic_backtest.start_date
+        assert len(EventLog.load(basic_backtest.event_log_path)) == 1
+
+    def test_summary_only_verbosity(self, basic_backtest, capsys):
+        """verbose=1 时只输出回测统计，不逐日输出"""
+        basic_backtest.verbose = 1
+        basic_backtest.run()
+        out = capsys.readouterr().out
+        assert 'Current Date' not in out
+        assert '回测统计信息' in out
+
+    def test_error_event(self, basic_backtest):
+        """不合法的操作同时写入日志字符串和错误事件"""
+        basic_backtest.current_date = datetime(2023, 1, 5)
+        basic_backtest.current_asset = [datetime(2023, 1, 5), [1.0, 0], [1.0, 1.0], [1.0, 0]]
+        basic_backtest.trade_today = [datetime(2023, 1, 5), [0, 5, 0.5, 1.0]]
+        basic_backtest.nonefund_list = []
+
+        assert basic_backtest.operation() is False
+        assert basic_backtest.log[-1] == "Error: Fund index out of range at 2023-01-05"
+        event = basic_backtest.events[-1]
+        assert (event.kind, event.sellfund, event.buyfund, event.shares) == ('error', 0, 5, 0.5)
+        assert event.message == "Fund index out of range"
+
+
 if __name__ == '__main__':
     # 运行测试
     pytest.main([__file__, '-v', '--tb=short'])
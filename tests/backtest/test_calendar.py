@@ -0,0 +1,64 @@
+"""
+TradingCalendar 测试
+"""
+
+import pytest
+import numpy as np
+from datetime import datetime
+
+from dffc.backtest.calendar import TradingCalendar
+
+
+@pytest.fixture
+def funds(make_fund):
+    fund_a = make_fund('A', ['2023-01-02', '2023-01-03', '2023-01-05'], [1.0, 1.1, 1.2])
+    fund_b = make_fund('B', ['2023-01-03', '2023-01-04', '2023-01-06'], [2.0, 2.1, 2.2])
+    return [fund_a, fund_b]
+
+
+class TestTradingCalendar:
+    def test_union_dates(self, funds):
+        calendar = TradingCalendar(funds)
+        assert calendar.date_strs == ['2023-01-02', '2023-01-03', '2023-01-04', '2023-01-05', '2023-01-06']
+        assert calendar.dates[0] == datetime(2023, 1, 2)
+        assert len(calendar) == 5
+
+    def test_forward_filled_index_and_prices(self, funds):
+        calendar = TradingCalendar(funds)
+        # 基金B在第一天之前没有数据
+        assert calendar.fund_index[0, 1] == -1
+        assert np.isnan(calendar.prices[0, 1])
+        np.testing.assert_array_equal(calendar.prices[:, 0], [1.0, 1.1, 1.1, 1.2, 1.2])
+        np.testing.assert_array_equal(calendar.prices[1:, 1], [2.0, 2.1, 2.1, 2.2])
+        # 下标指向基金自身（最新在前）的净值列表
+        fund_a = funds[0]
+        for row in range(len(calendar)):
+            assert fund_a._unit_value_ls[calendar.fund_index[row, 0]] == calendar.prices[row, 0]
+
+    def test_price_list_and_nonefund_list(self, funds):
+        calendar = TradingCalendar(funds)
+        assert calendar.price_list(0) == [1.0, None]
+        assert calendar.price_list(2) == [1.1, 2.1]
+        assert calendar.nonefund_list(0) == [2]
+        assert calendar.nonefund_list(2) == [1]
+        assert calendar.nonefund_list(1) == []
+
+    def test_row_lookup(self, funds):
+        calendar = TradingCalendar(funds)
+        assert calendar.row('2023-01-04') == 2
+        assert calendar.row(datetime(2023, 1, 4)) == 2
+        # 非交易日取之前最近的交易日
+        assert calendar.row('2023-01-08') == 4
+        assert calendar.row('2023-01-01') == -1
+        assert calendar.price_list(-1) == [None, None]
+
+    def test_trading_rows(self, funds):
+        calendar = TradingCalendar(funds)
+        assert list(calendar.trading_rows(datetime(2023, 1, 1), datetime(2023, 1, 3))) == [0, 1]
+        assert list(calendar.trading_rows(datetime(2023, 1, 4), datetime(2023, 1, 30))) == [2, 3, 4]
+        assert list(calendar.trading_rows(datetime(2023, 2, 1), datetime(2023, 1, 1))) == []
+
+    def test_removed_date_is_not_trading_day(self, funds):
+        del funds[1]._date2idx_map['2023-01-04']
+        calendar = TradingCalendar(funds)
+        assert '2023-01-04' not in calendar.date_strs
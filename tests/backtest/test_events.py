@@ -0,0 +1,45 @@
+"""
+EventLog 测试
+"""
+
+import math
+import numpy as np
+from datetime import datetime
+
+from dffc.backtest.events import EventLog, BacktestEvent, EVENT_TRADE, EVENT_ERROR
+
+
+class TestEventLog:
+    def test_record_and_iterate(self):
+        log = EventLog()
+        log.record(datetime(2023, 1, 5), EVENT_TRADE, 0, 1, 0.5, 1.0)
+        log.record(datetime(2023, 1, 6), EVENT_ERROR, message='Negative asset')
+
+        assert len(log) == 2
+        assert log[0] == BacktestEvent(datetime(2023, 1, 5), EVENT_TRADE, 0, 1, 0.5, 1.0, '')
+        error = log.filter(EVENT_ERROR)[0]
+        assert error.sellfund == -1 and math.isnan(error.shares)
+        assert error.message == 'Negative asset'
+        assert [event.kind for event in log] == [EVENT_TRADE, EVENT_ERROR]
+
+    def test_to_frame(self):
+        log = EventLog()
+        log.record(datetime(2023, 1, 5), EVENT_TRADE, 0, 2, 0.25, 2.0)
+        df = log.to_frame()
+        assert list(df.columns) == list(EventLog.COLUMNS)
+        assert df.loc[0, 'buyfund'] == 2
+        assert df.loc[0, 'date'] == datetime(2023, 1, 5)
+
+    def test_flush_and_load(self, tmp_path):
+        log = EventLog()
+        assert log.flush(str(tmp_path / 'empty.npz')) is None
+        log.record(datetime(2023, 1, 5), EVENT_TRADE, 0, 1, 0.5, 1.0)
+        log.record(datetime(2023, 1, 9), EVENT_TRADE, 1, 0, 0.2, 0.3)
+        path = log.flush(str(tmp_path / 'events.npz'))
+        assert len(log) == 0
+
+        df = EventLog.load(path)
+        assert len(df) == 2
+        np.testing.assert_array_equal(df['sellfund'], [0, 1])
+        np.testing.assert_allclose(df['shares'], [0.5, 0.2])
+        assert df.loc[1, 'date'] == np.datetime64('2023-01-09T00:00:00')
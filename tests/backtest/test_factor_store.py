@@ -0,0 +1,92 @@
+"""
+PointInTimeFactorStore 测试
+"""
+
+import pytest
+import numpy as np
+from datetime import datetime
+
+from dffc.analysis.indicators import TechnicalIndicators
+from dffc.backtest.backtest_funcinfo import BackTestFuncInfo
+from dffc.backtest.factor_store import PointInTimeFactorStore
+
+PARAMS = {'alpha': 0.2, 'beta': 0.05, 'gamma': 0.1, 'season_length': 5}
+
+
+def centered_mean(fund, values):
+    """居中移动平均：用到了之后的数据"""
+    return TechnicalIndicators.central_moving_average(values, 6)
+
+
+class CheckStrategy(BackTestFuncInfo):
+    """每天比较 factor() 与 strategy_factor_list，不交易"""
+    verbose = 0
+
+    def __init__(self, fund_list, start_date, end_date):
+        super().__init__(fund_list, start_date, end_date)
+        self.checked = 0
+
+    def strategy_func(self):
+        for i, factors in enumerate(self.strategy_factor_list):
+            if factors is None:
+                assert self.factor(i) is None
+                continue
+            for lag in (0, 1, 5, -1):
+                assert self.factor(i, lag) == factors[lag]
+            self.checked += 1
+        return None
+
+
+@pytest.fixture
+def funds(make_funds):
+    # 第二只基金缺少部分交易日
+    return make_funds(n_days=120, seed=8,
+                      dates_for=lambda k, dates: dates if k == 0 else [d for i, d in enumerate(dates) if i % 6 != 2],
+                      params=PARAMS, compute=True)
+
+
+class TestPointInTimeFactorStore:
+    def test_hdp_compute_matches_fund(self, funds):
+        store = PointInTimeFactorStore(funds).add('hdp', PointInTimeFactorStore.holtwinters_delta_percentage)
+        for j, fund in enumerate(funds):
+            np.testing.assert_allclose(store.series('hdp', j), fund.factor_holtwinters_delta_percentage)
+
+    def test_hdp_passes_audit(self, funds):
+        store = PointInTimeFactorStore.default(funds)
+        assert store.audit(PointInTimeFactorStore.HDP, sample=40, seed=1) == []
+
+    def test_audit_detects_lookahead(self, funds):
+        store = PointInTimeFactorStore(funds).add('cma', centered_mean)
+        violations = store.audit('cma', sample=60, seed=2)
+        assert violations
+        assert all(v.factor == 'cma' and v.stored is not None for v in violations)
+
+        # 非因果模式按截断数据计算，通过审计
+        store.add('cma_pit', centered_mean, causal=False)
+        assert store.audit('cma_pit', sample=60, seed=2) == []
+        assert np.isnan(store.series('cma_pit', 0)).all()
+
+    def test_value_and_matrix(self, funds):
+        store = PointInTimeFactorStore.default(funds)
+        calendar = store.calendar
+        missing = int(np.flatnonzero(~calendar.has_data[:, 1])[0])
+        assert store.value(store.HDP, 1, missing) is None
+        assert store.value(store.HDP, 0, missing, lag=10 ** 6) is None
+        matrix = store.matrix(store.HDP)
+        assert matrix.shape == (len(calendar), 2)
+        # 向前填充：缺失日期取前一个净值日的值
+        assert matrix[missing, 1] == store.value(store.HDP, 1, missing - 1)
+
+    def test_missing_attribute(self, funds):
+        with pytest.raises(ValueError):
+            PointInTimeFactorStore(funds).add('x', attribute='no_such_factor')
+        with pytest.raises(ValueError):
+            PointInTimeFactorStore(funds).add('x')
+
+
+class TestBacktestFactorAccess:
+    def test_factor_matches_strategy_lists(self, funds):
+        backtest = CheckStrategy(funds, datetime(2023, 1, 10), datetime(2023, 4, 1))
+        backtest.run()
+        assert backtest.checked > 100
+        assert isinstance(backtest.factor_store, PointInTimeFactorStore)
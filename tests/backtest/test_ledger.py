@@ -0,0 +1,82 @@
+"""
+AssetLedger 测试
+"""
+
+import pytest
+import numpy as np
+from datetime import datetime
+
+from dffc.backtest.ledger import AssetLedger, LedgerRecord
+
+
+@pytest.fixture
+def records():
+    return [
+        [datetime(2023, 1, 5), [0.8, 0.2], None, [0.8, 0.2]],
+        [datetime(2023, 1, 6), [0.7, 0.3], None, [0.7, 0.315]],
+        [datetime(2023, 1, 9), [0.6, 0.4], None, [0.6, 0.44]],
+    ]
+
+
+class TestAssetLedger:
+    def test_append_and_compat_access(self):
+        ledger = AssetLedger(3, capacity=1)
+        ledger.append(datetime(2023, 1, 5), [1.0, 0, 0], [1.0, 0, 0])
+        record = ledger.append(datetime(2023, 1, 6), np.array([0.5, 0.25, 0.0]), [0.5, 0.5, 0.0])
+
+        assert len(ledger) == 2
+        assert isinstance(record, LedgerRecord)
+        assert record[0] == datetime(2023, 1, 6)
+        assert record[1][1] == 0.25
+        assert record[2] is None
+        assert sum(record[3]) == 1.0
+        assert ledger[-1] == record
+        assert ledger[0] == [datetime(2023, 1, 5), [1.0, 0.0, 0.0], None, [1.0, 0.0, 0.0]]
+        # 自动扩容后之前的记录保持不变
+        np.testing.assert_array_equal(ledger.shares, [[1.0, 0, 0], [0.5, 0.25, 0.0]])
+        np.testing.assert_array_equal(ledger.total_values(), [1.0, 1.0])
+
+    def test_from_records_roundtrip(self, records):
+        ledger = AssetLedger.from_records(records)
+        assert ledger.n_assets == 2
+        assert ledger == records
+        assert ledger.tolist() == records
+        assert [record[0] for record in ledger] == [r[0] for r in records]
+        assert len(ledger[1:]) == 2
+
+    def test_records_are_read_only(self, records):
+        ledger = AssetLedger.from_records(records)
+        with pytest.raises(ValueError):
+            ledger[0][1][0] = 5.0
+        with pytest.raises(TypeError):
+            ledger[0] = records[1]
+
+    def test_empty_ledger(self):
+        ledger = AssetLedger(2)
+        assert ledger == []
+        assert not ledger
+        with pytest.raises(IndexError):
+            ledger[-1]
+        with pytest.raises(ValueError):
+            AssetLedger.from_records([])
+        with pytest.raises(ValueError):
+            AssetLedger(0)
+
+    def test_clear_keeps_capacity(self, records):
+        ledger = AssetLedger.from_records(records)
+        ledger.reserve(100)
+        ledger.clear()
+        assert len(ledger) == 0
+        ledger.append(datetime(2023, 2, 1), [1.0, 0.0], [1.0, 0.0])
+        assert ledger[0][0] == datetime(2023, 2, 1)
+        assert len(ledger.dates) == 1
+
+    def test_extend(self, records):
+        ledger = AssetLedger.from_records(records[:1])
+        dates = [datetime(2023, 1, 6), datetime(2023, 1, 9)]
+        shares = np.array([[0.8, 0.2]] * 2)
+        ledger.extend(dates, shares, shares * [1.0, 1.5])
+        ledger.extend([], np.zeros((0, 2)), np.zeros((0, 2)))
+        assert len(ledger) == 3
+        assert list(ledger.dates) == [records[0][0]] + dates
+        assert ledger[-1] == [datetime(2023, 1, 9), [0.8, 0.2], None, [0.8, 0.30000000000000004]]
@@ -0,0 +1,121 @@
+"""
+BacktestMetrics 测试
+"""
+
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+
+from dffc.backtest.metrics import BacktestMetrics
+
+
+def reference_metrics(dates, values, cash, initial_value, end_date):
+    """逐元素循环的参考实现（原 result_info_dict 的算法）"""
+    peak = values[0]
+    peaks = []
+    for v in values:
+        if v > peak:
+            peak = v
+        peaks.append(peak)
+    drawdowns = [(v - p) / p if p != 0 else 0 for v, p in zip(values, peaks)]
+    trough_idx = drawdowns.index(min(drawdowns))
+    recovery_days = None
+    for idx in range(trough_idx + 1, len(values)):
+        if values[idx] >= peaks[trough_idx]:
+            recovery_days = (dates[idx] - dates[trough_idx]).days
+            break
+    if recovery_days is None:
+        recovery_days = (end_date - dates[trough_idx]).days
+    returns = [(values[i] - values[i - 1]) / values[i - 1] for i in range(1, len(values)) if values[i - 1] != 0]
+    sharpe = None
+    if len(returns) > 1 and np.std(returns, ddof=1) != 0:
+        sharpe = np.mean(returns) / np.std(returns, ddof=1) * np.sqrt(252)
+    return {
+        'final_value': values[-1],
+        'total_return': (values[-1] - initial_value) / initial_value * 100,
+        'maximum_drawdown': min(drawdowns) * 100,
+        'recovery_days': recovery_days,
+        'sharpe_ratio': sharpe,
+        'holding_rate': sum(cash) / sum(values),
+    }
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(7)
+    n = 500
+    dates = [datetime(2022, 1, 3) + timedelta(days=i) for i in range(n)]
+    values = np.cumprod(1 + rng.normal(0.0005, 0.01, n))
+    cash = values * rng.uniform(0, 0.5, n)
+    return dates, values, cash
+
+
+class TestBacktestMetrics:
+    def test_matches_reference(self, series):
+        dates, values, cash = series
+        end_date = dates[-1] + timedelta(days=3)
+        result = BacktestMetrics.compute(dates, values, cash, 1.0, dates[0], end_date, trade_count=4)
+        expected = reference_metrics(dates, values.tolist(), cash.tolist(), 1.0, end_date)
+        for key, value in expected.items():
+            assert result[key] == pytest.approx(value, rel=1e-12), key
+        assert result['trade_count'] == 4
+        assert result['start_date'] == '2022-01-03'
+
+    def test_extended_metrics(self, series):
+        dates, values, cash = series
+        result = BacktestMetrics.compute(dates, values, cash, 1.0, dates[0], dates[-1])
+        returns = np.diff(values) / values[:-1]
+        years = (dates[-1] - dates[0]).days / 365.0
+        assert result['annualized_return'] == pytest.approx((values[-1] ** (1 / years) - 1) * 100)
+        assert result['annualized_volatility'] == pytest.approx(returns.std(ddof=1) * np.sqrt(252) * 100)
+        downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2))
+        assert result['sortino_ratio'] == pytest.approx(returns.mean() / downside * np.sqrt(252))
+        assert result['calmar_ratio'] == pytest.approx(result['annualized_return'] / abs(result['maximum_drawdown']))
+        assert result['turnover'] is None
+        durations = BacktestMetrics.drawdown_durations(values)
+        assert sum(result['drawdown_duration_histogram'].values()) == len(durations)
+        assert result['max_drawdown_duration'] == durations.max()
+
+    def test_drawdown_durations(self):
+        equity = np.array([1.0, 1.1, 1.0, 0.9, 1.2, 1.1, 1.3, 1.2, 1.2])
+        np.testing.assert_array_equal(BacktestMetrics.drawdown_durations(equity), [2, 1, 2])
+        assert BacktestMetrics.drawdown_durations(np.array([1.0, 2.0, 3.0])).size == 0
+
+    def test_duration_histogram(self):
+        histogram = BacktestMetrics.duration_histogram(np.array([1, 4, 5, 30, 300]))
+        assert histogram == {'1-4': 2, '5-19': 1, '20-59': 1, '60-119': 0, '120-249': 0, '250+': 1}
+
+    def test_traded_value(self):
+        shares = np.array([[0.5, 0.5, 0.0], [0.5, 0.0, 0.25], [0.5, 0.0, 0.25]])
+        prices = np.array([[1.0, 1.0, 2.0], [1.0, 1.1, 2.2], [1.0, 1.2, np.nan]])
+        traded = BacktestMetrics.traded_value(shares, prices, initial_shares=[1.0, 0.0, 0.0])
+        # 第一天现金买入0.5，第二天基金1换基金2（按当日净值估算）
+        np.testing.assert_allclose(traded, [0.5, 0.5 * (0.5 * 1.1 + 0.25 * 2.2), 0.0])
+        result = BacktestMetrics.compute([datetime(2023, 1, d) for d in (2, 3, 4)], [1.0, 1.1, 1.2], [0.5] * 3,
+                                         1.0, datetime(2023, 1, 2), datetime(2023, 1, 4), traded_value=traded)
+        assert result['turnover'] == pytest.approx(traded.sum() / 1.1)
+
+    def test_degenerate_inputs(self):
+        assert BacktestMetrics.compute([], [], [], 1.0, datetime(2023, 1, 1), datetime(2023, 1, 2)) == {}
+        result = BacktestMetrics.compute([datetime(2023, 1, 5)], [0.0], [0.0], 1.0,
+                                         datetime(2023, 1, 5), datetime(2023, 1, 5))
+        assert result['holding_rate'] == 0
+        assert result['sharpe_ratio'] is None
+        assert result['annualized_return'] is None
+        assert result['calmar_ratio'] is None
+        assert result['max_drawdown_duration'] == 0
+
+    def test_array_helpers_match_rows(self):
+        rng = np.random.default_rng(2)
+        equity = np.cumprod(1 + rng.normal(0, 0.01, (4, 50)), axis=1)
+        equity[2] = 1.0  # 波动率为0
+        equity[3, 10] = 0.0  # 价值为0的次日收益率跳过
+        ratios = BacktestMetrics.return_ratios(equity)
+        for p in range(4):
+            row = BacktestMetrics.return_ratios(equity[p])
+            for batch, single in zip(ratios, row):
+                np.testing.assert_allclose(batch[p], single)
+        assert np.isnan(ratios[0][2]) and ratios[1][2] == 0
+        np.testing.assert_allclose(BacktestMetrics.annualized_return([1.0, 1.0, 1.0], [1.1, 0.0, 1.1], [365, 365, 0]),
+                                   [10.0, np.nan, np.nan])
+        assert np.isnan(BacktestMetrics.turnover([1.0], [0.0]))
@@ -0,0 +1,94 @@
+"""
+MultiStrategyRunner 测试
+"""
+
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from dffc.backtest.backtest_funcinfo import BackTestFuncInfo
+from dffc.backtest.multi import MultiStrategyRunner
+from dffc.core.extended_funcinfo import ExtendedFuncInfo
+
+
+class RebalanceStrategy(BackTestFuncInfo):
+    """第一天各买一半，之后按两个基金的价格动量每天小幅调仓"""
+    def strategy_func(self):
+        if self.current_date == self.start_date:
+            cash = self.current_asset[1][0]
+            return [self.current_date, [0, 1, cash / 2, cash / 2], [0, 2, cash / 2, cash / 2]]
+        momentum = [values[0] / values[min(5, len(values) - 1)] for values in self.strategy_unit_value_list]
+        sell, buy = (1, 2) if momentum[0] < momentum[1] else (2, 1)
+        shares = self.current_asset[1][sell] * 0.1
+        return [self.current_date, [sell, buy, shares, shares]]
+
+
+class CashStrategy(BackTestFuncInfo):
+    """一直持有现金"""
+    def strategy_func(self):
+        return None
+
+
+class BrokenStrategy(BackTestFuncInfo):
+    """第三个交易日卖出不存在的份额"""
+    def strategy_func(self):
+        if self.current_date == self.start_date + timedelta(days=2):
+            return [self.current_date, [1, 0, 10.0, 10.0]]
+        return None
+
+
+@pytest.fixture
+def funds(make_funds):
+    return make_funds(n_days=80, seed=11, drift=0.001, weekdays=False, hdp=np.zeros)
+
+
+def make_strategies(funds):
+    return [
+        BackTestFuncInfo(funds, datetime(2023, 1, 2), datetime(2023, 3, 1)),
+        RebalanceStrategy(funds, datetime(2023, 1, 10), datetime(2023, 3, 10)),
+        CashStrategy(funds, datetime(2023, 1, 2), datetime(2023, 2, 1)),
+    ]
+
+
+class TestMultiStrategyRunner:
+    def test_matches_independent_runs(self, funds, capsys):
+        expected = []
+        for strategy in make_strategies(funds):
+            strategy.verbose = 0
+            strategy.run()
+            expected.append(strategy)
+
+        runner = MultiStrategyRunner(make_strategies(funds), names=['base', 'rebalance', 'cash'])
+        df = runner.run()
+        assert capsys.readouterr().out == ''
+        assert list(df.index) == ['base', 'rebalance', 'cash']
+        for name, strategy, reference in zip(df.index, runner.strategies, expected):
+            assert strategy.asset_list == reference.asset_list.tolist()
+            assert strategy.trade_list == reference.trade_list
+            assert df.loc[name, 'final_value'] == pytest.approx(reference.result_info_dict()['final_value'])
+
+    def test_views_built_once_per_day(self, funds):
+        runner = MultiStrategyRunner(make_strategies(funds))
+        with patch.object(BackTestFuncInfo, 'cal_strategy_list', autospec=True,
+                          side_effect=BackTestFuncInfo.cal_strategy_list) as mock_cal:
+            runner.run()
+        trading_days = len(runner.calendar.trading_rows(datetime(2023, 1, 2), datetime(2023, 3, 10)))
+        assert mock_cal.call_count == trading_days
+
+    def test_failed_strategy_stops_alone(self, funds):
+        broken = BrokenStrategy(funds, datetime(2023, 1, 2), datetime(2023, 1, 20))
+        cash = CashStrategy(funds, datetime(2023, 1, 2), datetime(2023, 1, 20))
+        df = MultiStrategyRunner([broken, cash]).run()
+        assert len(broken.asset_list) == 2
+        assert "Negative asset" in broken.log[-1]
+        assert len(cash.asset_list) == 19
+        assert df.loc['CashStrategy#1', 'total_return'] == pytest.approx(0.0)
+
+    def test_requires_same_funds(self, funds):
+        other = [ExtendedFuncInfo(code='X', name='X'), funds[1]]
+        with pytest.raises(ValueError):
+            MultiStrategyRunner([BackTestFuncInfo(funds, datetime(2023, 1, 2), datetime(2023, 2, 1)),
+                                 BackTestFuncInfo(other, datetime(2023, 1, 2), datetime(2023, 2, 1))])
+        with pytest.raises(ValueError):
+            MultiStrategyRunner([])
@@ -0,0 +1,25 @@
+"""
+批量回测进程池测试
+"""
+
+import operator
+
+import pytest
+
+from dffc.backtest import parallel
+from dffc.backtest.parallel import parallel_map
+
+
+class TestParallelMap:
+    def test_serial(self):
+        assert list(parallel_map(10, operator.add, [1, 2, 3], max_workers=1)) == [11, 12, 13]
+        assert list(parallel_map(10, operator.add, [], max_workers=4)) == []
+
+    @pytest.mark.parametrize("start_methods", [None, ['spawn']])
+    def test_pool_keeps_task_order(self, monkeypatch, start_methods):
+        if start_methods is not None:
+            # 模拟不支持 fork 的系统：工作进程初始化时接收上下文
+            monkeypatch.setattr(parallel.multiprocessing, 'get_all_start_methods', lambda: start_methods)
+        tasks = list(range(20))
+        assert list(parallel_map(100, operator.add, tasks, max_workers=2, chunksize=3)) == [100 + t for t in tasks]
+        assert parallel._CONTEXT is None
@@ -0,0 +1,102 @@
+"""
+TradeReplay 测试
+"""
+
+import pytest
+import numpy as np
+from copy import copy
+from datetime import datetime, timedelta
+
+from dffc.backtest.backtest_funcinfo import BackTestFuncInfo
+from dffc.backtest.replay import TradeReplay
+
+
+class RebalanceStrategy(BackTestFuncInfo):
+    """第一天各买一半，之后按两个基金的价格动量每3天小幅调仓"""
+    verbose = 0
+
+    def strategy_func(self):
+        if self.current_date == self.start_date:
+            cash = self.current_asset[1][0]
+            return [self.current_date, [0, 1, cash / 2, cash / 2], [0, 2, cash / 2, cash / 2]]
+        if self.current_date.toordinal() % 3:
+            return None
+        momentum = [values[0] / values[min(5, len(values) - 1)] for values in self.strategy_unit_value_list]
+        sell, buy = (1, 2) if momentum[0] < momentum[1] else (2, 1)
+        shares = self.current_asset[1][sell] * 0.1
+        return [self.current_date, [sell, buy, shares, shares]]
+
+
+class BrokenStrategy(BackTestFuncInfo):
+    """2023-01-10（第七个交易日）卖出不存在的份额"""
+    verbose = 0
+
+    def strategy_func(self):
+        if self.current_date == self.start_date:
+            cash = self.current_asset[1][0]
+            return [self.current_date, [0, 1, cash, cash]]
+        if self.current_date == self.start_date + timedelta(days=8):
+            return [self.current_date, [1, 0, 10.0, 10.0]]
+        return None
+
+
+@pytest.fixture
+def funds(make_funds):
+    return make_funds(n_days=150, seed=21, drift=0.0003)
+
+
+class TestTradeReplay:
+    def test_replay_matches_run(self, funds):
+        backtest = RebalanceStrategy(funds, datetime(2023, 1, 2), datetime(2023, 5, 1))
+        backtest.run()
+        replay = backtest.replay()
+        assert replay.completed
+        assert list(replay.ledger.dates) == list(backtest.ledger.dates)
+        np.testing.assert_allclose(replay.ledger.shares, backtest.ledger.shares)
+        np.testing.assert_allclose(replay.ledger.values, backtest.ledger.values)
+        assert len(replay.trade_list) == len(backtest.trade_list)
+        expected = backtest.result_info_dict()
+        for key, value in replay.result.items():
+            if isinstance(value, float):
+                assert value == pytest.approx(expected[key], nan_ok=True)
+            else:
+                assert value == expected[key]
+
+    def test_fee_rate(self, funds):
+        backtest = RebalanceStrategy(funds, datetime(2023, 1, 2), datetime(2023, 5, 1))
+        backtest.run()
+        free = backtest.replay()
+        charged = backtest.replay(fee_rate=0.01)
+        assert charged.result['final_value'] < free.result['final_value']
+        # 只对卖出基金1收费
+        partial = backtest.replay(fee_rate=[0, 0.01, 0])
+        assert charged.result['final_value'] < partial.result['final_value'] < free.result['final_value']
+        with pytest.raises(ValueError):
+            backtest.replay(fee_rate=1.0)
+
+    def test_corrected_prices(self, funds):
+        backtest = RebalanceStrategy(funds, datetime(2023, 1, 2), datetime(2023, 5, 1))
+        backtest.run()
+        # 修正基金2最近30个交易日的净值
+        corrected = copy(funds[1])
+        corrected._unit_value_ls = [v * 1.1 if i < 30 else v for i, v in enumerate(funds[1]._unit_value_ls)]
+        replay = backtest.replay(fund_list=[funds[0], corrected])
+        unchanged = len(backtest.ledger) - 30
+        np.testing.assert_allclose(replay.ledger.values[:unchanged], backtest.ledger.values[:unchanged])
+        assert not np.allclose(replay.ledger.values[unchanged:], backtest.ledger.values[unchanged:])
+
+    def test_invalid_trade_stops_like_run(self, funds):
+        backtest = BrokenStrategy(funds, datetime(2023, 1, 2), datetime(2023, 3, 1))
+        backtest.run()
+        replay = TradeReplay.from_backtest(backtest).run(
+            backtest.trade_list + [[datetime(2023, 1, 10), [1, 0, 10.0, 10.0]]])
+        assert replay.log == ["Error: Negative asset at 2023-01-10"] == backtest.log
+        assert len(replay.ledger) == len(backtest.ledger)
+        np.testing.assert_allclose(replay.ledger.values, backtest.ledger.values)
+
+    def test_check_trade(self):
+        assert TradeReplay.check_trade([0, 1, 1.0, 1.0], 2, []) is None
+        assert TradeReplay.check_trade([0, 3, 1.0, 1.0], 2, []) == "Fund index out of range"
+        assert TradeReplay.check_trade([1, 1, 1.0, 1.0], 2, []) == "Cannot buy and sell the same fund"
+        assert TradeReplay.check_trade([0, 2, 1.0, 1.0], 2, [2]) == "Cannot trade fund with no data"
+        assert TradeReplay.check_trade([0, 1, -1.0, 1.0], 2, []) == "Invalid shares or price"
@@ -0,0 +1,160 @@
+"""
+RollingStartBatch 滚动起点回测测试
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+from dffc.backtest.backtest_funcinfo import BackTestFuncInfo
+from dffc.backtest.rolling import RollingStartBatch
+
+FACTOR = 'factor_holtwinters_delta_percentage'
+KEYS = ['final_value', 'total_return', 'maximum_drawdown', 'recovery_days', 'sharpe_ratio',
+        'annualized_return', 'holding_rate', 'turnover', 'trade_count']
+
+
+class WeightStrategy(BackTestFuncInfo):
+    """现金固定20%，其余按基金1的因子在两只基金之间分配；从起点开始每5个交易日调仓一次"""
+    verbose = 0
+    adjust_factor = 0.5
+
+    def weight_matrix(self, rows):
+        factor = self.aligned_factor(FACTOR, rows)
+        share = np.clip(0.5 + 0.5 * np.nan_to_num(factor[:, 0]), 0, 1)
+        weights = np.column_stack([np.full(len(rows), 0.2), 0.8 * share, 0.8 * (1 - share)])
+        weights[np.arange(len(rows)) % 5 != 0] = np.nan
+        return weights
+
+
+class CapitalWeightStrategy(WeightStrategy):
+    """初始资金为2单位现金"""
+
+    def __init__(self, fund_list, start_date, end_date):
+        super().__init__(fund_list, start_date, end_date)
+        self.asset_initial = [start_date, [2.0, 0, 0], [None], [2.0, 0, 0]]
+
+
+class SwitchStrategy(BackTestFuncInfo):
+    """带状态的策略：记录最高净值，回撤超过阈值时换到另一只基金"""
+    verbose = 0
+    threshold = 0.02
+
+    def __init__(self, fund_list, start_date, end_date):
+        super().__init__(fund_list, start_date, end_date)
+        self.mode = 1
+        self.highest_value = None
+
+    def strategy_func(self):
+        if self.current_date == self.start_date:
+            cash = self.current_asset[1][0]
+            return [self.current_date, [0, 1, cash, cash]]
+        values = [v[0] if v is not None else None for v in self.strategy_unit_value_list]
+        if None in values:
+            return None  # 基金当日没有净值时不操作
+        value = values[self.mode - 1]
+        if self.highest_value is None or value > self.highest_value:
+            self.highest_value = value
+            return None
+        if value < self.highest_value * (1 - self.threshold):
+            sell, buy = self.mode, 3 - self.mode
+            self.mode = buy
+            self.highest_value = values[buy - 1]
+            shares = self.current_asset[1][sell]
+            return [self.current_date, [sell, buy, shares, shares]]
+        return None
+
+
+class FailingStrategy(SwitchStrategy):
+    """1月18日开始的回测在策略函数中抛出异常"""
+
+    def strategy_func(self):
+        if self.start_date == datetime(2023, 1, 18):
+            raise RuntimeError("bad start")
+        return super().strategy_func()
+
+
+@pytest.fixture
+def funds(make_funds):
+    return make_funds(n_days=150, seed=5, drift=0.0004, vol=0.012,
+                      dates_for=lambda k, dates: dates if k == 0 else [d for i, d in enumerate(dates) if i % 8 != 3],
+                      hdp=lambda n: np.sin(np.arange(n) / 6.0))
+
+
+FIRST, LAST, END = datetime(2023, 1, 2), datetime(2023, 2, 28), datetime(2023, 5, 15)
+
+
+def assert_rows_match(row, expected):
+    for key in KEYS:
+        if expected[key] is None:
+            assert row[key] is None or pd.isna(row[key])
+        else:
+            assert row[key] == pytest.approx(expected[key], rel=1e-9, abs=1e-12), key
+
+
+class TestRollingStartBatch:
+    def test_start_dates(self, funds):
+        batch = RollingStartBatch(WeightStrategy, funds, datetime(2023, 1, 1), LAST, END, every=3)
+        assert batch.start_dates[0] == datetime(2023, 1, 2)
+        assert batch.start_dates[-1] <= LAST
+        assert all(b > a for a, b in zip(batch.start_dates, batch.start_dates[1:]))
+        with pytest.raises(ValueError):
+            RollingStartBatch(WeightStrategy, funds, FIRST, END + timedelta(days=1), END)
+
+    def test_vectorized_matches_single_runs(self, funds):
+        batch = RollingStartBatch(WeightStrategy, funds, FIRST, LAST, END, every=4)
+        result = batch.run(max_workers=1)
+        assert result.mode == 'vectorized'
+        assert len(result.runs) == len(batch.start_dates)
+        for start, (_, row) in zip(batch.start_dates, result.runs.iterrows()):
+            single = WeightStrategy(funds, start, END)
+            single.run_vectorized()
+            assert row['start_date'] == start.strftime('%Y-%m-%d')
+            assert_rows_match(row, single.result_info_dict())
+
+    def test_vectorized_uses_initial_assets(self, funds):
+        batch = RollingStartBatch(CapitalWeightStrategy, funds, FIRST, LAST, END, every=6)
+        result = batch.run(max_workers=1)
+        for start, (_, row) in zip(batch.start_dates, result.runs.iterrows()):
+            single = CapitalWeightStrategy(funds, start, END)
+            single.run_vectorized()
+            assert_rows_match(row, single.result_info_dict())
+            assert row['final_value'] > 1.5
+
+    def test_stateful_matches_single_runs(self, funds):
+        batch = RollingStartBatch(SwitchStrategy, funds, FIRST, LAST, END, every=5,
+                                  strategy_params={'threshold': 0.03})
+        result = batch.run(max_workers=1, chunk_size=3)
+        assert result.mode == 'stateful'
+        for start, (_, row) in zip(batch.start_dates, result.runs.iterrows()):
+            single = SwitchStrategy(funds, start, END)
+            single.threshold = 0.03
+            single.run()
+            assert_rows_match(row, single.result_info_dict())
+
+    @pytest.mark.parametrize('strategy_class', [WeightStrategy, SwitchStrategy])
+    def test_parallel_matches_serial(self, funds, strategy_class):
+        batch = RollingStartBatch(strategy_class, funds, FIRST, LAST, END, every=2)
+        serial = batch.run(max_workers=1)
+        parallel = batch.run(max_workers=3)
+        pd.testing.assert_frame_equal(serial.runs, parallel.runs)
+
+    def test_error_is_isolated(self, funds):
+        batch = RollingStartBatch(FailingStrategy, funds, datetime(2023, 1, 16), datetime(2023, 1, 20), END)
+        runs = batch.run(max_workers=1).runs
+        failed = runs[runs['error'].notna()]
+        assert failed['start_date'].tolist() == ['2023-01-18']
+        assert runs['final_value'].notna().sum() == len(runs) - 1
+
+    def test_distribution(self, funds):
+        result = RollingStartBatch(WeightStrategy, funds, FIRST, LAST, END).run(max_workers=1)
+        distribution = result.distribution(percentiles=[0.1, 0.5, 0.9])
+        assert list(distribution.index) == list(result.DISTRIBUTION_COLUMNS)
+        assert distribution.loc['total_return', 'count'] == len(result.runs)
+        assert distribution.loc['maximum_drawdown', 'max'] <= 0
+        assert distribution.loc['total_return', '50%'] == pytest.approx(result.runs['total_return'].median())
+
+    def test_vectorized_requires_weight_matrix(self, funds):
+        with pytest.raises(ValueError):
+            RollingStartBatch(SwitchStrategy, funds, FIRST, LAST, END).run(mode='vectorized')
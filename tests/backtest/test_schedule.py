@@ -0,0 +1,101 @@
+"""
+StrategySchedule 测试
+"""
+
+import pytest
+import numpy as np
+from datetime import datetime
+
+from dffc.backtest.backtest_funcinfo import BackTestFuncInfo
+from dffc.backtest.calendar import TradingCalendar
+from dffc.backtest.multi import MultiStrategyRunner
+from dffc.backtest.schedule import StrategySchedule
+
+THRESHOLD = 0.5
+
+
+class CrossStrategy(BackTestFuncInfo):
+    """开始日期全仓买入基金1；HDP上穿阈值时全部换成基金2，下穿时换回基金1"""
+    def __init__(self, fund_list, start_date, end_date, scheduled=False):
+        super().__init__(fund_list, start_date, end_date)
+        self.calls = 0
+        if scheduled:
+            self.schedule = StrategySchedule().on_cross(0, THRESHOLD, 'both')
+
+    def strategy_func(self):
+        self.calls += 1
+        if self.current_date == self.start_date:
+            cash = self.current_asset[1][0]
+            return [self.current_date, [0, 1, cash, cash]]
+        hdp = self.strategy_factor_list[0]
+        if hdp[1] < THRESHOLD <= hdp[0] and self.current_asset[1][1] > 0:
+            return [self.current_date, [1, 2, self.current_asset[1][1], 0.0]]
+        if hdp[1] > THRESHOLD >= hdp[0] and self.current_asset[1][2] > 0:
+            return [self.current_date, [2, 1, self.current_asset[1][2], 0.0]]
+        return None
+
+
+@pytest.fixture
+def funds(make_funds):
+    return make_funds(n_days=120, seed=5, hdp=lambda n: np.sin(np.arange(n) / 4.0))
+
+
+class TestStrategySchedule:
+    def test_every_and_dates(self, funds):
+        backtest = BackTestFuncInfo(funds, datetime(2023, 1, 2), datetime(2023, 3, 1))
+        rows = backtest.prepare()
+        mask = StrategySchedule().every(5, offset=2).mask(backtest, rows)
+        assert np.flatnonzero(mask).tolist()[:4] == [0, 2, 7, 12]
+
+        # 周六顺延到下周一
+        mask = StrategySchedule(include_start=False).on_dates(['2023-01-07', datetime(2023, 1, 10)]).mask(backtest, rows)
+        dates = [backtest.calendar.date_strs[row] for row in np.asarray(rows)[mask]]
+        assert dates == ['2023-01-09', '2023-01-10']
+
+    def test_cross_mask_matches_loop(self, funds):
+        backtest = BackTestFuncInfo(funds, datetime(2023, 1, 10), datetime(2023, 4, 1))
+        rows = backtest.prepare()
+        mask = StrategySchedule(include_start=False).on_cross(0, THRESHOLD, 'up').mask(backtest, rows)
+        fund = funds[0]
+        expected = []
+        for row in rows:
+            idx = fund._date2idx_map[backtest.calendar.date_strs[row]]
+            hdp = fund.factor_holtwinters_delta_percentage
+            expected.append(hdp[idx + 1] < THRESHOLD <= hdp[idx])
+        assert mask.tolist() == expected
+        assert mask.any()
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            StrategySchedule().every(0)
+        with pytest.raises(ValueError):
+            StrategySchedule().on_cross(0, 0.5, 'sideways')
+
+    def test_scheduled_run_matches_daily_run(self, funds):
+        daily = CrossStrategy(funds, datetime(2023, 1, 10), datetime(2023, 4, 20))
+        scheduled = CrossStrategy(funds, datetime(2023, 1, 10), datetime(2023, 4, 20), scheduled=True)
+        for strategy in (daily, scheduled):
+            strategy.verbose = 0
+            strategy.run()
+
+        assert len(daily.trade_list) > 2
+        assert scheduled.asset_list == daily.asset_list.tolist()
+        assert scheduled.trade_list == daily.trade_list
+        assert scheduled.calls < daily.calls / 3
+
+    def test_runner_respects_schedule(self, funds):
+        reference = CrossStrategy(funds, datetime(2023, 1, 10), datetime(2023, 4, 20))
+        reference.verbose = 0
+        reference.run()
+        scheduled = CrossStrategy(funds, datetime(2023, 1, 10), datetime(2023, 4, 20), scheduled=True)
+        MultiStrategyRunner([scheduled, BackTestFuncInfo(funds, datetime(2023, 1, 2), datetime(2023, 4, 20))]).run()
+        assert scheduled.asset_list == reference.asset_list.tolist()
+        assert scheduled.calls < reference.calls / 3
+
+
+def test_calendar_align(funds):
+    calendar = TradingCalendar(funds)
+    matrix = calendar.align([funds[0].factor_holtwinters_delta_percentage, None])
+    assert matrix.shape == (len(calendar), 2)
+    assert np.isnan(matrix[:, 1]).all()
+    np.testing.assert_allclose(matrix[:, 0], funds[0].factor_holtwinters_delta_percentage[::-1])
@@ -0,0 +1,133 @@
+"""
+回测快照、分叉和继续运行测试
+"""
+
+import pytest
+import numpy as np
+from copy import copy
+from datetime import datetime
+
+from dffc.backtest.backtest_funcinfo import BackTestFuncInfo
+from dffc.backtest.schedule import StrategySchedule
+from dffc.backtest.snapshot import BacktestSnapshot
+
+
+class SwitchStrategy(BackTestFuncInfo):
+    """带状态的策略：记录最高净值，回撤超过阈值时换到另一只基金"""
+    verbose = 0
+
+    def __init__(self, fund_list, start_date, end_date, threshold=0.02, every=None):
+        super().__init__(fund_list, start_date, end_date)
+        self.threshold = threshold
+        self.mode = 1
+        self.highest_value = None
+        self.situation = [False, False]
+        self.calls = 0
+        if every is not None:
+            self.schedule = StrategySchedule().every(every)
+
+    def strategy_func(self):
+        self.calls += 1
+        if self.current_date == self.start_date:
+            cash = self.current_asset[1][0]
+            return [self.current_date, [0, 1, cash, cash]]
+        value = self.strategy_unit_value_list[self.mode - 1][0]
+        if self.highest_value is None or value > self.highest_value:
+            self.highest_value = value
+            return None
+        if value < self.highest_value * (1 - self.threshold):
+            sell, buy = self.mode, 3 - self.mode
+            self.mode = buy
+            self.situation[buy - 1] = True
+            self.highest_value = self.strategy_unit_value_list[buy - 1][0]
+            shares = self.current_asset[1][sell]
+            return [self.current_date, [sell, buy, shares, shares]]
+        return None
+
+
+@pytest.fixture
+def funds(make_funds):
+    return make_funds(n_days=160, seed=4, vol=0.012)
+
+
+def truncate(fund, last_date):
+    """只保留 last_date 及之前的数据，模拟较早的净值数据"""
+    old = copy(fund)
+    keep = [i for i, d in enumerate(fund._date_ls) if d <= last_date]
+    old._date_ls = [fund._date_ls[i] for i in keep]
+    old._unit_value_ls = [fund._unit_value_ls[i] for i in keep]
+    old._date2idx_map = {d.strftime('%Y-%m-%d'): i for i, d in enumerate(old._date_ls)}
+    return old
+
+
+def assert_same_run(a, b):
+    assert list(a.ledger.dates) == list(b.ledger.dates)
+    np.testing.assert_allclose(a.ledger.shares, b.ledger.shares)
+    np.testing.assert_allclose(a.ledger.values, b.ledger.values)
+    assert a.trade_list == b.trade_list
+    assert len(a.events) == len(b.events)
+    assert (a.mode, a.highest_value, a.situation) == (b.mode, b.highest_value, b.situation)
+
+
+START, STOP, END = datetime(2023, 1, 2), datetime(2023, 3, 15), datetime(2023, 6, 1)
+
+
+class TestSnapshot:
+    @pytest.mark.parametrize('every', [None, 3])
+    def test_resume_matches_full_run(self, tmp_path, every, funds):
+        full = SwitchStrategy(funds, START, END, every=every)
+        full.run()
+        assert len(full.trade_list) > 2
+
+        first = SwitchStrategy(funds, START, END, every=every)
+        first.run(stop_date=STOP)
+        assert first.ledger.dates[-1] <= STOP
+        path = first.snapshot().save(str(tmp_path / 'snap'))
+        snapshot = BacktestSnapshot.load(path)
+        assert snapshot.date == first.ledger.dates[-1]
+        assert snapshot.state['mode'] == first.mode
+
+        resumed = SwitchStrategy.from_snapshot(snapshot, funds)
+        resumed.run()
+        assert_same_run(resumed, full)
+        assert resumed.result_info_dict() == full.result_info_dict()
+
+    def test_fork_is_independent(self, funds):
+        base = SwitchStrategy(funds, START, END)
+        base.run(stop_date=STOP)
+        n_days, n_trades = len(base.ledger), len(base.trade_list)
+
+        fork = base.fork()
+        fork.threshold = 0.5  # 从分叉日起修改规则
+        fork.run()
+        assert len(base.ledger) == n_days and len(base.trade_list) == n_trades
+        np.testing.assert_allclose(fork.ledger.values[:n_days], base.ledger.values)
+        assert fork.trade_list[:n_trades] == base.trade_list
+
+        base.run()
+        assert len(fork.ledger) == len(base.ledger)
+        assert fork.trade_list != base.trade_list
+
+    def test_only_new_days_are_simulated(self, funds):
+        full = SwitchStrategy(funds, START, END)
+        full.run()
+
+        # 昨天的运行只有到 STOP 的净值
+        old_funds = [truncate(fund, STOP) for fund in funds]
+        daily = SwitchStrategy(old_funds, START, STOP)
+        daily.run()
+        calls = daily.calls
+        snapshot = daily.snapshot()
+
+        # 今天数据更新后只模拟新增的交易日
+        today = SwitchStrategy.from_snapshot(snapshot, funds, end_date=END)
+        today.run()
+        new_days = len(today.ledger) - len(snapshot.dates)
+        assert today.calls - calls == new_days > 0
+        assert_same_run(today, full)
+
+    def test_restore_checks_fund_count(self, funds):
+        backtest = SwitchStrategy(funds, START, STOP)
+        backtest.run()
+        with pytest.raises(ValueError):
+            SwitchStrategy.from_snapshot(backtest.snapshot(), funds[:1])
@@ -0,0 +1,120 @@
+"""
+MonteCarloStress 蒙特卡洛压力测试测试
+"""
+
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+
+from dffc.backtest.metrics import BacktestMetrics
+from dffc.backtest.stress import MonteCarloStress, StressResult
+from dffc.backtest.vectorized import VectorizedBacktest
+
+PARAMS = {'alpha': 0.2, 'beta': 0.05, 'gamma': 0.1, 'season_length': 5}
+
+
+@pytest.fixture
+def funds(make_fund):
+    rng = np.random.default_rng(21)
+    dates = [datetime(2023, 1, 2) + timedelta(days=i) for i in range(400)]
+    dates = [d for d in dates if d.weekday() < 5]
+    # 两只基金的收益率高度相关
+    common = rng.normal(0.0004, 0.01, len(dates))
+    returns = [common + rng.normal(0, 0.003, len(dates)), 0.8 * common + rng.normal(0, 0.003, len(dates))]
+    return [make_fund(f'F{k}', dates, np.cumprod(1 + returns[k]), PARAMS) for k in range(2)]
+
+
+class TestMonteCarloStress:
+    def test_block_indices(self):
+        rng = np.random.default_rng(0)
+        indices = MonteCarloStress.block_indices(30, 50, 47, 10, rng)
+        assert indices.shape == (50, 47)
+        assert indices.min() >= 0 and indices.max() < 30
+        # 块内是循环连续的交易日
+        steps = (np.diff(indices, axis=1) % 30)[:, [k for k in range(46) if k % 10 != 9]]
+        assert (steps == 1).all()
+
+    def test_paths_resample_whole_days(self, funds):
+        stress = MonteCarloStress(funds)
+        paths = stress.paths(n_paths=200, horizon=60, block_size=5, seed=3)
+        assert paths.shape == (200, 61, 2)
+        np.testing.assert_allclose(paths[:, 0], 1.0)
+        # 每个模拟交易日的各基金收益率是同一个历史交易日的收益率，保留基金之间的相关性
+        simulated = (paths[:, 1:] / paths[:, :-1] - 1).reshape(-1, 2)
+        history = {tuple(np.round(row, 12)) for row in stress.returns}
+        assert all(tuple(np.round(row, 12)) in history for row in simulated[:500])
+        corr = np.corrcoef(simulated.T)[0, 1]
+        assert corr == pytest.approx(np.corrcoef(stress.returns.T)[0, 1], abs=0.05)
+        np.testing.assert_allclose(stress.paths(10, 20, seed=3), stress.paths(10, 20, seed=3))
+
+    def test_run_matches_single_paths(self, funds):
+        stress = MonteCarloStress(funds)
+        paths = stress.paths(n_paths=5, horizon=80, block_size=10, seed=1)
+        weights = [0.2, 0.4, 0.4]
+        result = stress.run(weights, paths=paths, adjust_factor=0.5)
+        for p in range(5):
+            prices = np.column_stack([np.ones(81), paths[p]])
+            single = VectorizedBacktest.run_target_weights(prices, np.tile(weights, (81, 1)), 0.5)
+            np.testing.assert_allclose(result.equity[p], single.equity)
+            _, drawdowns = BacktestMetrics.drawdown_series(single.equity)
+            assert result.maximum_drawdown[p] == pytest.approx(drawdowns.min() * 100)
+            assert result.total_return[p] == pytest.approx((single.equity[-1] - 1) * 100)
+            assert result.turnover[p] == pytest.approx(single.turnover)
+
+    def test_metrics_match_result_info(self, funds):
+        stress = MonteCarloStress(funds)
+        # 工作日数据：平均每个交易日约对应 7/5 个自然日
+        assert stress.period_days == pytest.approx(7 / 5, rel=0.02)
+        paths = stress.paths(n_paths=4, horizon=60, seed=6)
+        result = stress.run([0.3, 0.4, 0.3], paths=paths, adjust_factor=0.5)
+        traded = VectorizedBacktest.run_target_weights(
+            np.concatenate([np.ones((4, 61, 1)), paths], axis=2), np.tile([0.3, 0.4, 0.3], (61, 1)), 0.5).traded_value
+        metrics = MonteCarloStress.metrics(result.equity, traded, period_days=1.0)
+        dates = [datetime(2024, 1, 1) + timedelta(days=k) for k in range(61)]
+        for p in range(4):
+            expected = BacktestMetrics.compute(dates, result.equity[p], np.zeros(61), result.equity[p, 0],
+                                               dates[0], dates[-1], traded_value=traded[p])
+            for name in StressResult.METRICS:
+                assert metrics[name][p] == pytest.approx(expected[name], rel=1e-10), name
+
+    def test_zero_volatility_sharpe_is_nan(self, funds):
+        result = MonteCarloStress(funds).run([1.0, 0.0, 0.0], n_paths=3, horizon=10, seed=1)
+        assert np.isnan(result.sharpe_ratio).all()
+        np.testing.assert_allclose(result.annualized_volatility, 0.0)
+        np.testing.assert_allclose(result.annualized_return, 0.0)
+
+    def test_percentile_bands(self, funds):
+        result = MonteCarloStress(funds).run([0.0, 0.5, 0.5], n_paths=500, horizon=120, seed=2)
+        table = result.percentiles()
+        assert list(table.columns) == ['p5', 'p25', 'p50', 'p75', 'p95']
+        assert (np.diff(table.to_numpy(), axis=1) >= 0).all()
+        assert (table.loc['maximum_drawdown'] <= 0).all()
+        bands = result.equity_bands([10, 90])
+        assert bands.shape == (121, 2)
+        assert (bands['p10'] <= bands['p90']).all()
+        assert 0 <= result.loss_probability() <= 1
+
+    def test_cash_has_no_risk(self, funds):
+        result = MonteCarloStress(funds).run([1.0, 0.0, 0.0], n_paths=20, horizon=30, seed=5)
+        np.testing.assert_allclose(result.equity, 1.0)
+        np.testing.assert_allclose(result.maximum_drawdown, 0.0)
+
+    def test_weight_function(self, funds):
+        stress = MonteCarloStress(funds)
+
+        def below_trend(paths):
+            # 净值低于HoltWinters平滑值的基金持有，否则持有现金
+            delta = stress.holtwinters_delta(paths)
+            weights = np.zeros(paths.shape[:2] + (3,))
+            weights[:, :, 1:] = delta < 0
+            return weights
+
+        result = stress.run(below_trend, n_paths=50, horizon=60, seed=4)
+        assert result.n_paths == 50
+        assert (result.turnover > 0).all()
+
+    def test_insufficient_history(self, funds):
+        with pytest.raises(ValueError):
+            MonteCarloStress(funds, datetime(2023, 1, 2), datetime(2023, 1, 3))
+        with pytest.raises(ValueError):
+            MonteCarloStress(funds).paths(n_paths=0)
@@ -0,0 +1,115 @@
+"""
+ParameterSweep 测试
+"""
+
+import pickle
+
+import pytest
+import numpy as np
+from datetime import datetime
+
+from dffc.backtest.backtest_funcinfo import BackTestFuncInfo
+from dffc.backtest.sweep import ParameterSweep
+
+
+class FractionStrategy(BackTestFuncInfo):
+    """开始日期用 buy_fraction 比例的现金买入基金1，之后不操作"""
+    def __init__(self, fund_list, start_date, end_date):
+        super().__init__(fund_list, start_date, end_date)
+        self.buy_fraction = 1.0
+
+    def strategy_func(self):
+        if self.current_date == self.start_date:
+            cash = self.current_asset[1][0] * self.buy_fraction
+            return [self.current_date, [0, 1, cash, cash]]
+        return None
+
+
+class ScaledStrategy(FractionStrategy):
+    """买入比例由 scale 派生"""
+    def __init__(self, fund_list, start_date, end_date):
+        super().__init__(fund_list, start_date, end_date)
+        self.scale = 1.0
+        self._derive()
+
+    def _derive(self):
+        self.buy_fraction = 0.5 * self.scale
+
+
+@pytest.fixture
+def funds(make_funds):
+    return make_funds(n_funds=1, n_days=60, seed=3, drift=0.002, weekdays=False, hdp=np.zeros)
+
+
+@pytest.fixture
+def sweep(funds):
+    return ParameterSweep(FractionStrategy, funds, datetime(2023, 1, 2), datetime(2023, 2, 20))
+
+
+class TestParameterSweep:
+    def test_grid(self):
+        grid = ParameterSweep.grid({'a': [1, 2], 'b': ['x', 'y', 'z']})
+        assert len(grid) == 6
+        assert grid[0] == {'a': 1, 'b': 'x'}
+        assert grid[-1] == {'a': 2, 'b': 'z'}
+
+    def test_sample(self):
+        samples = ParameterSweep.sample({'a': (0.0, 1.0), 'b': [1, 2, 3], 'c': lambda rng: rng.randint(5, 6)},
+                                        20, seed=1)
+        assert len(samples) == 20
+        assert all(0.0 <= s['a'] <= 1.0 and s['b'] in (1, 2, 3) and s['c'] in (5, 6) for s in samples)
+        assert samples == ParameterSweep.sample({'a': (0.0, 1.0), 'b': [1, 2, 3], 'c': lambda rng: rng.randint(5, 6)},
+                                                20, seed=1)
+        with pytest.raises(ValueError):
+            ParameterSweep.sample({'a': 'bad'}, 1)
+
+    def test_serial_run_is_silent(self, sweep, capsys):
+        df = sweep.run(ParameterSweep.grid({'buy_fraction': [0.0, 0.5, 1.0]}), max_workers=1)
+        assert capsys.readouterr().out == ''
+        assert list(df['run_id']) == [0, 1, 2]
+        assert list(df['buy_fraction']) == [0.0, 0.5, 1.0]
+        assert df.loc[0, 'total_return'] == pytest.approx(0.0)
+        # 收益随买入比例线性变化
+        assert df.loc[1, 'total_return'] == pytest.approx(df.loc[2, 'total_return'] / 2)
+        assert 'drawdown_duration_1-4' in df.columns
+        assert 'error' not in df.columns
+
+    def test_parallel_matches_serial(self, sweep):
+        params = ParameterSweep.grid({'buy_fraction': [0.2, 0.4, 0.6, 0.8]})
+        progress = []
+        serial = sweep.run(params, max_workers=1)
+        parallel = sweep.run(params, max_workers=2, progress=lambda done, total: progress.append((done, total)))
+        assert progress[-1] == (4, 4)
+        assert serial.equals(parallel)
+
+    def test_derived_params(self, funds):
+        sweep = ParameterSweep(ScaledStrategy, funds, datetime(2023, 1, 2), datetime(2023, 2, 20))
+        df = sweep.run([{'scale': 0.5}, {'scale': 2.0}], max_workers=1)
+        direct = ParameterSweep(FractionStrategy, funds, datetime(2023, 1, 2), datetime(2023, 2, 20))
+        expected = direct.run([{'buy_fraction': 0.25}, {'buy_fraction': 1.0}], max_workers=1)
+        np.testing.assert_allclose(df['total_return'], expected['total_return'])
+
+    def test_set_params(self, funds):
+        start, end = datetime(2023, 1, 2), datetime(2023, 2, 20)
+        params = {'scale': 0.4, 'adjust_factor': 0.3, 'tags': ['a']}
+        first = ScaledStrategy(funds, start, end).set_params(**params)
+        second = ScaledStrategy(funds, start, end).set_params(**params)
+        assert type(first) is ScaledStrategy
+        assert (first.scale, first.buy_fraction, first.adjust_factor) == (0.4, pytest.approx(0.2), 0.3)
+        # 可变参数不在实例之间共用
+        first.tags.append('b')
+        assert second.tags == ['a'] and params['tags'] == ['a']
+        restored = pickle.loads(pickle.dumps(first))
+        assert (restored.scale, restored.buy_fraction) == (0.4, pytest.approx(0.2))
+
+    def test_unknown_parameter(self, sweep):
+        with pytest.raises(ValueError, match='buy_fractoin'):
+            sweep.run([{'buy_fractoin': 0.5}], max_workers=1)
+
+    def test_failed_backtest_is_reported(self, sweep):
+        df = sweep.run([{'buy_fraction': 2.0}], max_workers=1)
+        assert 'Negative asset' in df.loc[0, 'error']
+
+    def test_requires_funds(self):
+        with pytest.raises(ValueError):
+            ParameterSweep(FractionStrategy, [], datetime(2023, 1, 2), datetime(2023, 2, 20))
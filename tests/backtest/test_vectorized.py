@@ -0,0 +1,147 @@
+"""
+目标权重向量化回测测试
+"""
+
+import pytest
+import numpy as np
+from datetime import datetime
+
+from dffc.backtest.backtest_funcinfo import BackTestFuncInfo
+from dffc.backtest.vectorized import VectorizedBacktest
+
+FACTOR = 'factor_holtwinters_delta_percentage'
+
+
+class WeightStrategy(BackTestFuncInfo):
+    """现金固定20%，其余按基金1的因子在两只基金之间分配；每5个交易日调仓一次"""
+    verbose = 0
+    adjust_factor = 0.4
+
+    def weights_for(self, rows, factor):
+        positions = np.arange(len(rows))
+        share = np.clip(0.5 + 0.5 * np.nan_to_num(factor[:, 0]), 0, 1)
+        weights = np.column_stack([np.full(len(rows), 0.2), 0.8 * share, 0.8 * (1 - share)])
+        weights[positions % 5 != 0] = np.nan
+        return weights
+
+    def weight_matrix(self, rows):
+        return self.weights_for(rows, self.aligned_factor(FACTOR, rows))
+
+    def strategy_func(self):
+        row = self.calendar.row(self.current_date)
+        rows = self.calendar.trading_rows(self.start_date, self.end_date)
+        weights = self.weights_for([0], self.aligned_factor(FACTOR, [row]))[0]
+        if (row - rows.start) % 5 != 0:
+            return None
+        return self.target_weight_trades(weights)
+
+
+@pytest.fixture
+def funds(make_funds):
+    # 第二只基金晚开始且缺少部分交易日
+    return make_funds(n_days=200, seed=11, drift=0.0005,
+                      dates_for=lambda k, dates: dates if k == 0 else [d for i, d in enumerate(dates[10:]) if i % 7 != 3],
+                      hdp=lambda n: np.sin(np.arange(n) / 6.0))
+
+
+class TestVectorizedBacktest:
+    def test_full_rebalance_closed_form(self):
+        prices = np.array([[1, 1.0], [1, 1.1], [1, 0.99], [1, 1.2]])
+        weights = np.tile([0.5, 0.5], (4, 1))
+        result = VectorizedBacktest.run_target_weights(prices, weights)
+        growth = 0.5 + 0.5 * prices[1:, 1] / prices[:-1, 1]
+        expected = np.concatenate([[1.0], np.cumprod(growth)])
+        np.testing.assert_allclose(result.equity, expected)
+        np.testing.assert_allclose(result.values[:, 0], result.values[:, 1])
+        assert result.traded_value[0] == pytest.approx(0.5)
+
+    def test_partial_adjust_and_hold(self):
+        prices = np.ones((3, 2))
+        weights = np.array([[0, 1.0], [np.nan, np.nan], [0, 1.0]])
+        result = VectorizedBacktest.run_target_weights(prices, weights, adjust_factor=0.5)
+        np.testing.assert_allclose(result.values[:, 1], [0.5, 0.5, 0.75])
+        np.testing.assert_allclose(result.traded_value, [0.5, 0.0, 0.25])
+
+    def test_per_day_adjust(self):
+        prices = np.ones((3, 2))
+        weights = np.tile([0, 1.0], (3, 1))
+        result = VectorizedBacktest.run_target_weights(prices, weights, adjust_factor=[[1.0, 0.5, 0.5]])
+        np.testing.assert_allclose(result.values[:, 1], [1.0, 1.0, 1.0])
+        batch = VectorizedBacktest.run_target_weights(prices, np.stack([weights, weights]),
+                                                      adjust_factor=[[0.5, 0.5, 1.0], [0.0, 0.5, 0.5]])
+        np.testing.assert_allclose(batch.values[:, :, 1], [[0.5, 0.75, 1.0], [0.0, 0.5, 0.75]])
+
+    def test_untradable_keeps_value(self):
+        prices = np.array([[1, 1.0, np.nan], [1, 2.0, 1.0]])
+        weights = np.array([[0, 0.5, 0.5], [0, 0.0, 1.0]])
+        tradable = np.array([[True, True, True], [True, False, True]])
+        result = VectorizedBacktest.run_target_weights(prices, weights, tradable=tradable)
+        # 第一天基金2没有净值，权重全部给基金1；第二天基金1不能交易，只有现金可以买入基金2
+        np.testing.assert_allclose(result.values[0], [0, 1, 0])
+        np.testing.assert_allclose(result.values[1], [0, 2, 0])
+
+    def test_batch_matches_single(self):
+        rng = np.random.default_rng(3)
+        prices = np.column_stack([np.ones(50), np.cumprod(1 + rng.normal(0, 0.02, (50, 2)), axis=0)])
+        weights = rng.random((4, 50, 3))
+        adjust = np.array([1.0, 0.5, 0.2, 0.0])
+        batch = VectorizedBacktest.run_target_weights(prices, weights, adjust)
+        for s in range(4):
+            single = VectorizedBacktest.run_target_weights(prices, weights[s], adjust[s])
+            np.testing.assert_allclose(batch.values[s], single.values)
+            np.testing.assert_allclose(batch.turnover[s], single.turnover)
+        np.testing.assert_allclose(batch.equity[3], 1.0)
+
+    def test_per_set_prices(self):
+        rng = np.random.default_rng(4)
+        prices = np.ones((3, 40, 3))
+        prices[:, :, 1:] = np.cumprod(1 + rng.normal(0, 0.02, (3, 40, 2)), axis=1)
+        prices[1, 5:9, 2] = np.nan  # 第二条路径中基金2有几天不能交易
+        weights = rng.random((40, 3))
+        batch = VectorizedBacktest.run_target_weights(prices, weights, 0.5)
+        assert batch.values.shape == (3, 40, 3)
+        for s in range(3):
+            single = VectorizedBacktest.run_target_weights(prices[s], weights, 0.5)
+            np.testing.assert_allclose(batch.values[s], single.values)
+            np.testing.assert_allclose(batch.traded_value[s], single.traded_value)
+        with pytest.raises(ValueError):
+            VectorizedBacktest.run_target_weights(prices, np.ones((2, 40, 3)))
+
+    def test_invalid_arguments(self):
+        prices = np.ones((2, 2))
+        with pytest.raises(ValueError):
+            VectorizedBacktest.run_target_weights(prices, -np.ones((2, 2)))
+        with pytest.raises(ValueError):
+            VectorizedBacktest.run_target_weights(prices, np.ones((2, 3)))
+        with pytest.raises(ValueError):
+            VectorizedBacktest.run_target_weights(prices, np.ones((2, 2)), adjust_factor=1.5)
+
+    def test_weights_to_trades(self):
+        trades = VectorizedBacktest.weights_to_trades([1.0, 0, 0], [1, 2.0, None], [0.2, 0.8, 0.0])
+        assert trades == [[0, 1, pytest.approx(0.8), pytest.approx(0.8)]]
+        assert VectorizedBacktest.weights_to_trades([1.0, 0], [1, 2.0], [np.nan, np.nan]) == []
+
+
+class TestRunVectorized:
+    def test_matches_event_loop(self, funds):
+        start, end = datetime(2023, 1, 2), datetime(2023, 7, 1)
+        loop = WeightStrategy(funds, start, end)
+        loop.run()
+        fast = WeightStrategy(funds, start, end)
+        fast.run_vectorized()
+
+        assert len(fast.ledger) == len(loop.ledger)
+        assert list(fast.ledger.dates) == list(loop.ledger.dates)
+        np.testing.assert_allclose(fast.ledger.shares, loop.ledger.shares, atol=1e-10)
+        np.testing.assert_allclose(fast.ledger.values, loop.ledger.values, atol=1e-10)
+        assert len(fast.trade_list) == len(loop.trade_list)
+        assert len(fast.events) == len(loop.events)
+        expected = loop.result_info_dict()
+        result = fast.result_info_dict()
+        for key in ('final_value', 'maximum_drawdown', 'turnover', 'trade_count'):
+            assert result[key] == pytest.approx(expected[key])
+
+    def test_requires_weight_matrix(self, funds):
+        backtest = BackTestFuncInfo(funds, datetime(2023, 1, 2), datetime(2023, 2, 1))
+        with pytest.raises(NotImplementedError):
+            backtest.run_vectorized()
@@ -0,0 +1,131 @@
+"""
+WalkForward 滚动前推回测测试
+"""
+
+import pytest
+import numpy as np
+from datetime import datetime
+
+from dffc.backtest.backtest_funcinfo import BackTestFuncInfo
+from dffc.backtest.walkforward import WalkForward
+
+PARAMS = {'alpha': 0.2, 'beta': 0.05, 'gamma': 0.1, 'season_length': 5}
+
+
+def fixed_optimizer(values, begin, end):
+    """不随训练窗口变化的优化器"""
+    return [0.2, 0.05, 0.1], 5, 0.0
+
+
+def trend_optimizer(values, begin, end):
+    """按训练窗口的涨跌给出两组参数之一，只依赖训练窗口内的数据"""
+    if values[end - 1] > values[begin]:
+        return [0.3, 0.02, 0.1], 6, 0.0
+    return [0.15, 0.04, 0.2], 8, 0.0
+
+
+def failing_optimizer(values, begin, end):
+    """没有任何季节长度能拟合时 optimize_holtwinters_parameters 的返回值"""
+    return None, None, float('inf')
+
+
+class HDPStrategy(BackTestFuncInfo):
+    """HDP低于阈值时买入HDP较低的基金，高于阈值时卖出到现金"""
+    verbose = 0
+    threshold = 0.3
+
+    def strategy_func(self):
+        hdp = [f[0] if f is not None else None for f in self.strategy_factor_list]
+        cash = self.current_asset[1][0]
+        held = [j for j in (1, 2) if self.current_asset[1][j] > 0]
+        if held:
+            j = held[0]
+            if hdp[j - 1] is not None and hdp[j - 1] > 1 - self.threshold:
+                shares = self.current_asset[1][j]
+                return [self.current_date, [j, 0, shares, self.strategy_unit_value_list[j - 1][0]]]
+            return None
+        candidates = [(v, j + 1) for j, v in enumerate(hdp) if v is not None and v < self.threshold]
+        if candidates and cash > 0:
+            _, j = min(candidates)
+            return [self.current_date, [0, j, cash, 1.0]]
+        return None
+
+
+@pytest.fixture
+def funds(make_funds):
+    return make_funds(n_days=420, seed=11, drift=0.0003, vol=0.012, start=datetime(2022, 1, 3),
+                      dates_for=lambda k, dates: dates if k == 0 else [d for i, d in enumerate(dates) if i % 9 != 4],
+                      params=PARAMS, compute=True)
+
+
+START, END = datetime(2022, 1, 3), datetime(2023, 2, 20)
+
+
+class TestWalkForward:
+    def test_fold_schedule(self, funds):
+        wf = WalkForward(HDPStrategy, funds, START, END, train_days=100, test_days=40)
+        folds = wf.folds
+        assert len(folds) > 3
+        assert folds[0].test_start == wf.calendar.dates[100]
+        for prev, fold in zip(folds, folds[1:]):
+            assert prev.test_end < fold.test_start
+            assert fold.train_end < fold.test_start
+        assert folds[-1].test_end <= END
+
+        anchored = WalkForward(HDPStrategy, funds, START, END, train_days=100, test_days=40, anchored=True)
+        assert all(fold.train_start == wf.calendar.dates[0] for fold in anchored.folds)
+
+    def test_fixed_params_reuse_factors(self, funds):
+        wf = WalkForward(HDPStrategy, funds, START, END, train_days=100, test_days=40, optimizer=fixed_optimizer)
+        result = wf.run(max_workers=1)
+        assert wf.cache_misses == 2
+        assert wf.cache_hits == 2 * (len(wf.folds) - 1)
+        assert 'error' not in result.folds.columns
+        # 参数与基金原有参数相同时，因子与基金已计算的因子一致
+        fold_fund = wf._fold_funds[0][1]
+        np.testing.assert_allclose(fold_fund.factor_holtwinters_delta_percentage,
+                                   funds[1].factor_holtwinters_delta_percentage)
+        assert funds[1].factor_holtwinters_parameter == PARAMS
+
+    def test_fold_matches_direct_backtest(self, funds):
+        wf = WalkForward(HDPStrategy, funds, START, END, train_days=100, test_days=40, optimizer=fixed_optimizer)
+        result = wf.run(max_workers=1)
+        fold = wf.folds[1]
+        direct = HDPStrategy(funds, fold.test_start, fold.test_end)
+        direct.run()
+        np.testing.assert_allclose(result.fold_equity[1].to_numpy(), direct.ledger.total_values())
+        assert result.folds.loc[1, 'final_value'] == direct.result_info_dict()['final_value']
+
+    def test_stitched_equity(self, funds):
+        wf = WalkForward(HDPStrategy, funds, START, END, train_days=100, test_days=40, optimizer=trend_optimizer)
+        result = wf.run(max_workers=1)
+        assert result.equity.index.is_monotonic_increasing
+        assert len(result.equity) == sum(len(e) for e in result.fold_equity)
+        # 每个窗口的曲线接在前一个窗口的终值之后
+        end = 0
+        scale = 1.0
+        for equity in result.fold_equity:
+            part = result.equity.iloc[end:end + len(equity)]
+            np.testing.assert_allclose(part.to_numpy(), equity.to_numpy() * scale)
+            scale *= equity.iloc[-1]
+            end += len(equity)
+        assert result.summary['final_value'] == pytest.approx(scale)
+        assert {'alpha_0', 'season_length_1'} <= set(result.folds.columns)
+
+    def test_parallel_matches_serial(self, funds):
+        kwargs = dict(train_days=100, test_days=40, optimizer=trend_optimizer, strategy_params={'threshold': 0.25})
+        serial = WalkForward(HDPStrategy, funds, START, END, **kwargs).run(max_workers=1)
+        parallel = WalkForward(HDPStrategy, funds, START, END, **kwargs).run(max_workers=2)
+        assert serial.folds.equals(parallel.folds)
+        np.testing.assert_allclose(serial.equity.to_numpy(), parallel.equity.to_numpy())
+
+    def test_unfitted_window_keeps_fund_params(self, funds):
+        wf = WalkForward(HDPStrategy, funds, START, END, train_days=100, test_days=40, optimizer=failing_optimizer)
+        assert wf.optimize(0, 1) == PARAMS
+        funds[1].factor_holtwinters_parameter = None
+        with pytest.raises(ValueError):
+            wf.optimize(0, 1)
+
+    def test_no_folds(self, funds):
+        with pytest.raises(ValueError):
+            WalkForward(HDPStrategy, funds, START, datetime(2022, 2, 1), train_days=100).run(max_workers=1)
@@ -3,14 +3,89 @@ pytest配置文件和共享fixtures
 """
 import pytest
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from unittest.mock import Mock, patch
 import os
 import sys
 
+import numpy as np
+
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
+from dffc.core.extended_funcinfo import ExtendedFuncInfo
+
+
+def _build_fund(code, dates, values, params=None, hdp=None, compute=False, name=None, factor_cache=None):
+    """
+    构建已加载净值数据的基金（ExtendedFuncInfo），内部按最新在前存储
+
+    Args:
+        code: 基金代码
+        dates: 按时间正序的日期（datetime 或 'YYYY-MM-DD'），None时不设置日期
+        values: 按时间正序的净值
+        params: factor_holtwinters_parameter，None时不设置
+        hdp: 按时间正序的 factor_holtwinters_delta_percentage，None时不设置
+        compute: 是否用 params 计算HoltWinters和HDP因子
+        name: 基金名称，None时与代码相同
+        factor_cache: 因子磁盘缓存
+    """
+    fund = ExtendedFuncInfo(code=code, name=code if name is None else name, factor_cache=factor_cache)
+    if dates is not None:
+        dates = [datetime.strptime(d, '%Y-%m-%d') if isinstance(d, str) else d for d in dates]
+        fund._date_ls = dates[::-1]
+        fund._date2idx_map = {d.strftime('%Y-%m-%d'): i for i, d in enumerate(fund._date_ls)}
+    fund._unit_value_ls = list(values)[::-1]
+    if params is not None:
+        fund.factor_holtwinters_parameter = dict(params)
+    if hdp is not None:
+        fund.factor_holtwinters_delta_percentage = list(hdp)[::-1]
+    if compute:
+        fund.factor_cal_holtwinters()
+        fund.factor_cal_holtwinters_delta_percentage()
+    return fund
+
+
+def _build_funds(n_funds=2, n_days=120, seed=0, drift=0.0, vol=0.01, start=datetime(2023, 1, 2),
+                 weekdays=True, dates_for=None, params=None, hdp=None, compute=False):
+    """
+    随机游走净值的基金列表，代码为 F0、F1……
+
+    Args:
+        n_funds: 基金数
+        n_days: 从 start 开始的自然日数
+        seed: 随机种子，各基金依次从同一个随机数生成器取日收益率
+        drift, vol: 日收益率的均值和标准差
+        weekdays: 是否只保留工作日
+        dates_for: dates_for(k, dates) 返回第k个基金的日期（缺失部分日期、晚开始等），None时都使用全部日期
+        params, compute: 见 _build_fund
+        hdp: hdp(n) 返回长度为n、按时间正序的HDP因子，None时不设置
+    """
+    rng = np.random.default_rng(seed)
+    dates = [start + timedelta(days=i) for i in range(n_days)]
+    if weekdays:
+        dates = [d for d in dates if d.weekday() < 5]
+    funds = []
+    for k in range(n_funds):
+        fund_dates = dates if dates_for is None else dates_for(k, dates)
+        values = np.cumprod(1 + rng.normal(drift, vol, len(fund_dates)))
+        funds.append(_build_fund(f'F{k}', fund_dates, values, params,
+                                 None if hdp is None else hdp(len(fund_dates)), compute))
+    return funds
+
+
+@pytest.fixture
+def make_fund():
+    """构建单个基金的工厂，参数见 _build_fund"""
+    return _build_fund
+
+
+@pytest.fixture
+def make_funds():
+    """构建随机游走净值基金列表的工厂，参数见 _build_funds"""
+    return _build_funds
+
+
 @pytest.fixture
 def sample_fund_data():
     """提供示例基金数据用于测试"""
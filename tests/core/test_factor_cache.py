@@ -0,0 +1,156 @@
+"""
+FactorCache 因子磁盘缓存测试
+"""
+
+import os
+import time
+
+import numpy as np
+import pytest
+
+from dffc.core.factor_cache import FactorCache
+from dffc.analysis.indicators import HoltWintersIndicator
+
+
+PARAMS = {'alpha': 0.2, 'beta': 0.02, 'gamma': 0.2, 'season_length': 12}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return FactorCache(str(tmp_path / 'factors'), max_size_mb=1)
+
+
+@pytest.fixture
+def nav_values():
+    rng = np.random.default_rng(3)
+    return np.cumprod(1 + rng.normal(0.0003, 0.012, 300))[::-1].tolist()
+
+
+@pytest.fixture
+def fund_for(make_fund, nav_values):
+    """用同一段净值构建基金，可指定参数和缓存"""
+    def build(params=PARAMS, cache=None):
+        return make_fund('000001', None, nav_values[::-1], params, factor_cache=cache)
+    return build
+
+
+class TestFactorCache:
+
+    def test_key_depends_on_data_params_and_version(self, nav_values):
+        key = FactorCache.make_key('000001', nav_values, PARAMS)
+        assert key.startswith('000001_')
+        assert key == FactorCache.make_key('000001', np.array(nav_values), dict(PARAMS))
+        assert key != FactorCache.make_key('000001', nav_values[1:], PARAMS)
+        assert key != FactorCache.make_key('000001', nav_values, dict(PARAMS, alpha=0.3))
+        assert key != FactorCache.make_key('000001', nav_values, PARAMS, version='other')
+
+    def test_set_get_delete(self, cache):
+        cache.set('a_1', {'x': np.arange(5.0), 's': np.array('{"k": 1}')})
+        value = cache.get('a_1')
+        np.testing.assert_array_equal(value['x'], np.arange(5.0))
+        assert str(value['s']) == '{"k": 1}'
+        cache.delete('a_1')
+        assert cache.get('a_1') is None
+
+    def test_ttl(self, cache):
+        cache.set('a_1', {'x': np.arange(3.0)}, ttl=-1)
+        assert cache.get('a_1') is None
+        cache.set('a_2', {'x': np.arange(3.0)}, ttl=60)
+        assert 'x' in cache.get('a_2')
+
+    def test_invalidate_by_code(self, cache):
+        cache.set('000001_a', {'x': np.zeros(2)})
+        cache.set('000001_b', {'x': np.zeros(2)})
+        cache.set('000002_a', {'x': np.zeros(2)})
+        assert cache.invalidate('000001') == 2
+        assert cache.get('000001_a') is None
+        assert cache.get('000002_a') is not None
+        cache.clear()
+        assert cache.get('000002_a') is None
+
+    def test_eviction_keeps_recently_used(self, cache):
+        payload = {'x': np.zeros(40000)}  # 约320KB
+        for i, key in enumerate(['a_1', 'a_2', 'a_3']):
+            cache.set(key, payload)
+            os.utime(cache._path(key), (time.time() - 100 + i, time.time() - 100 + i))
+        cache.get('a_1')  # 最近使用
+        cache.set('a_4', payload)
+        assert cache.get('a_1') is not None
+        assert cache.get('a_2') is None
+        assert cache.get('a_4') is not None
+        total = sum(os.path.getsize(os.path.join(cache.cache_dir, f)) for f in os.listdir(cache.cache_dir))
+        assert total <= cache.max_size_bytes
+
+    def test_corrupted_file(self, cache):
+        with open(cache._path('a_1'), 'wb') as f:
+            f.write(b'not a npz file')
+        assert cache.get('a_1') is None
+        assert not os.path.exists(cache._path('a_1'))
+
+
+class TestExtendedFuncInfoWithCache:
+
+    def test_cache_hit_matches_computation(self, cache, nav_values, fund_for):
+        reference = fund_for()
+        reference.factor_cal_holtwinters()
+        reference.factor_cal_holtwinters_delta_percentage()
+
+        first = fund_for(cache=cache)
+        first.factor_cal_holtwinters()
+        first.factor_cal_holtwinters_delta_percentage()
+        key = FactorCache.make_key('000001', nav_values, PARAMS)
+        assert set(cache.get(key)) == {'holtwinters', 'holtwinters_state', 'holtwinters_delta_percentage',
+                                       'holtwinters_delta_digest'}
+
+        second = fund_for(cache=cache)
+        second.estimate_able = True
+        second.estimate_value = nav_values[0] * 1.01
+        with pytest.MonkeyPatch.context() as mp:
+            def fail(*args, **kwargs):
+                raise AssertionError("缓存命中时不应重新计算")
+            mp.setattr(HoltWintersIndicator, 'calculate', staticmethod(fail))
+            mp.setattr(HoltWintersIndicator, 'calculate_delta_percentage', staticmethod(fail))
+            second.factor_cal_holtwinters()
+            second.factor_cal_holtwinters_delta_percentage()
+
+        assert second.factor_holtwinters == reference.factor_holtwinters
+        assert second.factor_holtwinters_delta_percentage == reference.factor_holtwinters_delta_percentage
+        assert second.factor_holtwinters_state == reference.factor_holtwinters_state
+        expected = fund_for()
+        expected.estimate_able = True
+        expected.estimate_value = second.estimate_value
+        expected.factor_cal_holtwinters()
+        expected.factor_cal_holtwinters_delta_percentage()
+        assert second.factor_holtwinters_estimate == expected.factor_holtwinters_estimate
+        assert second.factor_holtwinters_estimate_delta_percentage == expected.factor_holtwinters_estimate_delta_percentage
+
+    def test_cache_miss_on_param_change(self, cache, nav_values, fund_for):
+        fund = fund_for(cache=cache)
+        fund.factor_cal_holtwinters()
+        other = fund_for(dict(PARAMS, alpha=0.1), cache=cache)
+        other.factor_cal_holtwinters()
+        expected = HoltWintersIndicator.rolling_smooth(nav_values[::-1], 0.1, 0.02, 0.2, 12)[::-1]
+        np.testing.assert_allclose(other.factor_holtwinters, expected, rtol=1e-12)
+        assert len(os.listdir(cache.cache_dir)) == 2
+
+    def test_delta_percentage_recomputed_for_other_delta(self, cache, fund_for):
+        """同一键下缓存的HDP只在差分序列相同时使用"""
+        first = fund_for(cache=cache)
+        first.factor_cal_holtwinters()
+        first.factor_cal_holtwinters_delta_percentage()
+
+        second = fund_for(cache=cache)
+        second.factor_cal_holtwinters()
+        # 长度相同但内容不同的差分（例如调用方修改了平滑序列）
+        second.factor_holtwinters_delta = [-d for d in second.factor_holtwinters_delta]
+        second.factor_cal_holtwinters_delta_percentage()
+        expected, _ = HoltWintersIndicator.calculate_delta_percentage(second.factor_holtwinters_delta)
+        assert second.factor_holtwinters_delta_percentage == expected
+        assert second.factor_holtwinters_delta_percentage != first.factor_holtwinters_delta_percentage
+
+    def test_cache_is_per_instance(self, cache, fund_for):
+        cached = fund_for(cache=cache)
+        plain = fund_for()
+        assert cached.factor_cache is cache and plain.factor_cache is None
+        plain.factor_cal_holtwinters()
+        assert os.listdir(cache.cache_dir) == []
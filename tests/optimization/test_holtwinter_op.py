@@ -0,0 +1,24 @@
+"""
+HoltWinters 参数优化测试
+"""
+
+import numpy as np
+import pytest
+
+from dffc.optimization.holtwinter_op import optimize_holtwinters_parameters
+
+
+class TestOptimizeHoltWintersParameters:
+    @pytest.mark.filterwarnings('error::RuntimeWarning')
+    def test_flat_data_skips_all_seasons(self):
+        # 净值没有波动时所有网格点的RSS都是NaN，不应抛出异常或警告
+        params, season, rss = optimize_holtwinters_parameters(np.ones(120), 40, 120, disp=False)
+        assert params is None and season is None
+        assert rss == np.inf
+
+    def test_fits_noisy_data(self):
+        rng = np.random.default_rng(0)
+        data = np.cumprod(1 + rng.normal(0, 0.01, 200)) + 0.02 * np.sin(np.arange(200) / 2.0)
+        params, season, rss = optimize_holtwinters_parameters(data, 60, 200, disp=False)
+        assert len(params) == 3 and 7 <= season <= 24
+        assert np.isfinite(rss)
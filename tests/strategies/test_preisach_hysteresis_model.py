@@ -0,0 +1,106 @@
+"""
+Preisach磁滞模型测试
+验证逐点推进的磁滞算子与整段计算的结果一致
+"""
+
+import numpy as np
+import pytest
+
+from dffc.strategies.advanced.preisach_hysteresis_model import (
+    preisach_hysteresis, PreisachOperator, create_sinusoidal_input
+)
+
+
+@pytest.fixture
+def H_array():
+    np.random.seed(0)
+    return create_sinusoidal_input(num_points=120, frequency_cycles=3, noise_level=0.05, decay_rate=1.0)
+
+
+class TestPreisachOperator:
+
+    @pytest.mark.parametrize("kwargs", [
+        dict(),
+        dict(threshold_max=1.0, grid_size=30, sigma=3, center_bias=0.6, updownclip=0.95),
+    ])
+    def test_update_matches_prefix_computation(self, H_array, kwargs):
+        operator = PreisachOperator(**kwargs)
+        for t, H in enumerate(H_array):
+            result = operator.update(H)
+            if t % 17 == 0 or t == len(H_array) - 1:
+                expected = preisach_hysteresis(H_array[:t+1], **kwargs)[-1]
+                assert result == pytest.approx(expected, rel=1e-10, abs=1e-12)
+        assert operator.count == len(H_array)
+
+    def test_update_many_and_reset(self, H_array):
+        operator = PreisachOperator()
+        first = operator.update_many(H_array[:50])
+        operator.update_many(H_array[50:])
+        operator.reset()
+        again = operator.update_many(H_array[:50])
+        np.testing.assert_array_equal(first, again)
+        # 全部输入后，最后一个值使用全部数据的极值归一化
+        full = PreisachOperator().update_many(H_array)
+        assert full[-1] == pytest.approx(preisach_hysteresis(H_array)[-1], rel=1e-10)
+
+    def test_constant_input(self):
+        operator = PreisachOperator(updownclip=0.9)
+        values = operator.update_many([0.0, 0.0, 0.0])
+        expected = preisach_hysteresis([0.0, 0.0, 0.0], updownclip=0.9)
+        np.testing.assert_allclose(values, expected, rtol=1e-12)
+
+
+def reference_preisach_hysteresis(H_array, threshold_max=1.0, grid_size=50, sigma=40, center_bias=0.5, updownclip=0.9):
+    """原始的逐点、逐继电器循环实现"""
+    H_input = np.array(H_array)
+    alpha_grid = np.linspace(-threshold_max, threshold_max, grid_size)
+    beta_grid = np.linspace(-threshold_max, threshold_max, grid_size)
+    dα = alpha_grid[1] - alpha_grid[0]
+    dβ = beta_grid[1] - beta_grid[0]
+    distribution = np.zeros((grid_size, grid_size))
+    valid_mask = np.zeros((grid_size, grid_size), dtype=bool)
+    for i, alpha in enumerate(alpha_grid):
+        for j, beta in enumerate(beta_grid):
+            if alpha >= beta:
+                distribution[i, j] = np.exp(-2 * sigma**2 * ((alpha - center_bias)**2 + (beta + center_bias)**2))
+                valid_mask[i, j] = True
+    relay_states = np.full((grid_size, grid_size), -1.0)
+    M_result = np.zeros_like(H_input)
+    for idx, H in enumerate(H_input):
+        for i, alpha in enumerate(alpha_grid):
+            for j, beta in enumerate(beta_grid):
+                if valid_mask[i, j]:
+                    if H >= alpha:
+                        relay_states[i, j] = 1.0
+                    elif H <= beta:
+                        relay_states[i, j] = -1.0
+        M_result[idx] = np.sum(distribution * relay_states * valid_mask) * dα * dβ
+    M_min, M_max = M_result.min(), M_result.max()
+    if M_max > M_min:
+        M_result = (M_result - M_min) / (M_max - M_min)
+    return M_result * (2*updownclip-1) + (1 - updownclip)
+
+
+class TestVectorizedPreisach:
+
+    @pytest.mark.parametrize("kwargs", [
+        dict(),
+        dict(grid_size=30, sigma=3, center_bias=0.6, updownclip=0.95),
+        dict(grid_size=30, sigma=4, center_bias=0.3, updownclip=0.9),
+        dict(grid_size=7, sigma=1, center_bias=0.0, updownclip=0.8),
+    ])
+    def test_matches_reference(self, H_array, kwargs):
+        np.testing.assert_allclose(preisach_hysteresis(H_array, **kwargs),
+                                   reference_preisach_hysteresis(H_array, **kwargs), rtol=1e-9, atol=1e-10)
+
+    def test_inputs_on_grid_thresholds(self):
+        """输入恰好落在阈值上时，同一时刻向上翻转优先"""
+        grid = np.linspace(-1.0, 1.0, 9)
+        H = np.concatenate([grid, grid[::-1], grid[::2], [1.5, -1.5, 0.0]])
+        np.testing.assert_allclose(preisach_hysteresis(H, grid_size=9, sigma=1, center_bias=0.2),
+                                   reference_preisach_hysteresis(H, grid_size=9, sigma=1, center_bias=0.2),
+                                   rtol=1e-9, atol=1e-10)
+
+    def test_single_and_empty_input(self):
+        np.testing.assert_allclose(preisach_hysteresis([0.3]), reference_preisach_hysteresis([0.3]))
+        assert preisach_hysteresis([]).shape == (0,)
@@ -0,0 +1,54 @@
+"""
+双基金磁滞回线再平衡策略测试
+"""
+
+import pytest
+import numpy as np
+from datetime import datetime
+
+from dffc.strategies.multi_asset.rick_strategy_reallocation_dual_LR import StrategyExample
+
+
+@pytest.fixture
+def funds(make_funds):
+    # 两只基金的HDP反相摆动，差值反复穿过 ±threshold1；第二只基金缺少部分交易日
+    funds = make_funds(n_days=240, seed=7, drift=0.0003,
+                       dates_for=lambda k, dates: dates if k == 0 else [d for i, d in enumerate(dates) if i % 9 != 4])
+    for k, fund in enumerate(funds):
+        n = len(fund._unit_value_ls)
+        fund.factor_holtwinters_delta_percentage = list((1 - 2 * k) * np.sin(np.arange(n) / 7.0))[::-1]
+    return funds
+
+
+def run_both(funds, **params):
+    start, end = datetime(2023, 1, 2), datetime(2023, 8, 1)
+    loop = StrategyExample(funds, start, end).set_params(verbose=0, **params)
+    loop.run()
+    fast = StrategyExample(funds, start, end).set_params(verbose=0, **params)
+    fast.run_vectorized()
+    return loop, fast
+
+
+class TestStrategyExample:
+    @pytest.mark.parametrize('params', [{}, {'target_position': [1., 1.], 'adjust_factor': 0.3}])
+    def test_vectorized_matches_run(self, funds, params):
+        loop, fast = run_both(funds, **params)
+        assert not any(line.startswith('Error') for line in loop.log)
+        assert list(fast.ledger.dates) == list(loop.ledger.dates)
+        np.testing.assert_allclose(fast.ledger.shares, loop.ledger.shares, atol=1e-10)
+        np.testing.assert_allclose(fast.ledger.values, loop.ledger.values, atol=1e-10)
+        assert len(fast.trade_list) == len(loop.trade_list)
+        assert (fast.memory_switch, fast.memory_target_position) == (loop.memory_switch, loop.memory_target_position)
+        assert fast.result_info_dict()['final_value'] == pytest.approx(loop.result_info_dict()['final_value'])
+
+    def test_hysteresis_rebalances(self, funds):
+        loop, _ = run_both(funds, target_position=[1., 1.], adjust_factor=0.3)
+        # 建仓日一次调到目标仓位
+        np.testing.assert_allclose(loop.ledger.values[0], [0., 0.5, 0.5])
+        weights = loop.ledger.values[:, 1] / loop.ledger.values.sum(axis=1)
+        assert weights.min() < 0.35 and weights.max() > 0.65
+
+    def test_set_params_normalizes_target_position(self, funds):
+        strategy = StrategyExample(funds, datetime(2023, 1, 2), datetime(2023, 8, 1)).set_params(target_position=[1, 3])
+        assert strategy.target_position == [0.25, 0.75]
+        assert strategy.memory_target_position == [0.25, 0.75]